@@ -4,11 +4,13 @@ import psycopg2
 import cx_Oracle
 import subprocess
 from dotenv import load_dotenv
+from keyless_compare import keyless_compare
 
 load_dotenv()
 
 TABLE_NAME = os.getenv("TABLE_NAME")
 RANDOM_ROWS = int(os.getenv("RANDOM_ROWS"))
+KEYLESS_MAX_ROWS = int(os.getenv("KEYLESS_MAX_ROWS", "1000"))
 VPN_NAME = os.getenv("VPN_NAME")
 VPN_USER = os.getenv("VPN_USER")
 VPN_PASS = os.getenv("VPN_PASS")
@@ -51,74 +53,89 @@ def get_primary_keys_postgres(table):
 PRIMARY_KEYS = get_primary_keys_postgres(TABLE_NAME)
 ORDER_PK = ", ".join(PRIMARY_KEYS)
 
-# ----------------------------------------------------------------------
-# STEP 2: Query Postgres random rows
-# ----------------------------------------------------------------------
-sql_pg = f"""
-SELECT * FROM {TABLE_NAME}
-ORDER BY RANDOM()
-LIMIT {RANDOM_ROWS}
-"""
-
-pg_df = pd.read_sql(sql_pg, PG_CONN).sort_values(by=PRIMARY_KEYS)
-
-# ----------------------------------------------------------------------
-# STEP 3: Sinh điều kiện WHERE cho Oracle
-# ----------------------------------------------------------------------
-where_conditions = []
-for _, row in pg_df[PRIMARY_KEYS].iterrows():
-    cond = " AND ".join([
-        f"{pk} = '{row[pk]}'" if row[pk] is not None else f"{pk} IS NULL"
-        for pk in PRIMARY_KEYS
-    ])
-    where_conditions.append(f"({cond})")
-
-WHERE_ORACLE = " OR ".join(where_conditions)
-print("\n--- WHERE FOR ORACLE ---")
-print(WHERE_ORACLE)
-
-# ----------------------------------------------------------------------
-# STEP 4: Export Postgres → CSV
-# ----------------------------------------------------------------------
-os.makedirs("data", exist_ok=True)  # tạo folder nếu chưa tồn tại
+if PRIMARY_KEYS:
+    # ----------------------------------------------------------------------
+    # STEP 2: Query Postgres random rows
+    # ----------------------------------------------------------------------
+    sql_pg = f"""
+    SELECT * FROM {TABLE_NAME}
+    ORDER BY RANDOM()
+    LIMIT {RANDOM_ROWS}
+    """
 
-pg_df.to_csv("data/postgres_data.csv", index=False, na_rep="<<NULL>>")
+    pg_df = pd.read_sql(sql_pg, PG_CONN).sort_values(by=PRIMARY_KEYS)
+
+    # ----------------------------------------------------------------------
+    # STEP 3: Sinh điều kiện WHERE cho Oracle
+    # ----------------------------------------------------------------------
+    where_conditions = []
+    for _, row in pg_df[PRIMARY_KEYS].iterrows():
+        cond = " AND ".join([
+            f"{pk} = '{row[pk]}'" if row[pk] is not None else f"{pk} IS NULL"
+            for pk in PRIMARY_KEYS
+        ])
+        where_conditions.append(f"({cond})")
+
+    WHERE_ORACLE = " OR ".join(where_conditions)
+    print("\n--- WHERE FOR ORACLE ---")
+    print(WHERE_ORACLE)
+
+    # ----------------------------------------------------------------------
+    # STEP 4: Export Postgres → CSV
+    # ----------------------------------------------------------------------
+    os.makedirs("data", exist_ok=True)  # tạo folder nếu chưa tồn tại
+
+    pg_df.to_csv("data/postgres_data.csv", index=False, na_rep="<<NULL>>")
+
+    print("\n✅ Export Postgres → postgres_data.csv")
+
+    # ----------------------------------------------------------------------
+    # STEP 5: Connect VPN (Windows built-in VPN)
+    # ----------------------------------------------------------------------
+    # cmd = f'rasdial "{VPN_NAME}" {VPN_USER} {VPN_PASS}'
+    # subprocess.run(cmd, shell=True)
+
+    # print("\n✅ VPN connected")
+
+    # ----------------------------------------------------------------------
+    # STEP 6: Query Oracle theo điều kiện WHERE
+    # ----------------------------------------------------------------------
+    sql_ora = f"""
+    SELECT * FROM {TABLE_NAME}
+    WHERE {WHERE_ORACLE}
+    """
 
-print("\n✅ Export Postgres → postgres_data.csv")
+    ora_df = pd.read_sql(sql_ora, ORA_CONN)
 
-# ----------------------------------------------------------------------
-# STEP 5: Connect VPN (Windows built-in VPN)
-# ----------------------------------------------------------------------
-# cmd = f'rasdial "{VPN_NAME}" {VPN_USER} {VPN_PASS}'
-# subprocess.run(cmd, shell=True)
+    # ✅ convert tất cả cột của oracle về lowercase
+    ora_df.columns = map(str.lower, ora_df.columns)
 
-# print("\n✅ VPN connected")
+    # ✅ sort theo danh sách PRIMARY_KEYS (cũng là lowercase)
+    ora_df = ora_df.sort_values(by=[pk.lower() for pk in PRIMARY_KEYS])
 
-# ----------------------------------------------------------------------
-# STEP 6: Query Oracle theo điều kiện WHERE
-# ----------------------------------------------------------------------
-sql_ora = f"""
-SELECT * FROM {TABLE_NAME}
-WHERE {WHERE_ORACLE}
-"""
-
-ora_df = pd.read_sql(sql_ora, ORA_CONN)
 
-# ✅ convert tất cả cột của oracle về lowercase
-ora_df.columns = map(str.lower, ora_df.columns)
+    # ----------------------------------------------------------------------
+    # STEP 7: Export Oracle → CSV
+    # ----------------------------------------------------------------------
+    # Convert None → <<NULL>>
+    ora_df = ora_df.fillna("<<NULL>>")
 
-# ✅ sort theo danh sách PRIMARY_KEYS (cũng là lowercase)
-ora_df = ora_df.sort_values(by=[pk.lower() for pk in PRIMARY_KEYS])
+    ora_df.to_csv("data/oracle_data.csv", index=False, na_rep="<<NULL>>")
+    print("\n✅ Export Oracle → oracle_data.csv")
 
+else:
+    # ------------------------------------------------------------------
+    # Bảng không có primary key: so sánh multiset (row-hash, count) trên server
+    # ------------------------------------------------------------------
+    print("\n⚠️ No primary key → keyless multiset compare")
+    pg_df, ora_df = keyless_compare(PG_CONN, ORA_CONN, TABLE_NAME, KEYLESS_MAX_ROWS)
 
-# ----------------------------------------------------------------------
-# STEP 7: Export Oracle → CSV
-# ----------------------------------------------------------------------
-# Convert None → <<NULL>>
-ora_df = ora_df.fillna("<<NULL>>")
+    os.makedirs("data", exist_ok=True)
+    pg_df.to_csv("data/postgres_data.csv", index=False, na_rep="<<NULL>>")
+    print("\n✅ Export Postgres → postgres_data.csv")
+    ora_df.to_csv("data/oracle_data.csv", index=False, na_rep="<<NULL>>")
+    print("\n✅ Export Oracle → oracle_data.csv")
 
-ora_df.to_csv("data/oracle_data.csv", index=False, na_rep="<<NULL>>")
-print("\n✅ Export Oracle → oracle_data.csv")
 
 # ----------------------------------------------------------------------
 # STEP 8: Mở WinMerge so sánh
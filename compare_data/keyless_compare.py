@@ -0,0 +1,185 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+NULL_TOKEN = "<<NULL>>"
+HASH_GROUP_SIZE = 100   # 100 x md5 (32 ký tự) = 3200 ký tự, dưới giới hạn VARCHAR2 4000 của Oracle
+LOB_PREFIX_CHARS = 1000  # Chỉ so sánh 1000 ký tự / byte đầu của LOB (STANDARD_HASH không nhận CLOB/BLOB)
+IN_LIST_SIZE = 1000     # Oracle giới hạn 1000 phần tử trong IN (...)
+
+NUMBER_TYPES_PG = ("smallint", "integer", "bigint", "numeric", "real", "double precision")
+NUMBER_TYPES_ORA = ("NUMBER", "FLOAT", "BINARY_FLOAT", "BINARY_DOUBLE", "INTEGER")
+
+
+# ----------------------------------------------------------------------
+# Metadata
+# ----------------------------------------------------------------------
+def get_columns_postgres(conn, table):
+    sql = """
+    SELECT column_name, data_type
+    FROM   information_schema.columns
+    WHERE  table_schema = current_schema() AND table_name = lower(%s)
+    ORDER  BY ordinal_position
+    """
+    with conn.cursor() as cur:
+        cur.execute(sql, (table,))
+        return [(row[0], row[1]) for row in cur.fetchall()]
+
+
+def get_columns_oracle(conn, table):
+    sql = "SELECT column_name, data_type FROM user_tab_columns WHERE table_name = upper(:1)"
+    cur = conn.cursor()
+    try:
+        cur.execute(sql, (table,))
+        return {row[0]: row[1] for row in cur.fetchall()}
+    finally:
+        cur.close()
+
+
+# ----------------------------------------------------------------------
+# Biểu thức chuẩn hóa giá trị về text giống nhau ở cả hai phía
+# ----------------------------------------------------------------------
+def pg_value_expr(col, data_type):
+    if data_type in NUMBER_TYPES_PG:
+        text = f"{col}::numeric::text"
+        return f"CASE WHEN position('.' in {text}) > 0 THEN rtrim(rtrim({text}, '0'), '.') ELSE {text} END"
+    if data_type == "date" or data_type.startswith("timestamp without"):
+        return f"to_char({col}::timestamp, 'YYYY-MM-DD HH24:MI:SS.US')"
+    if data_type.startswith("timestamp with"):
+        return f"to_char({col} AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS.US')"
+    if data_type == "bytea":
+        return f"upper(encode(substring({col} from 1 for {LOB_PREFIX_CHARS}), 'hex'))"
+    if data_type == "text":
+        # text thường là CLOB bên Oracle
+        return f"NULLIF(left({col}, {LOB_PREFIX_CHARS}), '')"
+    # Oracle coi '' là NULL, character::text đã bỏ khoảng trắng cuối
+    return f"NULLIF({col}::text, '')"
+
+
+def ora_value_expr(col, data_type):
+    if data_type in NUMBER_TYPES_ORA:
+        return f"RTRIM(TO_CHAR({col}, 'FM999999999999999999999999999990.999999999999999999999999999999'), '.')"
+    if data_type == "DATE" or data_type.startswith("TIMESTAMP"):
+        if "TIME ZONE" in data_type:
+            return f"TO_CHAR(SYS_EXTRACT_UTC({col}), 'YYYY-MM-DD HH24:MI:SS.FF6')"
+        return f"TO_CHAR(CAST({col} AS TIMESTAMP), 'YYYY-MM-DD HH24:MI:SS.FF6')"
+    if data_type in ("BLOB",):
+        return f"RAWTOHEX(DBMS_LOB.SUBSTR({col}, {LOB_PREFIX_CHARS}, 1))"
+    if data_type == "RAW":
+        return f"RAWTOHEX({col})"
+    if data_type in ("CLOB", "NCLOB"):
+        return f"DBMS_LOB.SUBSTR({col}, {LOB_PREFIX_CHARS}, 1)"
+    if data_type in ("CHAR", "NCHAR"):
+        return f"RTRIM({col})"
+    return f"TO_CHAR({col})"
+
+
+def _groups(items):
+    return [items[i:i + HASH_GROUP_SIZE] for i in range(0, len(items), HASH_GROUP_SIZE)]
+
+
+def pg_row_hash_expr(columns):
+    col_hashes = [f"md5(coalesce({pg_value_expr(c, t)}, '{NULL_TOKEN}'))" for c, t in columns]
+    groups = [f"md5({' || '.join(g)})" for g in _groups(col_hashes)]
+    return groups[0] if len(groups) == 1 else f"md5({' || '.join(groups)})"
+
+
+def ora_row_hash_expr(columns):
+    def md5(expr):
+        return f"LOWER(RAWTOHEX(STANDARD_HASH({expr}, 'MD5')))"
+    col_hashes = [md5(f"NVL({ora_value_expr(c, t)}, '{NULL_TOKEN}')") for c, t in columns]
+    groups = [md5(" || ".join(g)) for g in _groups(col_hashes)]
+    return groups[0] if len(groups) == 1 else md5(" || ".join(groups))
+
+
+# ----------------------------------------------------------------------
+# So sánh (row-hash, count)
+# ----------------------------------------------------------------------
+def _fetch_hash_counts(conn, sql):
+    cur = conn.cursor()
+    try:
+        cur.execute(sql)
+        counts = Counter()
+        while True:
+            rows = cur.fetchmany(50000)
+            if not rows:
+                break
+            counts.update({h: c for h, c in rows})
+        return counts
+    finally:
+        cur.close()
+
+
+def _fetch_rows_by_hash(conn, table, hash_expr, surplus, max_rows, placeholder):
+    """Fetch at most surplus[h] rows per hash (and max_rows in total) from one side."""
+    hashes = list(surplus)
+    frames = []
+    taken = Counter()
+    total = 0
+    cur = conn.cursor()
+    try:
+        for i in range(0, len(hashes), IN_LIST_SIZE):
+            if total >= max_rows:
+                break
+            batch = hashes[i:i + IN_LIST_SIZE]
+            params = ", ".join(placeholder(j) for j in range(len(batch)))
+            cur.execute(f"SELECT * FROM (SELECT {hash_expr} AS row_hash, t.* FROM {table} t) x "
+                        f"WHERE row_hash IN ({params})", batch)
+            columns = [col[0].lower() for col in cur.description]
+            rows = []
+            for row in cur.fetchall():
+                h = row[0]
+                if taken[h] < surplus[h] and total < max_rows:
+                    taken[h] += 1
+                    total += 1
+                    rows.append(row)
+            frames.append(pd.DataFrame(rows, columns=columns))
+    finally:
+        cur.close()
+    if not frames:
+        return pd.DataFrame(columns=["row_hash"])
+    df = pd.concat(frames, ignore_index=True)
+    df.insert(1, "diff_count", df["row_hash"].map(surplus))
+    return df.sort_values(by="row_hash")
+
+
+def keyless_compare(pg_conn, ora_conn, table, max_rows=1000):
+    """
+    Compare a table without primary key as a multiset of rows.
+
+    Each side groups by a server-side md5 of the whole normalized row, giving (row_hash, count) pairs.
+    Only hash groups whose counts differ are fetched back as representative rows.
+
+    Returns (pg_df, ora_df): rows present more often on that side, with row_hash and diff_count columns.
+    """
+    pg_columns = get_columns_postgres(pg_conn, table)
+    ora_types = get_columns_oracle(ora_conn, table)
+
+    missing = [c for c, _ in pg_columns if c.upper() not in ora_types]
+    if missing:
+        print(f"⚠️ Columns missing in Oracle (ignored): {missing}")
+    pg_columns = [(c, t) for c, t in pg_columns if c.upper() in ora_types]
+    ora_columns = [(c.upper(), ora_types[c.upper()]) for c, _ in pg_columns]
+
+    pg_hash = pg_row_hash_expr(pg_columns)
+    ora_hash = ora_row_hash_expr(ora_columns)
+
+    # Hai phía GROUP BY song song
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        pg_future = executor.submit(_fetch_hash_counts, pg_conn,
+                                    f"SELECT row_hash, count(*) FROM (SELECT {pg_hash} AS row_hash FROM {table} t) x GROUP BY row_hash")
+        ora_future = executor.submit(_fetch_hash_counts, ora_conn,
+                                     f"SELECT row_hash, COUNT(*) FROM (SELECT {ora_hash} AS row_hash FROM {table} t) GROUP BY row_hash")
+        pg_counts = pg_future.result()
+        ora_counts = ora_future.result()
+
+    only_pg = pg_counts - ora_counts
+    only_ora = ora_counts - pg_counts
+    print(f"PostgreSQL: {sum(pg_counts.values())} rows / {len(pg_counts)} distinct, "
+          f"Oracle: {sum(ora_counts.values())} rows / {len(ora_counts)} distinct")
+    print(f"Rows only in PostgreSQL: {sum(only_pg.values())}, only in Oracle: {sum(only_ora.values())}")
+
+    pg_df = _fetch_rows_by_hash(pg_conn, table, pg_hash, only_pg, max_rows, lambda i: "%s")
+    ora_df = _fetch_rows_by_hash(ora_conn, table, ora_hash, only_ora, max_rows, lambda i: f":{i + 1}")
+    return pg_df, ora_df
@@ -1,35 +1,54 @@
+import os
+import sys
+import argparse
 import oracledb
 import psycopg2
 import pandas as pd
-import hashlib
+import time
+from row_hash import hash_rows, compare_multisets, pick_surplus_rows
+from stream_diff import stream_compare, CHUNK_SIZE, MEMORY_MB
 
-# Hàm kết nối và lấy dữ liệu từ Oracle
-def get_data_oracle(query):
-    conn = oracledb.connect(
+# Hàm kết nối Oracle
+def connect_oracle():
+    return oracledb.connect(
         user="AIPBODEV",
         password="Abc12345",
         dsn="localhost:1522/ORCLPDB1"
     )
-    df = pd.read_sql(query, conn)
-    conn.close()
-    return df
 
-# Hàm kết nối và lấy dữ liệu từ PostgreSQL
-def get_data_postgres(query):
-    conn = psycopg2.connect(
+# Hàm kết nối PostgreSQL
+def connect_postgres():
+    return psycopg2.connect(
         dbname="bo_dev_jp_utf8",
         user="postgres",
         password="Abc12345",
         host="localhost",
         port="5432"
     )
+
+# Hàm kết nối và lấy dữ liệu từ Oracle
+def get_data_oracle(query):
+    conn = connect_oracle()
+    df = pd.read_sql(query, conn)
+    conn.close()
+    return df
+
+# Hàm kết nối và lấy dữ liệu từ PostgreSQL
+def get_data_postgres(query):
+    conn = connect_postgres()
     df = pd.read_sql(query, conn)
     conn.close()
     return df
 
-# Hàm tạo hash cho từng dòng để so sánh nhanh
-def hash_row(row):
-    return hashlib.md5(str(row.values).encode()).hexdigest()
+# Lấy dữ liệu qua fetch_engine (Arrow, không tạo object Python cho từng ô)
+def get_data_arrow(connect, query):
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+    from fetch_engine import fetch_dataframe
+    conn = connect()
+    try:
+        return fetch_dataframe(conn, query)
+    finally:
+        conn.close()
 
 # # Query bạn muốn chạy (nên có ORDER BY theo khóa chính)
 # queryOracle = "SELECT * FROM MS_JAN PARTITION (MS_JAN_P01) ORDER BY JAN_CODE"
@@ -38,25 +57,78 @@ def hash_row(row):
 queryOracle = "SELECT * FROM ms_jan order by jan_code"
 queryPostgres = "SELECT * FROM public.ms_jan order by jan_code"
 
-# Lấy dữ liệu
-oracle_df = get_data_oracle(queryOracle)
-pg_df = get_data_postgres(queryPostgres)
 
-# Tạo hash từng dòng
-oracle_hashes = oracle_df.apply(hash_row, axis=1)
-pg_hashes = pg_df.apply(hash_row, axis=1)
+def compare_in_memory(query_oracle, query_postgres, arrow=False):
+    # Lấy dữ liệu
+    if arrow:
+        oracle_df = get_data_arrow(connect_oracle, query_oracle)
+        pg_df = get_data_arrow(connect_postgres, query_postgres)
+    else:
+        oracle_df = get_data_oracle(query_oracle)
+        pg_df = get_data_postgres(query_postgres)
+
+    # Tạo hash từng dòng (vector hóa theo cột, 64-bit)
+    start_time = time.time()
+    oracle_hashes = hash_rows(oracle_df)
+    pg_hashes = hash_rows(pg_df)
+    print(f"Hash {len(oracle_df)} + {len(pg_df)} dòng trong {time.time() - start_time:.3f}s")
+
+    # So sánh dạng multiset (hash -> số lần xuất hiện): không phụ thuộc thứ tự, đếm cả dòng trùng
+    only_oracle, only_pg = compare_multisets(oracle_hashes, pg_hashes)
+
+    if only_oracle.empty and only_pg.empty:
+        print("✅ Dữ liệu giống nhau!")
+    else:
+        print("❌ Dữ liệu khác nhau!")
+
+        # Tùy chọn: hiển thị dòng khác nhau
+        diffs = pick_surplus_rows(oracle_df, oracle_hashes, only_oracle)
+        print(f"\nDòng khác trong Oracle ({only_oracle.sum()}):")
+        print(diffs)
+
+        diffs_pg = pick_surplus_rows(pg_df, pg_hashes, only_pg)
+        print(f"\nDòng khác trong PostgreSQL ({only_pg.sum()}):")
+        print(diffs_pg)
+
+
+def compare_streaming(query_oracle, query_postgres, ordered, chunk_size, memory_mb, spill_dir):
+    # Mỗi phía dùng một kết nối duy nhất, fetch song song theo chunk
+    oracle_conn = connect_oracle()
+    pg_conn = connect_postgres()
+    try:
+        result = stream_compare(oracle_conn, query_oracle, pg_conn, query_postgres, ordered=ordered,
+                                chunk_size=chunk_size, memory_mb=memory_mb, spill_dir=spill_dir)
+    finally:
+        oracle_conn.close()
+        pg_conn.close()
+
+    print(f"Oracle: {result['rows_left']} dòng, PostgreSQL: {result['rows_right']} dòng "
+          f"({result['elapsed']:.3f}s)")
+    if result["errors"]:
+        print("❌ Lỗi:\n" + "\n".join(result["errors"]))
+    elif result["only_left"] == 0 and result["only_right"] == 0:
+        print("✅ Dữ liệu giống nhau!")
+    else:
+        print("❌ Dữ liệu khác nhau!")
+        label = "dòng số" if ordered else "hash"
+        print(f"\nOracle: {result['only_left']} dòng khác, {label}: {result['sample_left']}")
+        print(f"PostgreSQL: {result['only_right']} dòng khác, {label}: {result['sample_right']}")
 
-# So sánh kết quả
-if oracle_hashes.equals(pg_hashes):
-    print("✅ Dữ liệu giống nhau!")
-else:
-    print("❌ Dữ liệu khác nhau!")
 
-    # Tùy chọn: hiển thị dòng khác nhau
-    diffs = oracle_df[~oracle_hashes.isin(pg_hashes)]
-    print("\nDòng khác trong Oracle:")
-    print(diffs)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="So sánh kết quả query giữa Oracle và PostgreSQL")
+    parser.add_argument("--oracle-query", default=queryOracle)
+    parser.add_argument("--postgres-query", default=queryPostgres)
+    parser.add_argument("--stream", action="store_true", help="Fetch theo chunk, bộ nhớ giới hạn")
+    parser.add_argument("--ordered", action="store_true", help="So sánh theo vị trí dòng (cần ORDER BY đầy đủ)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--memory-mb", type=int, default=MEMORY_MB)
+    parser.add_argument("--spill-dir", default=None, help="Thư mục tạm chứa partition hash")
+    parser.add_argument("--arrow", action="store_true", help="Fetch bằng fetch_engine (Arrow) thay vì pd.read_sql")
+    args = parser.parse_args()
 
-    diffs_pg = pg_df[~pg_hashes.isin(oracle_hashes)]
-    print("\nDòng khác trong PostgreSQL:")
-    print(diffs_pg)
+    if args.stream:
+        compare_streaming(args.oracle_query, args.postgres_query, args.ordered,
+                          args.chunk_size, args.memory_mb, args.spill_dir)
+    else:
+        compare_in_memory(args.oracle_query, args.postgres_query, args.arrow)
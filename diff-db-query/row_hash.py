@@ -0,0 +1,187 @@
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+HASH_BATCH_SIZE = 500_000  # Số dòng hash mỗi lần để giới hạn bộ nhớ tạm
+NULL_HASH = np.uint64(0x9E3779B97F4A7C15)  # Hash cố định cho NULL / NaN / NaT
+
+
+def _first_value(series: pd.Series):
+    non_null = series.dropna()
+    return non_null.iloc[0] if len(non_null) else None
+
+
+def hash_column(series: pd.Series) -> np.ndarray:
+    """
+    Hash one column to uint64 over a canonical value, so Oracle and PostgreSQL values hash the same.
+
+    - numbers (int, float, Decimal, NUMBER) -> exact integer when integral, so 1, 1.0 and Decimal('1.00')
+      are equal and 17+ digit IDs keep every digit; other values at float64 precision (see _hash_numbers)
+    - datetime / date -> datetime64[ns]
+    - text -> str with trailing spaces (CHAR padding) removed
+    - NULL / NaN / NaT -> NULL_HASH
+    """
+    null = series.isna().to_numpy()
+    first = _first_value(series)
+
+    if pd.api.types.is_datetime64_any_dtype(series) or isinstance(first, (pd.Timestamp, date)):
+        values = pd.to_datetime(series)
+        if values.dt.tz is not None:
+            values = values.dt.tz_convert(None)
+        hashes = pd.util.hash_array(values.to_numpy("datetime64[ns]").view("int64"))
+    elif (pd.api.types.is_numeric_dtype(series)
+          or (isinstance(first, (int, float, Decimal)) and not isinstance(first, bool))):
+        hashes = _hash_numbers(series)
+    else:
+        hashes = _hash_text(series)
+
+    hashes[null] = NULL_HASH
+    return hashes
+
+
+def _hash_numbers(series: pd.Series) -> np.ndarray:
+    """
+    Hash a numeric column over a canonical number, vectorized.
+
+    - integral values below 2**63 -> int64 (1, 1.0, Decimal('1.00') are equal)
+    - larger integral values -> their exact decimal text (17+ digit IDs keep every digit)
+    - other finite values and +/-Infinity -> float64
+    - NaN -> NULL_HASH, like NULL
+    Non-numeric values in an object column (text mixed with numbers) hash as their text.
+    """
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_signed_integer_dtype(series):
+        return pd.util.hash_array(series.to_numpy().astype("int64"))
+    if pd.api.types.is_float_dtype(series) or pd.api.types.is_unsigned_integer_dtype(series):
+        return _hash_floats(series.to_numpy(dtype="float64"))
+
+    # Cột object (Decimal, int Python...): đổi sang float64 một lần, chỉ xử lý từng giá trị
+    # ở những chỗ float64 không chính xác (|x| >= 2**53) hoặc không phải số
+    objects = series.to_numpy(dtype=object)
+    try:
+        values = objects.astype("float64")
+    except (TypeError, ValueError, OverflowError):
+        values = np.array([_as_float(v) for v in objects], dtype="float64")
+    hashes = _hash_floats(values)
+    big = np.flatnonzero(np.abs(values) >= 2.0 ** 53)
+    exact = [_exact_int(v) for v in objects[big]]
+    big = [i for i, v in zip(big, exact) if v is not None]
+    if big:
+        hashes[big] = _hash_integers([v for v in exact if v is not None])
+    text = np.flatnonzero(np.isnan(values) & series.notna().to_numpy())
+    text = [i for i in text if not (isinstance(objects[i], Decimal) and objects[i].is_nan())]
+    if text:
+        hashes[text] = _hash_text(series.iloc[text])
+    return hashes
+
+
+def _exact_int(value):
+    # Giá trị nguyên chính xác của int / Decimal nguyên, None với số lẻ, Infinity, text...
+    try:
+        integer = int(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return integer if integer == value else None
+
+
+def _as_float(value) -> float:
+    try:
+        return float(value)
+    except OverflowError:
+        return float("inf") if value > 0 else float("-inf")
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _hash_floats(values: np.ndarray) -> np.ndarray:
+    values = values + 0.0  # -0.0 -> 0.0
+    hashes = pd.util.hash_array(values)
+    integral = np.isfinite(values) & (np.floor(values) == values)
+    small = integral & (np.abs(values) < 2.0 ** 63)
+    hashes[small] = pd.util.hash_array(values[small].astype("int64"))
+    big = integral & ~small
+    if big.any():
+        hashes[big] = _hash_integers([int(v) for v in values[big]])
+    hashes[np.isnan(values)] = NULL_HASH
+    return hashes
+
+
+def _hash_integers(values: list) -> np.ndarray:
+    # int64 khi vừa, ngoài khoảng đó hash chuỗi thập phân đầy đủ
+    small = np.array([-2 ** 63 <= v < 2 ** 63 for v in values], dtype=bool)
+    hashes = np.empty(len(values), dtype="uint64")
+    if small.any():
+        hashes[small] = pd.util.hash_array(np.array([v for v in values if -2 ** 63 <= v < 2 ** 63], dtype="int64"))
+    if not small.all():
+        hashes[~small] = pd.util.hash_array(
+            np.array([str(v) for v in values if not -2 ** 63 <= v < 2 ** 63], dtype=object), categorize=False)
+    return hashes
+
+
+def _hash_text(series: pd.Series) -> np.ndarray:
+    values = series.astype(str).str.rstrip().to_numpy(dtype=object)
+    return pd.util.hash_array(values, categorize=False)
+
+
+def combine_hashes(column_hashes) -> np.ndarray:
+    """Combine per-column hashes into one order-sensitive row hash (same mixing as pandas)."""
+    count = len(column_hashes)
+    result = np.full(len(column_hashes[0]), 0x345678, dtype="uint64")
+    mult = np.uint64(1000003)
+    for i, hashes in enumerate(column_hashes):
+        result ^= hashes
+        result *= mult
+        mult += np.uint64(82520 + 2 * (count - i - 1))
+    result += np.uint64(97531)
+    return result
+
+
+def hash_rows(df: pd.DataFrame, batch_size: int = HASH_BATCH_SIZE) -> pd.Series:
+    """
+    Compute a 64-bit hash per row, column-wise and in batches.
+
+    Column names are ignored (Oracle upper case vs PostgreSQL lower case), only the column order matters.
+    Returns a uint64 Series aligned with df.index.
+    """
+    if df.empty or df.shape[1] == 0:
+        return pd.Series(np.zeros(len(df), dtype="uint64"), index=df.index)
+
+    parts = []
+    for start in range(0, len(df), batch_size):
+        batch = df.iloc[start:start + batch_size]
+        column_hashes = [hash_column(batch.iloc[:, i]) for i in range(batch.shape[1])]
+        parts.append(combine_hashes(column_hashes))
+    return pd.Series(np.concatenate(parts), index=df.index)
+
+
+def count_hashes(hashes) -> pd.Series:
+    """Multiset of row hashes: hash -> number of occurrences."""
+    return pd.Series(hashes, dtype="uint64").value_counts(sort=False)
+
+
+def compare_hash_counts(left_counts: pd.Series, right_counts: pd.Series):
+    """
+    Compare two multisets of row hashes (order independent, duplicates counted).
+
+    Returns (only_left, only_right): Series hash -> surplus count on that side.
+    """
+    diff = left_counts.sub(right_counts, fill_value=0)
+    only_left = diff[diff > 0].astype("int64")
+    only_right = (-diff[diff < 0]).astype("int64")
+    return only_left, only_right
+
+
+def compare_multisets(left_hashes: pd.Series, right_hashes: pd.Series):
+    return compare_hash_counts(count_hashes(left_hashes), count_hashes(right_hashes))
+
+
+def pick_surplus_rows(df: pd.DataFrame, hashes: pd.Series, surplus: pd.Series) -> pd.DataFrame:
+    """Select, for every hash in surplus, as many rows of df as that side has in excess."""
+    if surplus.empty:
+        return df.iloc[0:0]
+    in_surplus = hashes.isin(surplus.index).to_numpy()
+    selected_hashes = hashes[in_surplus]
+    occurrence = selected_hashes.groupby(selected_hashes).cumcount()
+    keep = occurrence.to_numpy() < selected_hashes.map(surplus).to_numpy()
+    return df[in_surplus][keep]
@@ -0,0 +1,222 @@
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from row_hash import hash_rows, compare_hash_counts
+
+CHUNK_SIZE = 50_000      # Số dòng mỗi lần fetchmany
+MEMORY_MB = 512          # Ngân sách bộ nhớ cho việc so sánh một partition
+PARTITION_BITS = 8       # 2^8 = 256 partition hash ghi ra đĩa
+QUEUE_DEPTH = 2          # Số chunk chờ tối đa mỗi phía (back-pressure cho thread fetch)
+
+_DONE = object()
+
+
+def fetch_chunks(connection, query, db_type, chunk_size=CHUNK_SIZE):
+    """
+    Yield DataFrames of at most chunk_size rows without loading the whole result.
+
+    Oracle uses fetchmany with arraysize/prefetchrows = chunk_size,
+    PostgreSQL uses a named (server-side) cursor so rows stay on the server until fetched.
+    """
+    if db_type == "oracle":
+        cursor = connection.cursor()
+        cursor.arraysize = chunk_size
+        cursor.prefetchrows = chunk_size
+    else:
+        cursor = connection.cursor(name="diff_db_query_stream")
+        cursor.itersize = chunk_size
+    try:
+        cursor.execute(query)
+        columns = None
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            if columns is None:
+                columns = [col[0].lower() for col in cursor.description]
+            yield pd.DataFrame.from_records(rows, columns=columns)
+    finally:
+        cursor.close()
+
+
+class HashSpill:
+    """Append row hashes of one side to 2^bits partition files on local disk."""
+
+    def __init__(self, directory, side, bits=PARTITION_BITS):
+        self.directory = directory
+        self.side = side
+        self.bits = bits
+        self.rows = 0
+
+    def path(self, partition):
+        return os.path.join(self.directory, f"{self.side}_{partition:04d}.bin")
+
+    def add(self, hashes: np.ndarray):
+        partitions = hashes >> np.uint64(64 - self.bits)
+        order = np.argsort(partitions, kind="stable")
+        hashes = hashes[order]
+        partitions = partitions[order]
+        bounds = np.flatnonzero(np.diff(partitions)) + 1
+        for start, end in zip(np.r_[0, bounds], np.r_[bounds, len(hashes)]):
+            with open(self.path(int(partitions[start])), "ab") as f:
+                hashes[start:end].tofile(f)
+        self.rows += len(hashes)
+
+    def load(self, partition):
+        path = self.path(partition)
+        if not os.path.exists(path):
+            return np.empty(0, dtype="uint64")
+        return np.fromfile(path, dtype="uint64")
+
+
+def _counts(hashes: np.ndarray) -> pd.Series:
+    values, counts = np.unique(hashes, return_counts=True)
+    return pd.Series(counts, index=values)
+
+
+def _compare_partition(left: np.ndarray, right: np.ndarray, budget_bytes, shift, result):
+    """Compare one partition; split it again on the next bits when it does not fit in the budget."""
+    # np.unique cần khoảng 3 lần kích thước mảng (sort + counts)
+    if (left.nbytes + right.nbytes) * 3 > budget_bytes and len(left) + len(right) > 4096 and shift >= 4:
+        shift -= 4
+        left_keys = (left >> np.uint64(shift)) & np.uint64(0xF)
+        right_keys = (right >> np.uint64(shift)) & np.uint64(0xF)
+        for key in range(16):
+            _compare_partition(left[left_keys == key], right[right_keys == key], budget_bytes, shift, result)
+        return
+    only_left, only_right = compare_hash_counts(_counts(left), _counts(right))
+    result["only_left"] += int(only_left.sum())
+    result["only_right"] += int(only_right.sum())
+    for name, surplus in (("sample_left", only_left), ("sample_right", only_right)):
+        room = result["max_samples"] - len(result[name])
+        if room > 0:
+            result[name].extend(f"{h:016x}" for h in surplus.index[:room])
+
+
+def _producer(connection, query, db_type, chunk_size, out: queue.Queue, errors: list):
+    try:
+        for chunk in fetch_chunks(connection, query, db_type, chunk_size):
+            out.put(hash_rows(chunk).to_numpy())
+    except Exception as e:
+        errors.append(f"{db_type}: {e}")
+    finally:
+        out.put(_DONE)
+
+
+def stream_compare(oracle_conn, oracle_query, pg_conn, pg_query, ordered=False,
+                   chunk_size=CHUNK_SIZE, memory_mb=MEMORY_MB, spill_dir=None, max_samples=10):
+    """
+    Fetch both sides concurrently in chunks and compare row hashes as they arrive.
+
+    ordered=True  -> rows are compared position by position (queries must have a total ORDER BY)
+    ordered=False -> hashes are spilled to partition files and compared as multisets
+
+    Peak memory is about 2 * QUEUE_DEPTH chunks plus memory_mb for one partition.
+    Returns a summary dict.
+    """
+    start_time = time.time()
+    queues = {"oracle": queue.Queue(QUEUE_DEPTH), "postgres": queue.Queue(QUEUE_DEPTH)}
+    errors = []
+    threads = [
+        threading.Thread(target=_producer, args=(oracle_conn, oracle_query, "oracle", chunk_size, queues["oracle"], errors), daemon=True),
+        threading.Thread(target=_producer, args=(pg_conn, pg_query, "postgres", chunk_size, queues["postgres"], errors), daemon=True),
+    ]
+    for t in threads:
+        t.start()
+
+    result = {"rows_left": 0, "rows_right": 0, "only_left": 0, "only_right": 0,
+              "sample_left": [], "sample_right": [], "max_samples": max_samples}
+
+    if ordered:
+        _compare_ordered(queues, result)
+    else:
+        work_dir = tempfile.mkdtemp(prefix="diff_db_query_", dir=spill_dir)
+        try:
+            spills = {"oracle": HashSpill(work_dir, "oracle"), "postgres": HashSpill(work_dir, "postgres")}
+            _drain_to_spill(queues, spills)
+            result["rows_left"] = spills["oracle"].rows
+            result["rows_right"] = spills["postgres"].rows
+            if not errors:
+                for partition in range(2 ** PARTITION_BITS):
+                    _compare_partition(spills["oracle"].load(partition), spills["postgres"].load(partition),
+                                       memory_mb * 1024 * 1024, 64 - PARTITION_BITS, result)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    for t in threads:
+        t.join()
+    result.pop("max_samples")
+    result["errors"] = errors
+    result["elapsed"] = time.time() - start_time
+    return result
+
+
+def _drain_to_spill(queues, spills):
+    # Đọc luân phiên hai queue để thread nào cũng không bị chặn lâu
+    pending = set(queues)
+    while pending:
+        for side in list(pending):
+            try:
+                hashes = queues[side].get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if hashes is _DONE:
+                pending.discard(side)
+            else:
+                spills[side].add(hashes)
+
+
+def _compare_ordered(queues, result):
+    buffers = {"oracle": np.empty(0, dtype="uint64"), "postgres": np.empty(0, dtype="uint64")}
+    done = {"oracle": False, "postgres": False}
+    position = 0
+
+    while True:
+        for side in buffers:
+            # Mỗi phía cần ít nhất một chunk trong buffer để so sánh
+            while not done[side] and len(buffers[side]) == 0:
+                hashes = queues[side].get()
+                if hashes is _DONE:
+                    done[side] = True
+                else:
+                    buffers[side] = np.concatenate([buffers[side], hashes])
+        left, right = buffers["oracle"], buffers["postgres"]
+        if len(left) == 0 or len(right) == 0:
+            break
+        n = min(len(left), len(right))
+        mismatch = np.flatnonzero(left[:n] != right[:n])
+        result["only_left"] += len(mismatch)
+        result["only_right"] += len(mismatch)
+        # Với chế độ có thứ tự, sample là số dòng (1-based) bị lệch, cùng số dòng ở cả hai phía
+        for name in ("sample_left", "sample_right"):
+            room = result["max_samples"] - len(result[name])
+            if room > 0:
+                result[name].extend(int(position + i + 1) for i in mismatch[:room])
+        result["rows_left"] += n
+        result["rows_right"] += n
+        position += n
+        buffers["oracle"], buffers["postgres"] = left[n:], right[n:]
+
+    # Phần dư của phía dài hơn
+    for side, key, rows_key, sample_key in (("oracle", "only_left", "rows_left", "sample_left"),
+                                            ("postgres", "only_right", "rows_right", "sample_right")):
+        extra = len(buffers[side])
+        while not done[side]:
+            hashes = queues[side].get()
+            if hashes is _DONE:
+                done[side] = True
+            else:
+                extra += len(hashes)
+        room = result["max_samples"] - len(result[sample_key])
+        if room > 0:
+            # Các dòng chỉ có ở phía này bắt đầu sau dòng cuối của phía ngắn hơn
+            result[sample_key].extend(range(position + 1, position + 1 + min(extra, room)))
+        result[key] += extra
+        result[rows_key] += extra
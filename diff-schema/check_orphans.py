@@ -0,0 +1,168 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from html import escape
+
+from tabulate import tabulate
+
+from compare_schemas import (
+    ansi_to_html,
+    connect_postgres,
+    get_foreign_key_constraints_postgres,
+    get_postgres_tables,
+    get_primary_key_columns_postgres,
+)
+
+# Số truy vấn anti-join chạy song song trên PostgreSQL
+MAX_WORKERS = int(os.getenv("ORPHAN_MAX_WORKERS", "4"))
+# Số giá trị PK mỗi chunk khi quét bảng con lớn
+CHUNK_SIZE = int(os.getenv("ORPHAN_CHUNK_SIZE", "1000000"))
+# Số key mẫu của dòng mồ côi giữ lại cho mỗi FK
+SAMPLE_SIZE = int(os.getenv("ORPHAN_SAMPLE_SIZE", "10"))
+# statement_timeout (ms) cho mỗi session, 0 = không giới hạn
+STATEMENT_TIMEOUT = int(os.getenv("ORPHAN_STATEMENT_TIMEOUT", "0"))
+
+_local = threading.local()
+_connections = []
+_connections_lock = threading.Lock()
+
+
+def get_worker_cursor():
+    """Each worker thread keeps its own connection, psycopg connections are not shared between threads."""
+    cursor = getattr(_local, "cursor", None)
+    if cursor is None:
+        conn = connect_postgres()
+        with _connections_lock:
+            _connections.append(conn)
+        cursor = conn.cursor()
+        if STATEMENT_TIMEOUT:
+            cursor.execute(f"SET statement_timeout = {STATEMENT_TIMEOUT}")
+        _local.cursor = cursor
+    return cursor
+
+def close_worker_connections():
+    with _connections_lock:
+        for conn in _connections:
+            conn.close()
+        _connections.clear()
+
+def build_orphan_condition(fk_columns, ref_table, ref_columns):
+    # Dòng có một cột FK NULL không bị kiểm tra (giống MATCH SIMPLE)
+    not_null = " AND ".join(f"c.{col} IS NOT NULL" for col in fk_columns)
+    join_on = " AND ".join(f"p.{ref} = c.{col}" for col, ref in zip(fk_columns, ref_columns))
+    return f"{not_null} AND NOT EXISTS (SELECT 1 FROM {ref_table} p WHERE {join_on})"
+
+def get_pk_chunks(cursor, table, pk_columns):
+    """
+    Split a child table into PK ranges of CHUNK_SIZE.
+
+    Only a single integer primary key can be range-chunked, other tables are scanned in one query.
+    Returns a list of (low, high) tuples, or [None] for a full scan.
+    """
+    if len(pk_columns) != 1:
+        return [None]
+    pk = pk_columns[0]
+    cursor.execute(f"SELECT min({pk}), max({pk}) FROM {table}")
+    low, high = cursor.fetchone()
+    if not isinstance(low, int) or not isinstance(high, int) or high - low < CHUNK_SIZE:
+        return [None]
+    return [(start, min(start + CHUNK_SIZE, high + 1)) for start in range(low, high + 1, CHUNK_SIZE)]
+
+def scan_chunk(table, fk, pk_columns, chunk):
+    """Run the anti-join of one FK on one PK range, returns (orphan_count, sample_keys, elapsed)."""
+    name, fk_columns, ref_table, ref_columns = fk
+    cursor = get_worker_cursor()
+    condition = build_orphan_condition(fk_columns, ref_table, ref_columns)
+    if chunk:
+        condition += f" AND c.{pk_columns[0]} >= {chunk[0]} AND c.{pk_columns[0]} < {chunk[1]}"
+
+    start = time.time()
+    cursor.execute(f"SELECT count(*) FROM {table} c WHERE {condition}")
+    count = cursor.fetchone()[0]
+    samples = []
+    if count:
+        key_columns = pk_columns or fk_columns
+        select_keys = ", ".join(f"c.{col}" for col in key_columns)
+        cursor.execute(f"SELECT {select_keys} FROM {table} c WHERE {condition} LIMIT {SAMPLE_SIZE}")
+        samples = [dict(zip(key_columns, row)) for row in cursor.fetchall()]
+    return count, samples, time.time() - start
+
+def collect_foreign_keys(cursor):
+    """Returns [(table, pk_columns, fk, chunks)] for every FK of the current schema."""
+    work = []
+    for table in get_postgres_tables(cursor):
+        fks = get_foreign_key_constraints_postgres(cursor, table)
+        if not fks:
+            continue
+        pk_columns = [col.lower() for col in get_primary_key_columns_postgres(cursor, table)]
+        chunks = get_pk_chunks(cursor, table, pk_columns)
+        for fk in fks:
+            work.append((table, pk_columns, fk, chunks))
+    return work
+
+def main():
+    RED = "\033[91m"
+    GREEN = "\033[92m"
+    RESET = "\033[0m"
+
+    start_time = time.time()
+    meta_conn = connect_postgres()
+    work = collect_foreign_keys(meta_conn.cursor())
+    meta_conn.close()
+    print(f"🔍 {len(work)} foreign keys to check with {MAX_WORKERS} workers")
+
+    results = {}
+    for table, pk_columns, fk, chunks in work:
+        results[(table, fk[0])] = {"table": table, "fk": fk, "count": 0, "samples": [], "elapsed": 0.0, "error": None}
+
+    try:
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = {}
+            for table, pk_columns, fk, chunks in work:
+                for chunk in chunks:
+                    future = executor.submit(scan_chunk, table, fk, pk_columns, chunk)
+                    futures[future] = (table, fk[0])
+
+            for future in as_completed(futures):
+                result = results[futures[future]]
+                try:
+                    count, samples, elapsed = future.result()
+                except Exception as e:
+                    result["error"] = str(e)
+                    continue
+                result["count"] += count
+                result["elapsed"] += elapsed
+                result["samples"].extend(samples[:SAMPLE_SIZE - len(result["samples"])])
+    finally:
+        close_worker_connections()
+
+    rows = []
+    for result in results.values():
+        name, fk_columns, ref_table, ref_columns = result["fk"]
+        if result["error"]:
+            status = f"\U0001F534 {RED}ERROR: {result['error']}{RESET}"
+        elif result["count"]:
+            status = f"\U0001F534 {RED}{result['count']} orphan rows{RESET}"
+        else:
+            status = f"{GREEN}OK{RESET}"
+        rows.append([
+            result["table"], name,
+            ", ".join(fk_columns), f"{ref_table}({', '.join(ref_columns)})",
+            result["count"], "; ".join(str(s) for s in result["samples"]),
+            f"{result['elapsed']:.1f}s", status,
+        ])
+
+    headers = ["Table", "Constraint", "Columns", "References", "Orphans", "Sample Keys", "Time", "Status"]
+    print(tabulate(rows, headers=headers, tablefmt="fancy_grid"))
+
+    with open("orphan_report.html", "w", encoding="utf-8") as f:
+        f.write("<html><head><meta charset='UTF-8'><title>Orphan Report</title></head><body>")
+        f.write(f"<h2>🔍 Referential integrity check ({escape(time.strftime('%Y-%m-%d %H:%M:%S'))})</h2>")
+        f.write(ansi_to_html(tabulate(rows, headers=headers, tablefmt="html")))
+        f.write("</body></html>")
+
+    print(f"\n📁 HTML report saved to orphan_report.html ({time.time() - start_time:.1f}s)")
+
+if __name__ == "__main__":
+    main()
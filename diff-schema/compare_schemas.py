@@ -148,6 +148,45 @@ def get_foreign_keys_postgres(cursor, table):
     """, (table,))
     return [(row[0].upper(), row[1].upper(), row[2].upper()) for row in cursor.fetchall()]
 
+def get_foreign_key_constraints_postgres(cursor, table):
+    # Same metadata as get_foreign_keys_postgres, grouped per constraint so composite keys stay together
+    cursor.execute("""
+        SELECT
+            con.conname,
+            array_agg(att2.attname ORDER BY cols.ord) AS columns,
+            cl.relname AS referenced_table,
+            array_agg(att.attname ORDER BY cols.ord) AS referenced_columns
+        FROM
+            pg_constraint con
+        JOIN pg_class tbl ON tbl.oid = con.conrelid
+        CROSS JOIN LATERAL unnest(con.conkey) WITH ORDINALITY AS cols(colid, ord)
+        JOIN pg_attribute att2 ON att2.attrelid = con.conrelid AND att2.attnum = cols.colid
+        CROSS JOIN LATERAL unnest(con.confkey) WITH ORDINALITY AS refcols(colid, ord)
+        JOIN pg_attribute att ON att.attrelid = con.confrelid AND att.attnum = refcols.colid AND refcols.ord = cols.ord
+        JOIN pg_class cl ON cl.oid = con.confrelid
+        WHERE
+            con.contype = 'f'
+            AND tbl.relname = lower(%s)
+            AND tbl.relkind IN ('r', 'p')
+            AND NOT EXISTS (SELECT 1 FROM pg_inherits WHERE inhrelid = tbl.oid)
+            AND NOT EXISTS (SELECT 1 FROM pg_inherits WHERE inhrelid = cl.oid)
+        GROUP BY con.conname, cl.relname
+        ORDER BY con.conname
+    """, (table,))
+    return [(row[0], list(row[1]), row[2], list(row[3])) for row in cursor.fetchall()]
+
+def get_postgres_tables(cursor):
+    cursor.execute("""
+        SELECT c.relname
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = current_schema()
+            AND c.relkind IN ('r', 'p')
+            AND NOT EXISTS (SELECT 1 FROM pg_inherits WHERE inhrelid = c.oid)
+        ORDER BY c.relname
+    """)
+    return [row[0] for row in cursor.fetchall()]
+
 def map_type(oracle_type, precision=None, scale=None):
     pg_type = TYPE_MAPPING.get(oracle_type)
     if isinstance(pg_type, list):
@@ -0,0 +1,77 @@
+"""
+Shared fetch engine: run a query on Oracle or PostgreSQL and get Arrow record batches.
+
+    import oracledb
+    from fetch_engine import fetch_batches, fetch_dataframe
+
+    reader = fetch_batches(oracle_connection, "SELECT * FROM ms_jan")
+    for batch in reader:            # pyarrow.RecordBatch of at most batch_size rows
+        ...
+    df = fetch_dataframe(pg_connection, "SELECT * FROM public.ms_jan")
+
+Both databases produce the same canonical schema (see schema.py), so columns of the two sides
+can be compared with vectorized Arrow / pandas operations.
+"""
+from typing import Optional
+
+import pyarrow as pa
+
+from .schema import number_type, number_text, oracle_field, postgres_field, rows_to_batch, to_array
+from .oracle import describe, oracle_batches
+from .postgres import postgres_batches
+
+batch_size = 50000  # Rows per record batch
+
+
+def detect_db_type(connection) -> str:
+    """'oracle' or 'postgresql' from the driver of the connection."""
+    module = type(connection).__module__.split('.')[0].lower()
+    if module in ('oracledb', 'cx_oracle'):
+        return 'oracle'
+    if module in ('psycopg2', 'psycopg'):
+        return 'postgresql'
+    raise ValueError(f"Unsupported connection type: {type(connection).__module__}.{type(connection).__name__}")
+
+
+def fetch_batches(connection, query: str, params=None, db_type: Optional[str] = None,
+                  size: Optional[int] = None) -> pa.RecordBatchReader:
+    """
+    Stream the result of a query as Arrow record batches.
+
+    Args:
+        connection: oracledb / cx_Oracle or psycopg2 / psycopg connection.
+        query: SELECT statement.
+        params: Bind parameters.
+        db_type: 'oracle' or 'postgresql', detected from the connection when omitted.
+        size: Rows per batch (default batch_size).
+
+    Returns:
+        pyarrow.RecordBatchReader with the canonical schema (lower-case column names).
+    """
+    db_type = (db_type or detect_db_type(connection)).lower()
+    size = size or batch_size
+    if db_type == 'oracle':
+        schema = describe(connection, query)
+        batches = oracle_batches(connection, query, params, size, schema)
+    else:
+        schema, batches = postgres_batches(connection, query, params, size)
+    return pa.RecordBatchReader.from_batches(schema, batches)
+
+
+def fetch_table(connection, query: str, params=None, db_type: Optional[str] = None,
+                size: Optional[int] = None) -> pa.Table:
+    """Whole result of a query as an Arrow table."""
+    return fetch_batches(connection, query, params, db_type, size).read_all()
+
+
+def fetch_dataframe(connection, query: str, params=None, db_type: Optional[str] = None,
+                    size: Optional[int] = None):
+    """Whole result of a query as a pandas DataFrame (converted from Arrow, column by column)."""
+    return fetch_table(connection, query, params, db_type, size).to_pandas()
+
+
+__all__ = [
+    "batch_size", "detect_db_type", "fetch_batches", "fetch_table", "fetch_dataframe",
+    "describe", "oracle_batches", "postgres_batches",
+    "number_type", "number_text", "oracle_field", "postgres_field", "rows_to_batch", "to_array",
+]
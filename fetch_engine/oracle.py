@@ -0,0 +1,57 @@
+"""Oracle record batches: oracledb DataFrame fetch, row-to-column fallback for cx_Oracle."""
+from decimal import Decimal
+from typing import Iterator, Optional
+
+import pyarrow as pa
+
+from .schema import oracle_field, rows_to_batch, is_number_text
+
+
+def _decimal_numbers(cursor, name, default_type, size, precision, scale):
+    # NUMBER as Decimal instead of int / float, so unconstrained numbers keep every digit
+    if getattr(default_type, 'name', str(default_type)) == 'DB_TYPE_NUMBER':
+        return cursor.var(Decimal, arraysize=cursor.arraysize)
+
+
+def describe(connection, query: str) -> pa.Schema:
+    """Canonical schema of a query, from a parse (no execution)."""
+    cursor = connection.cursor()
+    try:
+        cursor.parse(query)
+        return pa.schema([oracle_field(column) for column in cursor.description])
+    finally:
+        cursor.close()
+
+
+def oracle_batches(connection, query: str, params=None, batch_size: int = 50000,
+                   schema: Optional[pa.Schema] = None) -> Iterator[pa.RecordBatch]:
+    """
+    Yield the rows of a query as record batches of the canonical schema.
+
+    With python-oracledb the rows are fetched directly into Arrow buffers (fetch_df_batches),
+    no Python object is created per value; the batches are then cast to the canonical types.
+    Other drivers (cx_Oracle), and queries with unconstrained NUMBER columns (the DataFrame fetch
+    turns them into float64), go through fetchmany with Decimal values and a row-to-column transpose.
+    """
+    schema = schema or describe(connection, query)
+    exact_numbers = any(is_number_text(field) for field in schema)
+    if hasattr(connection, 'fetch_df_batches') and not exact_numbers:
+        for frame in connection.fetch_df_batches(query, params, size=batch_size, fetch_decimals=True):
+            if frame.num_rows() == 0:
+                continue
+            table = pa.table(frame).rename_columns(schema.names).cast(schema)
+            yield from table.to_batches()
+        return
+
+    cursor = connection.cursor()
+    try:
+        cursor.arraysize = batch_size
+        cursor.outputtypehandler = _decimal_numbers
+        cursor.execute(query, params or [])
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows_to_batch(rows, schema)
+    finally:
+        cursor.close()
@@ -0,0 +1,40 @@
+"""PostgreSQL record batches: server-side cursor and row-to-column transpose."""
+import uuid
+from typing import Iterator, Tuple
+
+import pyarrow as pa
+
+from .schema import postgres_field, rows_to_batch
+
+
+def postgres_batches(connection, query: str, params=None,
+                     batch_size: int = 50000) -> Tuple[pa.Schema, Iterator[pa.RecordBatch]]:
+    """
+    Execute a query on a server-side cursor and return (schema, iterator of record batches).
+
+    Only batch_size rows are held in memory at a time. Works with psycopg2 and psycopg 3.
+    The schema is known once the first batch is fetched (psycopg2 named cursors describe
+    their columns only then), so the first batch is read before returning.
+    """
+    # Named cursors need a transaction, WITH HOLD keeps them open in autocommit mode
+    cursor = connection.cursor(name=f"fetch_engine_{uuid.uuid4().hex[:12]}",
+                               withhold=bool(getattr(connection, 'autocommit', False)))
+    try:
+        cursor.itersize = batch_size
+        cursor.execute(query, params)
+        first = cursor.fetchmany(batch_size)
+        schema = pa.schema([postgres_field(column) for column in cursor.description])
+    except Exception:
+        cursor.close()
+        raise
+
+    def batches():
+        try:
+            rows = first
+            while rows:
+                yield rows_to_batch(rows, schema)
+                rows = cursor.fetchmany(batch_size)
+        finally:
+            cursor.close()
+
+    return schema, batches()
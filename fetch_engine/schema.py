@@ -0,0 +1,158 @@
+"""Canonical Arrow types for Oracle and PostgreSQL columns."""
+import json
+from decimal import Decimal
+
+import pyarrow as pa
+
+TIMESTAMP = pa.timestamp('us')
+TIMESTAMP_UTC = pa.timestamp('us', tz='UTC')
+
+ORACLE_TYPES = {
+    'DB_TYPE_BINARY_FLOAT': pa.float64(),
+    'DB_TYPE_BINARY_DOUBLE': pa.float64(),
+    'DB_TYPE_BINARY_INTEGER': pa.int64(),
+    'DB_TYPE_BOOLEAN': pa.bool_(),
+    'DB_TYPE_VARCHAR': pa.string(),
+    'DB_TYPE_NVARCHAR': pa.string(),
+    'DB_TYPE_CHAR': pa.string(),
+    'DB_TYPE_NCHAR': pa.string(),
+    'DB_TYPE_LONG': pa.large_string(),
+    'DB_TYPE_LONG_NVARCHAR': pa.large_string(),
+    'DB_TYPE_CLOB': pa.large_string(),
+    'DB_TYPE_NCLOB': pa.large_string(),
+    'DB_TYPE_ROWID': pa.string(),
+    'DB_TYPE_UROWID': pa.string(),
+    'DB_TYPE_RAW': pa.binary(),
+    'DB_TYPE_LONG_RAW': pa.large_binary(),
+    'DB_TYPE_BLOB': pa.large_binary(),
+    # Oracle DATE has a time part, like the PostgreSQL timestamp it is migrated to
+    'DB_TYPE_DATE': TIMESTAMP,
+    'DB_TYPE_TIMESTAMP': TIMESTAMP,
+    'DB_TYPE_TIMESTAMP_TZ': TIMESTAMP_UTC,
+    'DB_TYPE_TIMESTAMP_LTZ': TIMESTAMP_UTC,
+    'DB_TYPE_INTERVAL_DS': pa.duration('us'),
+}
+
+POSTGRES_TYPES = {
+    16: pa.bool_(),         # bool
+    17: pa.binary(),        # bytea
+    18: pa.string(),        # char
+    19: pa.string(),        # name
+    20: pa.int64(),         # int8
+    21: pa.int64(),         # int2
+    23: pa.int64(),         # int4
+    25: pa.large_string(),  # text
+    26: pa.int64(),         # oid
+    114: pa.large_string(),   # json
+    700: pa.float64(),      # float4
+    701: pa.float64(),      # float8
+    1042: pa.string(),      # bpchar
+    1043: pa.string(),      # varchar
+    1082: pa.date32(),      # date
+    1083: pa.time64('us'),  # time
+    1114: TIMESTAMP,        # timestamp
+    1184: TIMESTAMP_UTC,    # timestamptz
+    1186: pa.duration('us'),  # interval
+    2950: pa.string(),      # uuid
+    3802: pa.large_string(),  # jsonb
+}
+
+NUMERIC_OID = 1700
+
+# Field metadata of unconstrained numbers, fetched as canonical decimal text
+NUMBER_TEXT = {b'fetch_engine.type': b'number'}
+
+
+def number_type(precision, scale) -> pa.DataType:
+    """
+    Canonical type of an exact number column (Oracle NUMBER, PostgreSQL numeric).
+
+    - scale 0 and up to 18 digits -> int64
+    - declared precision/scale within 38 digits -> decimal128(precision, scale)
+    - unconstrained (NUMBER, numeric, FLOAT) -> large_string of the canonical decimal text
+      (see number_text): any scale fits and 17+ digit IDs keep every digit, unlike float64
+    """
+    if not precision or scale is None or scale < 0 or precision > 38:
+        return pa.large_string()
+    if scale == 0 and precision <= 18:
+        return pa.int64()
+    return pa.decimal128(precision, scale)
+
+
+def number_field(name: str, precision, scale) -> pa.Field:
+    arrow_type = number_type(precision, scale)
+    return pa.field(name.lower(), arrow_type, metadata=NUMBER_TEXT if pa.types.is_large_string(arrow_type) else None)
+
+
+def is_number_text(field: pa.Field) -> bool:
+    return bool(field.metadata) and field.metadata.get(b'fetch_engine.type') == b'number'
+
+
+def number_text(value) -> str:
+    """Canonical text of a number: 1, 1.0 and Decimal('1.00') -> "1", Decimal('1.50') -> "1.5"."""
+    if isinstance(value, float):
+        if value.is_integer():
+            return str(int(value))
+        value = Decimal(repr(value))
+    elif not isinstance(value, Decimal):
+        return str(int(value))
+    if not value.is_finite():
+        return str(value)
+    if value == value.to_integral_value():
+        return str(int(value))
+    return format(value.normalize(), 'f')
+
+
+def oracle_field(column) -> pa.Field:
+    """Arrow field of an oracledb / cx_Oracle cursor.description entry (name lower-cased)."""
+    name, type_code, precision, scale = column[0], column[1], column[4], column[5]
+    type_name = getattr(type_code, 'name', str(type_code))
+    if type_name == 'DB_TYPE_NUMBER':
+        return number_field(name, precision, scale)
+    return pa.field(name.lower(), ORACLE_TYPES.get(type_name, pa.large_string()))
+
+
+def postgres_field(column) -> pa.Field:
+    """Arrow field of a psycopg2 / psycopg cursor.description entry."""
+    name, type_code, precision, scale = column[0], column[1], column[4], column[5]
+    if type_code == NUMERIC_OID:
+        return number_field(name, precision, scale)
+    return pa.field(name.lower(), POSTGRES_TYPES.get(type_code, pa.large_string()))
+
+
+def to_array(values, arrow_type: pa.DataType, numbers_as_text: bool = False) -> pa.Array:
+    """
+    Build one Arrow column from Python values, converting to the canonical type.
+
+    Values Arrow cannot convert directly (Decimal to float64, dict from json, ...) are
+    converted value by value (float, JSON text) or inferred first and cast.
+    numbers_as_text: the column is an unconstrained number, values become number_text.
+    """
+    if numbers_as_text:
+        return pa.array([None if v is None else number_text(v) for v in values], type=arrow_type)
+    try:
+        return pa.array(values, type=arrow_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        pass
+    if pa.types.is_floating(arrow_type):
+        return pa.array([None if v is None else float(v) for v in values], type=arrow_type)
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pa.array([_text(v) for v in values], type=arrow_type)
+    return pa.array(values).cast(arrow_type)
+
+
+def _text(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def rows_to_batch(rows, schema: pa.Schema) -> pa.RecordBatch:
+    """Transpose a list of row tuples into a record batch of the schema."""
+    if not rows:
+        return pa.RecordBatch.from_pylist([], schema=schema)
+    columns = zip(*rows)
+    return pa.RecordBatch.from_arrays([to_array(list(values), field.type, is_number_text(field))
+                                       for values, field in zip(columns, schema)], schema=schema)
@@ -8,12 +8,23 @@ import io
 import win32clipboard  # type: ignore
 import pyautogui
 import time
-from src.query_diff import run as run_query_diff
-from src.api_client import call
+import multiprocessing
+from src.query_diff import run as run_query_diff, clear_query_cache
+from src.query_benchmark import run as run_query_benchmark
+from src.api_replay import run as run_api_replay
+from src.api_client import call, call_pair, get_session_registry, DEFAULT_HEADERS
+from src.database.pool_manager import get_pool_manager
+from src.job_manager import JobManager
 
 class Api:
     def __init__(self, window):
         self.window = window
+        self.jobs = JobManager(on_event=self.push_job_event)
+
+    def push_job_event(self, event: dict):
+        # React listens with window.addEventListener('job-progress', ...)
+        self.window.evaluate_js(
+            f"window.dispatchEvent(new CustomEvent('job-progress', {{ detail: {json.dumps(event, ensure_ascii=False)} }}))")
 
     def save_diff_data_files(self, folder: str, name: str, winmerge_path: str,
                              oracle_data: str, postgre_data: str, subfolder: str = "data"):
@@ -248,7 +259,35 @@ class Api:
         # # print(data)
         return result
 
-    def query_diff(self, left_conn_string, left_query, right_conn_string, right_query, work_dir, winmerge_path):
+    def call_api_pair(
+        self,
+        oracle_url: str,
+        postgre_url: str,
+        method: str,
+        oracle_data: dict | str = None,
+        postgre_data: dict | str = None,
+        content_type: str = "application/json",
+        header: dict = DEFAULT_HEADERS
+    ):
+        """Gọi API Oracle và PostgreSQL song song trong một lần gọi bridge."""
+        return call_pair(oracle_url, postgre_url, method, oracle_data, postgre_data, content_type, header)
+
+    def submit_api_replay(self, work_dir: str, names: str = "", concurrency: int = 4, rate: float = 0,
+                          repeat: int = 3):
+        """Replay saved API tests against both backends in the background, returns the job id."""
+        return self.jobs.submit(
+            "api_replay",
+            run_api_replay,
+            work_dir=work_dir,
+            names=names,
+            concurrency=concurrency,
+            rate=rate,
+            repeat=repeat
+        )
+
+    def query_diff(self, left_conn_string, left_query, right_conn_string, right_query, work_dir, winmerge_path,
+                   compare_mode="export", key_columns="", use_cache=True, split_export=False,
+                   capture_plan=False):
         result = run_query_diff(
             left_db_type="Oracle",
             left_use_conn_string="True",
@@ -261,10 +300,78 @@ class Api:
             right_username="", right_password="", right_dsn="", right_host="", right_database="", right_port="",
             right_query=right_query,
             work_dir=work_dir,
-            winmerge_path=winmerge_path
+            winmerge_path=winmerge_path,
+            use_pool=True,
+            compare_mode=compare_mode,
+            key_columns=key_columns,
+            use_cache=use_cache,
+            split_export=split_export,
+            capture_plan=capture_plan
         )
         return result
 
+    def submit_query_diff(self, left_conn_string, left_query, right_conn_string, right_query, work_dir, winmerge_path,
+                          compare_mode="export", key_columns="", use_cache=True, split_export=False,
+                          capture_plan=False):
+        """Start a query diff in the background and return its job id right away."""
+        return self.jobs.submit(
+            "query_diff",
+            run_query_diff,
+            left_db_type="Oracle",
+            left_use_conn_string="True",
+            left_conn_string=left_conn_string,
+            left_username="", left_password="", left_dsn="", left_host="", left_database="", left_port="",
+            left_query=left_query,
+            right_db_type="PostgreSQL",
+            right_use_conn_string="True",
+            right_conn_string=right_conn_string,
+            right_username="", right_password="", right_dsn="", right_host="", right_database="", right_port="",
+            right_query=right_query,
+            work_dir=work_dir,
+            winmerge_path=winmerge_path,
+            use_pool=True,
+            compare_mode=compare_mode,
+            key_columns=key_columns,
+            use_cache=use_cache,
+            split_export=split_export,
+            capture_plan=capture_plan
+        )
+
+    def submit_query_benchmark(self, left_conn_string, left_query, right_conn_string, right_query, work_dir,
+                               runs=5, warmup=1):
+        """Time both queries (warmup + measured runs with full fetch) in the background, returns the job id."""
+        return self.jobs.submit(
+            "query_benchmark",
+            run_query_benchmark,
+            left_db_type="Oracle",
+            left_use_conn_string="True",
+            left_conn_string=left_conn_string,
+            left_username="", left_password="", left_dsn="", left_host="", left_database="", left_port="",
+            left_query=left_query,
+            right_db_type="PostgreSQL",
+            right_use_conn_string="True",
+            right_conn_string=right_conn_string,
+            right_username="", right_password="", right_dsn="", right_host="", right_database="", right_port="",
+            right_query=right_query,
+            work_dir=work_dir,
+            runs=runs,
+            warmup=warmup,
+            use_pool=True
+        )
+
+    def clear_query_cache(self, work_dir: str):
+        """Drop the cached query exports so the next diff re-executes both queries."""
+        return clear_query_cache(work_dir)
+
+    def cancel_job(self, job_id: str):
+        return self.jobs.cancel(job_id)
+
+    def get_job(self, job_id: str):
+        return self.jobs.get(job_id)
+
+    def list_jobs(self):
+        return self.jobs.list()
+
     def get_setting_from_command_line(self):
         # get first arg from command line
         baseUrl = sys.argv[1] if len(sys.argv) > 1 else ''
@@ -320,15 +427,23 @@ class Api:
 def on_loaded(window):
     api = Api(window)
     window.expose(api.query_diff, api.save_diff_data_files, api.save_diff_api_files,
-                  api.call_api, api.save_screenshot, api.get_api_history, api.get_setting_from_command_line)
+                  api.call_api, api.save_screenshot, api.get_api_history, api.get_setting_from_command_line,
+                  api.submit_query_diff, api.cancel_job, api.get_job, api.list_jobs, api.clear_query_cache,
+                  api.submit_query_benchmark, api.call_api_pair, api.submit_api_replay)
+    window.events.closed += api.jobs.shutdown
 
 
 if __name__ == '__main__':
+    # CSV compare worker processes start from the packaged exe
+    multiprocessing.freeze_support()
     # develop
     # window = webview.create_window(
     #     '[DEV] ORA2PG Toolpack', 'http://localhost:5173', min_size=(800, 600))
     # webview.start(on_loaded, window, ssl=False, debug=True, private_mode=False)
     # # production
     window = webview.create_window('ORA2PG Toolpack - 1.3.9', 'views/index.html', min_size=(1200, 900), zoomable=True)
+    # Pooled database sessions live for the whole app session
+    window.events.closed += get_pool_manager().close_all
+    window.events.closed += get_session_registry().close_all
     webview.start(on_loaded, window, ssl=False, debug=False, private_mode=False)
     # webview.start(on_loaded, window, ssl=False, debug=True, private_mode=False)
@@ -0,0 +1,35 @@
+import os
+import sys
+import argparse
+
+from src.api_replay import (load_history, replay_history, format_api_replay, write_api_replay,
+                            DEFAULT_CONCURRENCY, DEFAULT_REPEAT)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay saved API tests against the Oracle and PostgreSQL "
+                                                 "backends, compare the responses and the latency.")
+    parser.add_argument("work_dir", help="Working directory of the lab (saved tests under <work_dir>/api/history)")
+    parser.add_argument("--only", help="Comma separated test names or wildcard patterns, e.g. \"order_*,customer_get\"")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Replays at the same time")
+    parser.add_argument("--rate", type=float, help="Maximum replays started per second")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Replays of every test")
+    args = parser.parse_args()
+
+    only = [name.strip() for name in args.only.split(",")] if args.only else None
+    records = load_history(args.work_dir, only)
+    if not records:
+        print("No saved API tests to replay")
+        sys.exit(2)
+
+    report = replay_history(records, args.concurrency, args.rate, args.repeat)
+    report_path = write_api_replay(args.work_dir, report)
+    print(format_api_replay(report))
+    print(f"Report: {os.path.abspath(report_path)}")
+
+    # 0 = all match, 1 = mismatches or latency regressions, 2 = errors
+    sys.exit(2 if report["error"] else 1 if report["mismatch"] or report["inconsistent"] or report["regressions"] else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+import os
+import sys
+import argparse
+from datetime import datetime
+
+from src.suite_runner import load_suite, connect_profile
+from src.query_diff import close_connection
+from src.workload_replay import (load_workload, workload_from_suite, workload_from_history,
+                                 workload_from_pg_stat_statements, run_replay, format_replay,
+                                 write_replay_report, DEFAULT_SESSIONS, DEFAULT_DURATION)
+
+
+def _profile(db_type, conn_string):
+    return {"db_type": db_type, "conn_string": conn_string} if conn_string else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a weighted query workload against PostgreSQL "
+                                                 "(and optionally Oracle) with concurrent sessions.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--workload", help="Workload JSON file (see load_workload in src/workload_replay.py)")
+    source.add_argument("--suite", help="Suite JSON file, one query per pair (optional \"weight\" per pair)")
+    source.add_argument("--history", metavar="WORK_DIR", help="Query pairs recorded by the lab's query diff")
+    source.add_argument("--pg-stat-statements", action="store_true", help="Most called SELECTs of pg_stat_statements")
+    parser.add_argument("--pg", help="PostgreSQL connection string (${VAR} expanded), overrides the file profile")
+    parser.add_argument("--oracle", help="Oracle connection string, overrides the file profile")
+    parser.add_argument("--with-oracle", action="store_true", help="Also replay the Oracle queries for comparison")
+    parser.add_argument("--sessions", type=int, default=DEFAULT_SESSIONS)
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="Seconds per database")
+    parser.add_argument("--top", type=int, default=50, help="Statements taken from pg_stat_statements")
+    parser.add_argument("--seed", type=int, help="Random seed for a repeatable query sequence")
+    parser.add_argument("--report", help="Report path (default workload_report_<timestamp>.json)")
+    args = parser.parse_args()
+
+    postgres_profile = _profile("PostgreSQL", args.pg)
+    oracle_profile = _profile("Oracle", args.oracle)
+    if args.workload:
+        workload = load_workload(args.workload)
+        profiles = workload.get("profiles", {})
+        items = workload["queries"]
+        postgres_profile = postgres_profile or profiles.get(workload.get("postgres"))
+        oracle_profile = oracle_profile or profiles.get(workload.get("oracle"))
+    elif args.suite:
+        suite = load_suite(args.suite)
+        items = workload_from_suite(suite)
+        by_type = {p["db_type"].lower(): p for p in suite["profiles"].values()}
+        postgres_profile = postgres_profile or by_type.get("postgresql")
+        oracle_profile = oracle_profile or by_type.get("oracle")
+    elif args.history:
+        items = workload_from_history(args.history)
+    else:
+        if not postgres_profile:
+            parser.error("--pg is required with --pg-stat-statements")
+        connection = connect_profile(postgres_profile)
+        try:
+            items = workload_from_pg_stat_statements(connection, args.top)
+        finally:
+            close_connection(connection)
+
+    if not postgres_profile:
+        parser.error("No PostgreSQL connection: use --pg")
+    if args.with_oracle and not oracle_profile:
+        parser.error("No Oracle connection: use --oracle")
+    if not items:
+        print("Workload is empty")
+        sys.exit(2)
+
+    report = run_replay(items, postgres_profile, oracle_profile if args.with_oracle else None,
+                        args.sessions, args.duration, args.seed)
+    report_path = args.report or f"workload_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    write_replay_report(report, report_path)
+    print(format_replay(report))
+    print(f"Report: {os.path.abspath(report_path)}")
+
+    # 0 = no errors, 2 = some executions failed
+    errors = report["postgresql"]["errors"] + (report["oracle"]["errors"] if report.get("oracle") else 0)
+    sys.exit(2 if errors else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+import os
+import sys
+import argparse
+from datetime import datetime
+
+from src.suite_runner import load_suite, run_suite, write_report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a suite of Oracle / PostgreSQL query-pair regressions headless.")
+    parser.add_argument("suite", help="Suite JSON file (profiles, defaults, pairs)")
+    parser.add_argument("--work-dir", help="Output directory, overrides work_dir of the suite")
+    parser.add_argument("--workers", type=int, help="Pairs running at the same time, overrides max_workers of the suite")
+    parser.add_argument("--only", help="Comma separated pair names to run")
+    parser.add_argument("--report", help="Report path (default <work_dir>/suite_report_<timestamp>.json)")
+    args = parser.parse_args()
+
+    suite = load_suite(args.suite)
+    only = [name.strip() for name in args.only.split(",")] if args.only else None
+    report = run_suite(suite, args.work_dir, args.workers, only)
+
+    report_path = args.report or os.path.join(
+        report["work_dir"], f"suite_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    write_report(report, report_path)
+    print(f"{report['total']} pairs: {report['identical']} identical, {report['different']} different, "
+          f"{report['error']} errors in {report['elapsed']:.3f} seconds")
+    print(f"Report: {report_path}")
+
+    # 0 = all identical, 1 = differences, 2 = errors
+    sys.exit(2 if report["error"] else 1 if report["different"] else 0)
+
+
+if __name__ == '__main__':
+    main()
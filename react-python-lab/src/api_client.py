@@ -1,18 +1,116 @@
 import requests
 import time
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
 from typing import Dict, Any, Optional
 import json
 
+pool_connections = 10      # Số host giữ pool trong mỗi session
+pool_maxsize = 20          # Số kết nối giữ lại cho mỗi host
+connect_timeout = 10       # Giây
+read_timeout = 120         # Giây
+retry_total = 3            # Số lần thử lại (chỉ các method idempotent: GET, HEAD, PUT, DELETE, OPTIONS, TRACE)
+retry_backoff = 0.5        # Chờ 0.5s, 1s, 2s... giữa các lần thử
+RETRY_STATUSES = (502, 503, 504)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'ORA2PG_Toolpack/7.42.0',
+    'Accept': '*/*',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive'
+}
+
+
+# Số kết nối mới mở trong request đang chạy của từng thread (requests gửi đồng bộ trên thread gọi)
+_new_connections = threading.local()
+
+
+def _count_new_connection():
+    _new_connections.count = getattr(_new_connections, 'count', 0) + 1
+
+
+class _TrackedHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _count_new_connection()
+        return super()._new_conn()
+
+
+class _TrackedHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _count_new_connection()
+        return super()._new_conn()
+
+
+class TrackingHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter ghi nhận việc mở kết nối mới theo từng thread, để biết request có dùng lại kết nối hay không."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _TrackedHTTPConnectionPool,
+                                                   "https": _TrackedHTTPSConnectionPool}
+
+
+class SessionRegistry:
+    """
+    Mỗi host (scheme://host:port) dùng chung một requests.Session trong cả process,
+    để các lần gọi liên tiếp dùng lại kết nối TCP/TLS (keep-alive) thay vì bắt tay lại.
+    """
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+    def session_for(self, url: str) -> requests.Session:
+        key = self.host_key(url)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                retry = Retry(total=retry_total, backoff_factor=retry_backoff, status_forcelist=RETRY_STATUSES,
+                              raise_on_status=False)
+                adapter = TrackingHTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                              max_retries=retry)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                # Không giữ cookie giữa các lần gọi (giống như khi mỗi lần gọi tạo session mới)
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                self._sessions[key] = session
+            return session
+
+    def close_all(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+
+_registry = SessionRegistry()
+
+
+def get_session_registry() -> SessionRegistry:
+    return _registry
+
 
 class APIClient:
-    def __init__(self, headers: Optional[Dict[str, str]] = None):
-        """Khởi tạo API Client với URL cơ sở và headers tùy chọn."""
+    def __init__(self, headers: Optional[Dict[str, str]] = None, session: Optional[requests.Session] = None):
+        """Khởi tạo API Client với headers tùy chọn; session dùng chung (của SessionRegistry) nếu có."""
         self.headers = headers or {
             'User-Agent': 'Mozilla/5.0 (compatible; APIClient/1.0; +https://example.com)',
             'Accept': '*/*',
             'Accept-Encoding': 'gzip, deflate, br'
         }
-        self.session = requests.Session()
+        self.owns_session = session is None
+        self.session = session or requests.Session()
 
     def make_request(
         self,
@@ -47,9 +145,12 @@ class APIClient:
             headers['Content-Type'] = content_type
 
         # Ghi lại thời gian bắt đầu
+        _new_connections.count = 0
         start_time = time.time()
 
         try:
+            # Chỉ adapter của SessionRegistry đếm kết nối mới; session riêng thì không xác định được
+            tracked = isinstance(self.session.get_adapter(url), TrackingHTTPAdapter)
             # Thực hiện yêu cầu
             response = self.session.request(
                 method=method.upper(),
@@ -58,7 +159,8 @@ class APIClient:
                 data=data,
                 json=json_data if json_data is not None and json_data != '' else None,
                 files=files,
-                headers=headers
+                headers=headers,
+                timeout=(connect_timeout, read_timeout)
             )
 
             # Tính thời gian phản hồi
@@ -86,7 +188,10 @@ class APIClient:
                 'request_body': json_data or data,
                 'request_files': files,
                 'ok': response.ok,
-                'reason': response.reason
+                'reason': response.reason,
+                # True khi request này không phải mở kết nối mới (dùng lại kết nối keep-alive), None nếu không rõ
+                'connection_reused': _new_connections.count == 0 if tracked else None,
+                'retries': len(response.raw.retries.history) if getattr(response.raw, 'retries', None) else 0
             }
 
             return response_info
@@ -110,8 +215,9 @@ class APIClient:
             }
 
     def close(self):
-        """Đóng session để giải phóng tài nguyên."""
-        self.session.close()
+        """Đóng session để giải phóng tài nguyên (session dùng chung thì giữ lại)."""
+        if self.owns_session:
+            self.session.close()
 
 
 def call(
@@ -119,12 +225,7 @@ def call(
     method: str,
     data: dict | str = None,
     content_type: str = "application/json",
-    header: dict = {
-        'User-Agent': 'ORA2PG_Toolpack/7.42.0',
-        'Accept': '*/*',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive'
-    }
+    header: dict = DEFAULT_HEADERS
 ) -> dict:
     """
     Gọi API với các tham số được cung cấp và trả về thông tin phản hồi.
@@ -150,9 +251,12 @@ def call(
             - ok: Trạng thái thành công (True/False).
             - reason: Lý do nếu có lỗi.
             - error: Chi tiết lỗi (nếu có).
+            - connection_reused: True nếu dùng lại kết nối đã mở tới host.
+            - retries: Số lần đã thử lại.
     """
     client = APIClient(
-        headers=header
+        headers=header,
+        session=get_session_registry().session_for(url)
     )
 
     try:
@@ -183,18 +287,80 @@ def call(
         return response_info
     except Exception as e:
         print("Error occurred:", str(e))
-        return {
-            'status_code': None,
-            'response_time': 0,
-            'headers': {},
-            'content': str(e),
-            'url': url,
-            'method': method,
-            'request_headers': header,
-            'request_params': data if isinstance(data, dict) else None,
-            'request_body': data if isinstance(data, str) else None,
-            'request_files': None,
-            'ok': False,
-            'reason': 'Request failed',
-            'error': str(e)
-        }
+        return _error_response(url, method, data, header, e)
+
+
+def _error_response(url: str, method: str, data, header: dict, error: BaseException) -> dict:
+    return {
+        'status_code': None,
+        'response_time': 0,
+        'headers': {},
+        'content': str(error),
+        'url': url,
+        'method': method,
+        'request_headers': header,
+        'request_params': data if isinstance(data, dict) else None,
+        'request_body': data if isinstance(data, str) else None,
+        'request_files': None,
+        'ok': False,
+        'reason': 'Request failed',
+        'error': str(error)
+    }
+
+
+def call_pair(
+    oracle_url: str,
+    postgre_url: str,
+    method: str,
+    oracle_data: dict | str = None,
+    postgre_data: dict | str = None,
+    content_type: str = "application/json",
+    header: dict = DEFAULT_HEADERS
+) -> dict:
+    """
+    Gọi API phía Oracle và phía PostgreSQL cùng lúc, mỗi phía một thread.
+
+    Hai thread chờ nhau ở một Barrier rồi mới gửi request, nên hai request bắt đầu gần như đồng thời
+    và tổng thời gian là max của hai lần gọi thay vì tổng.
+
+    Returns:
+        dict:
+            - oracleResponse / postgreResponse: Kết quả của call() cho từng phía.
+            - elapsed: Tổng thời gian (giây).
+            - start_skew_ms: Độ lệch thời điểm bắt đầu giữa hai request (ms), None nếu một phía lỗi trước khi gửi.
+            - timestamp: Thời điểm gọi.
+    """
+    barrier = threading.Barrier(2)
+    results = {}
+    started = {}
+
+    def worker(side, url, data):
+        try:
+            # Tạo session trước barrier để phần chuẩn bị không làm lệch thời điểm gửi
+            get_session_registry().session_for(url)
+            try:
+                barrier.wait(timeout=connect_timeout)
+            except threading.BrokenBarrierError:
+                pass
+            started[side] = time.perf_counter()
+            results[side] = call(url, method, data, content_type, header)
+        except BaseException as e:
+            # Luôn trả về kết quả cho phía này, kể cả khi thread lỗi ngoài call(); không bắt phía kia chờ
+            barrier.abort()
+            results[side] = _error_response(url, method, data, header, e)
+
+    start_time = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=("oracleResponse", oracle_url, oracle_data), name="api-oracle"),
+               threading.Thread(target=worker, args=("postgreResponse", postgre_url, postgre_data), name="api-postgre")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {
+        "oracleResponse": results["oracleResponse"],
+        "postgreResponse": results["postgreResponse"],
+        "elapsed": time.perf_counter() - start_time,
+        "start_skew_ms": round(abs(started["oracleResponse"] - started["postgreResponse"]) * 1000, 3)
+        if len(started) == 2 else None,
+        "timestamp": time.strftime('%Y-%m-%d %H:%M:%S', time.localtime())
+    }
@@ -0,0 +1,279 @@
+import os
+import re
+import json
+import time
+import fnmatch
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+
+from .api_client import call_pair, DEFAULT_HEADERS
+from .job_manager import Job, JobCancelled
+from .helper.stats_helper import latency_summary
+from .helper.logger_helper import get_logger
+
+log = get_logger()
+
+DEFAULT_CONCURRENCY = 4        # Saved requests replayed at the same time (each one calls both backends)
+DEFAULT_REPEAT = 3             # Replays of every saved request
+regression_threshold = 0.2     # p50 more than 20% above the recorded response time is a regression...
+regression_min_ms = 50         # ...when it is also this many ms slower
+
+JSONP_PATTERN = re.compile(r'^\s*callback\(([\s\S]*)\);?\s*$')
+JSON_COMMENTS = re.compile(r'("(?:\\.|[^"\\])*")|//[^\n]*|/\*[\s\S]*?\*/')
+
+
+def load_history(work_dir: str, names: Optional[list] = None) -> list:
+    """
+    Saved API tests (<work_dir>/api/history/<name>/api_report.json) as (name, record) pairs, sorted by name.
+
+    Args:
+        work_dir: Working directory of the lab.
+        names: Names or wildcard patterns (e.g. "order_*") to select, all tests when empty.
+    """
+    history_dir = os.path.join(os.path.expandvars(work_dir), "api", "history")
+    if not os.path.isdir(history_dir):
+        return []
+    records = []
+    for name in sorted(os.listdir(history_dir)):
+        path = os.path.join(history_dir, name, "api_report.json")
+        if not os.path.isfile(path):
+            continue
+        if names and not any(fnmatch.fnmatch(name, pattern) for pattern in names):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            records.append((name, json.load(f)))
+    return records
+
+
+def prepare_body(body: str, body_type: str):
+    """Request body as the API testing view sends it: JSON bodies without comments, parsed."""
+    if body_type != "application/json" or not isinstance(body, str) or not body.strip():
+        return body
+    try:
+        return json.loads(JSON_COMMENTS.sub(lambda m: m.group(1) or "", body))
+    except ValueError:
+        return body
+
+
+def normalize_content(content):
+    """Comparable form of a response body: parsed JSON (JSONP unwrapped), otherwise the stripped text."""
+    if not isinstance(content, str):
+        return content
+    match = JSONP_PATTERN.match(content)
+    try:
+        return json.loads(match.group(1) if match else content)
+    except ValueError:
+        return content.strip()
+
+
+def _canonical(value) -> str:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+
+
+class _RateLimiter:
+    """Spaces out request starts to at most `rate` per second over all worker threads."""
+
+    def __init__(self, rate: Optional[float]):
+        self.interval = 1 / rate if rate else 0
+        self.next_start = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.perf_counter()
+            start = max(now, self.next_start)
+            self.next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def _replay_one(name: str, record: dict, limiter: _RateLimiter, stop: threading.Event) -> Optional[dict]:
+    if stop.is_set():
+        return None
+    request = record["request"]
+    body_type = request.get("bodyType") or "application/json"
+    limiter.wait()
+    result = call_pair(request["oracleEndpoint"], request["postgreEndpoint"], request["method"],
+                       prepare_body(request.get("oracleBody"), body_type),
+                       prepare_body(request.get("postgreBody"), body_type),
+                       body_type, request.get("headers") or DEFAULT_HEADERS)
+    sample = {"name": name, "start_skew_ms": result["start_skew_ms"]}
+    for side in ("oracleResponse", "postgreResponse"):
+        response = result[side]
+        sample[side] = {"status_code": response.get("status_code"),
+                        "response_time": response.get("response_time") or 0,
+                        "error": response.get("error"),
+                        "content": _canonical(normalize_content(response.get("content")))}
+    return sample
+
+
+def _side_summary(samples: list, side: str, recorded: Optional[dict]) -> dict:
+    responses = [s[side] for s in samples]
+    timings = [r["response_time"] * 1000 for r in responses if r["status_code"] is not None]
+    summary = {"status_codes": sorted({r["status_code"] for r in responses}, key=str),
+               "errors": sum(1 for r in responses if r["status_code"] is None),
+               **latency_summary(timings, 1)}
+    summary["recorded_ms"] = recorded.get("responseTime") if recorded else None
+    summary["regression"] = bool(
+        summary["p50"] is not None and summary["recorded_ms"]
+        and summary["p50"] > summary["recorded_ms"] * (1 + regression_threshold)
+        and summary["p50"] - summary["recorded_ms"] >= regression_min_ms)
+    # Recorded body is the beautified response shown in the view, compare it parsed like the new one
+    recorded_body = _canonical(normalize_content(recorded.get("body"))) if recorded and "body" in recorded else None
+    summary["changed_since_recorded"] = (recorded_body is not None
+                                         and any(r["content"] != recorded_body for r in responses
+                                                 if r["status_code"] is not None))
+    return summary
+
+
+def summarize_endpoint(name: str, record: dict, samples: list) -> dict:
+    """
+    Equality status and per-backend latency of the replays of one saved request.
+
+    Status: "error" when a call failed, "mismatch" when a replay got different status codes or bodies
+    from the two backends, "inconsistent" when the bodies match but change between replays, else "match".
+    """
+    request = record["request"]
+    oracle = _side_summary(samples, "oracleResponse", record.get("oracleResponse"))
+    postgres = _side_summary(samples, "postgreResponse", record.get("postgreResponse"))
+    mismatches = sum(1 for s in samples
+                     if (s["oracleResponse"]["status_code"], s["oracleResponse"]["content"])
+                     != (s["postgreResponse"]["status_code"], s["postgreResponse"]["content"]))
+    if oracle["errors"] or postgres["errors"]:
+        status = "error"
+    elif mismatches:
+        status = "mismatch"
+    elif len({s["postgreResponse"]["content"] for s in samples}) > 1:
+        status = "inconsistent"
+    else:
+        status = "match"
+    errors = [s[side]["error"] for s in samples for side in ("oracleResponse", "postgreResponse")
+              if s[side]["status_code"] is None]
+    return {"name": name, "method": request["method"], "path": request.get("path", ""), "status": status,
+            "replays": len(samples), "mismatches": mismatches, "error_samples": list(dict.fromkeys(errors))[:3],
+            "max_start_skew_ms": max((s["start_skew_ms"] for s in samples if s["start_skew_ms"] is not None),
+                                     default=None),
+            "oracle": oracle, "postgres": postgres}
+
+
+def replay_history(records: list, concurrency: int = DEFAULT_CONCURRENCY, rate: Optional[float] = None,
+                   repeat: int = DEFAULT_REPEAT, stop: Optional[threading.Event] = None,
+                   job: Optional[Job] = None) -> dict:
+    """
+    Replay saved API tests against both backends and compare the responses.
+
+    Every replay calls the Oracle and PostgreSQL endpoints at the same time (api_client.call_pair);
+    the replays of all tests run on `concurrency` threads, the copies of one test spread over the run.
+
+    Args:
+        records: (name, record) pairs of load_history.
+        concurrency: Replays running at the same time.
+        rate: Maximum replays started per second (None = no limit).
+        repeat: Replays of every test.
+        stop: Event to end the replay early (replays already started complete).
+        job: Background job to report progress to.
+
+    Returns:
+        Report dict: settings, totals and per test the equality status and p50/p95/p99/max (ms) of each backend.
+    """
+    stop = stop or threading.Event()
+    repeat = max(1, int(repeat))
+    limiter = _RateLimiter(rate)
+    tasks = [(name, record) for _ in range(repeat) for name, record in records]
+    samples = {name: [] for name, _ in records}
+    start_time = time.time()
+    log.info(f"Replaying {len(records)} API tests x {repeat} with concurrency {concurrency}, rate {rate or 'unlimited'}")
+    with ThreadPoolExecutor(max_workers=max(1, int(concurrency)), thread_name_prefix="api-replay") as executor:
+        futures = [executor.submit(_replay_one, name, record, limiter, stop) for name, record in tasks]
+        for done, future in enumerate(futures, 1):
+            sample = future.result()
+            if sample:
+                samples[sample["name"]].append(sample)
+            if job:
+                try:
+                    job.report(phase=f"replay {done}/{len(futures)}")
+                except JobCancelled:
+                    # Replays that have not started yet are skipped
+                    stop.set()
+                    raise
+
+    endpoints = [summarize_endpoint(name, record, samples[name]) for name, record in records if samples[name]]
+    counts = {status: sum(1 for e in endpoints if e["status"] == status)
+              for status in ("match", "mismatch", "inconsistent", "error")}
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "concurrency": concurrency,
+        "rate": rate,
+        "repeat": repeat,
+        "elapsed": round(time.time() - start_time, 3),
+        "tests": len(endpoints),
+        **counts,
+        "regressions": sum(1 for e in endpoints if e["oracle"]["regression"] or e["postgres"]["regression"]),
+        "endpoints": endpoints,
+    }
+
+
+def format_api_replay(report: dict) -> str:
+    """Per test table: status, p50 / p95 of both backends (ms) and the recorded time."""
+
+    def ms(value):
+        return "-" if value is None else f"{value:.0f}"
+
+    lines = [f"{report['tests']} API tests x {report['repeat']} in {report['elapsed']:.1f} s: "
+             f"{report['match']} match, {report['mismatch']} mismatch, {report['inconsistent']} inconsistent, "
+             f"{report['error']} errors, {report['regressions']} latency regressions",
+             f"{'test':<30}{'status':>13}{'ORA p50':>9}{'p95':>7}{'rec':>7}{'PG p50':>9}{'p95':>7}{'rec':>7}"]
+    for endpoint in report["endpoints"]:
+        line = f"{endpoint['name'][:29]:<30}{endpoint['status']:>13}"
+        for side in ("oracle", "postgres"):
+            summary = endpoint[side]
+            flag = "!" if summary["regression"] else ""
+            line += f"{ms(summary['p50']) + flag:>9}{ms(summary['p95']):>7}{ms(summary['recorded_ms']):>7}"
+        lines.append(line)
+    if report["regressions"]:
+        lines.append(f"! p50 more than {regression_threshold:.0%} and {regression_min_ms} ms above the recorded time")
+    return "\n".join(lines)
+
+
+def write_api_replay(work_dir: str, report: dict) -> str:
+    """Save a replay report as JSON under <work_dir>/api/replay, returns its path."""
+    directory = os.path.join(os.path.expandvars(work_dir), "api", "replay")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"replay_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+    return path
+
+
+def run(work_dir: str, names: str = "", concurrency: int = DEFAULT_CONCURRENCY, rate: Optional[float] = None,
+        repeat: int = DEFAULT_REPEAT, job: Optional[Job] = None) -> str:
+    """
+    Replay the selected saved API tests and save the report next to the API history.
+
+    Args:
+        work_dir: Working directory, the report goes to <work_dir>/api/replay.
+        names: Comma separated test names or wildcard patterns, all saved tests when empty.
+        concurrency, rate, repeat: See replay_history.
+        job: Background job to report progress to.
+
+    Returns:
+        Result table and report path, or an error message.
+    """
+    selected = [name.strip() for name in names.split(",") if name.strip()] if names else None
+    records = load_history(work_dir, selected)
+    if not records:
+        return "No saved API tests to replay"
+    try:
+        report = replay_history(records, int(concurrency), float(rate) if rate else None, int(repeat), job=job)
+    except Exception as e:
+        if job and job.is_cancelled():
+            return "Cancelled"
+        log.error(f"API replay failed: {str(e)}")
+        return f"API replay failed: {str(e)}"
+    path = write_api_replay(work_dir, report)
+    log.info(f"API replay saved to {path}")
+    return f"{format_api_replay(report)}\nReport: {path}"
@@ -1,10 +1,77 @@
+import re
+import time
+import uuid
+
 import oracledb
 from src.helper.logger_helper import get_logger
 
 log = get_logger()
 
-oracledb.defaults.prefetchrows = 10000
-oracledb.defaults.arraysize = 10000
+# Fallback for cursors not sized by configure_fetch (e.g. DBMS_OUTPUT blocks)
+oracledb.defaults.prefetchrows = 1000
+oracledb.defaults.arraysize = 1000
+
+fetch_buffer_mb = 32        # Target size of the rows transferred by one fetch round trip
+min_arraysize = 100
+max_arraysize = 50000
+base_arraysize = 1000       # Rows per fetch on a LAN (~1 ms round trip), scaled up with the latency
+lob_size_estimate = 32768   # Bytes assumed per CLOB/BLOB value when sizing fetches
+fetch_lobs_inline = True    # Fetch CLOB/BLOB as str/bytes instead of LOB locators (one round trip less per value)
+lob_fetch_max_rows = 200    # arraysize cap with inline LOBs: every value arrives whole, whatever its size
+
+LOB_TYPES = {
+    oracledb.DB_TYPE_CLOB: oracledb.DB_TYPE_LONG,
+    oracledb.DB_TYPE_NCLOB: oracledb.DB_TYPE_LONG_NVARCHAR,
+    oracledb.DB_TYPE_BLOB: oracledb.DB_TYPE_LONG_RAW,
+}
+
+# Bytes on the wire for fixed size types (NUMBER is at most 22 bytes)
+FIXED_WIDTHS = {
+    oracledb.DB_TYPE_NUMBER: 22,
+    oracledb.DB_TYPE_BINARY_DOUBLE: 8,
+    oracledb.DB_TYPE_BINARY_FLOAT: 4,
+    oracledb.DB_TYPE_DATE: 7,
+    oracledb.DB_TYPE_TIMESTAMP: 11,
+    oracledb.DB_TYPE_TIMESTAMP_TZ: 13,
+    oracledb.DB_TYPE_TIMESTAMP_LTZ: 11,
+}
+
+
+NLS_SESSION_SQL = ("ALTER SESSION SET NLS_DATE_FORMAT = 'YYYY-MM-DD' "
+                   "NLS_TIMESTAMP_FORMAT = 'YYYY-MM-DD HH24.MI.SSXFF' "
+                   "NLS_TIMESTAMP_TZ_FORMAT = 'YYYY-MM-DD HH24.MI.SSXFF TZR'")
+
+
+def parse_connection_string(connection_string):
+    """
+        Split an Oracle connection string into (username, password, dsn)
+
+        Parameters:
+        connection_string - "username/password@host:port/service_name", "username/password@TNS_ENTRY"
+                            or "username/password"
+
+        Returns:
+        Tuple (username, password, dsn), dsn is None when not specified
+        """
+    if '/' in connection_string and '@' in connection_string:
+        # Format: username/password@host:port/service_name
+        auth, connect_part = connection_string.split('@', 1)
+        username, password = auth.split('/', 1)
+
+        # The connect_part becomes the dsn
+        dsn = connect_part
+    else:
+        # Assume it's a TNS entry or EZ Connect string
+        # For TNS: connection_string = "username/password@TNS_ENTRY"
+        # For EZ Connect: connection_string = "username/password@hostname:port/service_name"
+        username, rest = connection_string.split('/', 1)
+        if '@' in rest:
+            password, dsn = rest.split('@', 1)
+        else:
+            # Just username/password with no DSN specified
+            password = rest
+            dsn = None
+    return username, password, dsn
 
 
 def connect(connection_string=None, username=None, password=None, dsn=None):
@@ -22,25 +89,7 @@ def connect(connection_string=None, username=None, password=None, dsn=None):
         """
     try:
         if connection_string:
-            # Parse connection string
-            if '/' in connection_string and '@' in connection_string:
-                # Format: username/password@host:port/service_name
-                auth, connect_part = connection_string.split('@', 1)
-                username, password = auth.split('/', 1)
-
-                # The connect_part becomes the dsn
-                dsn = connect_part
-            else:
-                # Assume it's a TNS entry or EZ Connect string
-                # For TNS: connection_string = "username/password@TNS_ENTRY"
-                # For EZ Connect: connection_string = "username/password@hostname:port/service_name"
-                username, rest = connection_string.split('/', 1)
-                if '@' in rest:
-                    password, dsn = rest.split('@', 1)
-                else:
-                    # Just username/password with no DSN specified
-                    password = rest
-                    dsn = None
+            username, password, dsn = parse_connection_string(connection_string)
 
         # Connect with the parsed or provided credentials
         connection = oracledb.connect(user=username, password=password, dsn=dsn)
@@ -48,3 +97,241 @@ def connect(connection_string=None, username=None, password=None, dsn=None):
     except Exception as e:
         log.error(f"Error connecting to Oracle Database: {e}")
         return None
+
+
+def init_session(connection, requested_tag):
+    """Session callback of the pool: runs once per new session instead of once per query."""
+    cursor = connection.cursor()
+    cursor.execute(NLS_SESSION_SQL)
+    cursor.close()
+    log.info("Initialized pooled Oracle session (NLS formats).")
+
+
+def create_pool(connection_string=None, username=None, password=None, dsn=None,
+                max_size=4, idle_timeout=300, ping_interval=60):
+    """
+        Create an Oracle session pool whose sessions are initialized by init_session
+
+        Parameters:
+        connection_string - Full Oracle connection string (see connect)
+        username, password, dsn - Individual parameters (used if connection_string is not provided)
+        max_size - Maximum number of sessions for this target
+        idle_timeout - Seconds after which idle sessions are closed
+        ping_interval - Seconds of idleness after which a session is pinged before being handed out
+
+        Returns:
+        oracledb.ConnectionPool
+        """
+    if connection_string:
+        username, password, dsn = parse_connection_string(connection_string)
+    return oracledb.create_pool(
+        user=username, password=password, dsn=dsn,
+        min=0, max=max_size, increment=1,
+        session_callback=init_session,
+        timeout=idle_timeout,
+        ping_interval=ping_interval,
+        getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+        wait_timeout=60000,
+    )
+
+
+def lob_output_type_handler(cursor, metadata):
+    """Fetch CLOB / NCLOB / BLOB columns directly as str / bytes."""
+    long_type = LOB_TYPES.get(metadata.type_code)
+    if long_type is not None:
+        return cursor.var(long_type, arraysize=cursor.arraysize)
+
+
+def estimate_row_width(description):
+    """Approximate bytes per row from cursor.description (name, type, display_size, internal_size, ...)."""
+    width = 0
+    for column in description:
+        type_code, internal_size = column[1], column[3]
+        if type_code in LOB_TYPES:
+            width += lob_size_estimate
+        elif type_code in FIXED_WIDTHS:
+            width += FIXED_WIDTHS[type_code]
+        else:
+            width += internal_size or 100
+        width += 4  # Length / indicator overhead per column
+    return max(width, 1)
+
+
+_round_trips = {}  # dsn -> seconds, measured once per target
+
+
+def measure_round_trip(connection):
+    """Seconds for one round trip to the server (connection.ping), measured once per DSN."""
+    dsn = getattr(connection, "dsn", None)
+    if dsn in _round_trips:
+        return _round_trips[dsn]
+    start_time = time.perf_counter()
+    connection.ping()
+    round_trip = time.perf_counter() - start_time
+    if dsn:
+        _round_trips[dsn] = round_trip
+    return round_trip
+
+
+def choose_fetch_size(description, round_trip):
+    """
+        Pick the arraysize of a query
+
+        Wide rows are limited by fetch_buffer_mb so a fetch does not spike memory, narrow rows over a slow link
+        get bigger batches so the round trips do not dominate.
+
+        Parameters:
+        description - cursor.description of the parsed query
+        round_trip - Measured round trip time in seconds
+
+        Returns:
+        Tuple (arraysize, row_width)
+        """
+    row_width = estimate_row_width(description)
+    by_memory = fetch_buffer_mb * 1024 * 1024 // row_width
+    by_latency = int(base_arraysize * max(1.0, round_trip * 1000))
+    return max(min_arraysize, min(max_arraysize, by_memory, by_latency)), row_width
+
+
+def configure_fetch(connection, cursor, query):
+    """
+        Size arraysize / prefetchrows of the cursor for the query before it is executed
+
+        Parameters:
+        connection - Oracle connection
+        cursor - Cursor the query will be executed on
+        query - SQL query
+
+        Returns:
+        dict of the chosen settings, or None when the query could not be described (defaults are kept)
+        """
+    if fetch_lobs_inline:
+        cursor.outputtypehandler = lob_output_type_handler
+    try:
+        # parse() describes the query without executing it
+        cursor.parse(query)
+        if not cursor.description:
+            return None
+        round_trip = measure_round_trip(connection)
+        arraysize, row_width = choose_fetch_size(cursor.description, round_trip)
+    except Exception as e:
+        log.warning(f"Could not size fetches, using defaults: {e}")
+        return None
+    lob_columns = sum(1 for column in cursor.description if column[1] in LOB_TYPES)
+    if fetch_lobs_inline and lob_columns:
+        # LOB sizes are unknown before the fetch, keep the rows per round trip low
+        arraysize = min(arraysize, lob_fetch_max_rows)
+    cursor.arraysize = arraysize
+    # One more than arraysize so the first fetchmany() does not need an extra round trip
+    cursor.prefetchrows = arraysize + 1
+    settings = {"arraysize": arraysize, "row_width": row_width, "round_trip_ms": round(round_trip * 1000, 2),
+                "lob_columns": lob_columns, "lobs_inline": fetch_lobs_inline and lob_columns > 0}
+    log.info(f"Oracle fetch settings: {settings}")
+    return settings
+
+
+def log_fetch_throughput(cursor, elapsed_time):
+    """Log rows/s and fetch round trips of a fully fetched cursor."""
+    rows = cursor.rowcount
+    round_trips = -(-rows // cursor.arraysize) if cursor.arraysize else 0
+    rate = rows / elapsed_time if elapsed_time > 0 else 0
+    log.info(f"Oracle fetch throughput: {rows} rows in {elapsed_time:.3f} seconds ({rate:,.0f} rows/s), "
+             f"arraysize {cursor.arraysize}, ~{round_trips} round trips")
+
+
+PLAN_STATISTICS_SQL = """
+    SELECT id, parent_id, operation, options, object_owner, object_name, object_type,
+           cardinality, cost, last_starts, last_output_rows, last_elapsed_time,
+           last_cr_buffer_gets + last_cu_buffer_gets, last_disk_reads
+    FROM v$sql_plan_statistics_all
+    WHERE sql_id = :1 AND child_number = :2
+    ORDER BY id"""
+
+PLAN_COLUMNS = ("id", "parent_id", "operation", "options", "object_owner", "object_name", "object_type",
+                "cardinality", "cost", "starts", "actual_rows", "elapsed_us", "buffers", "disk_reads")
+
+
+def add_hint(query, hint):
+    """Put an optimizer hint after the first SELECT of the query."""
+    return re.sub(r'\bSELECT\b', f'SELECT /*+ {hint} */', query, count=1, flags=re.IGNORECASE)
+
+
+def _index_tables(cursor, operations):
+    """Table of every index in the plan, so index access can be matched with a full scan of the other side."""
+    tables = {}
+    for op in operations:
+        if op["operation"] == "INDEX" and op["object_name"] and op["object_name"] not in tables:
+            cursor.execute("SELECT table_name FROM all_indexes WHERE owner = :1 AND index_name = :2",
+                           [op["object_owner"], op["object_name"]])
+            row = cursor.fetchone()
+            tables[op["object_name"]] = row[0] if row else None
+    for op in operations:
+        op["table_name"] = tables.get(op["object_name"]) if op["operation"] == "INDEX" else op["object_name"]
+
+
+def capture_plan(connection, query):
+    """
+        Execute a query with row source statistics and read its actual plan
+
+        The query runs with the GATHER_PLAN_STATISTICS hint and is fully fetched, then its plan is read
+        from v$sql_plan_statistics_all (DBMS_XPLAN.DISPLAY_CURSOR for the text). Without access to the
+        v$ views, EXPLAIN PLAN gives the estimated plan only.
+
+        Parameters:
+        connection - Oracle connection
+        query - SELECT query
+
+        Returns:
+        dict - db_type, source ("cursor" or "explain"), elapsed (seconds, LAST_ELAPSED_TIME of the root
+               operation; the client wall time when there are no statistics, see elapsed_source),
+               client_elapsed (execute + full fetch as seen by the client), rows, text (DBMS_XPLAN output)
+               and operations: plan lines as dicts (PLAN_COLUMNS and table_name)
+        """
+    query = query.strip().rstrip(';')
+    cursor = connection.cursor()
+    try:
+        start_time = time.time()
+        cursor.execute(add_hint(query, "GATHER_PLAN_STATISTICS"))
+        rows = 0
+        while True:
+            batch = cursor.fetchmany()
+            if not batch:
+                break
+            rows += len(batch)
+        client_elapsed = time.time() - start_time
+        plan = {"db_type": "Oracle", "source": "cursor", "elapsed": client_elapsed, "elapsed_source": "client",
+                "client_elapsed": client_elapsed, "rows": rows}
+        try:
+            cursor.execute("SELECT prev_sql_id, prev_child_number FROM v$session "
+                           "WHERE sid = SYS_CONTEXT('USERENV', 'SID')")
+            sql_id, child_number = cursor.fetchone()
+            cursor.execute(PLAN_STATISTICS_SQL, [sql_id, child_number])
+            plan["operations"] = [dict(zip(PLAN_COLUMNS, row)) for row in cursor.fetchall()]
+            # Server time of the root row source, comparable with the PostgreSQL Execution Time
+            # (the client wall time above also holds the fetch round trips and the network transfer)
+            timed = [op["elapsed_us"] for op in plan["operations"] if op["elapsed_us"] is not None]
+            if timed:
+                plan["elapsed"] = timed[0] / 1_000_000
+                plan["elapsed_source"] = "server"
+            cursor.execute("SELECT plan_table_output FROM TABLE(DBMS_XPLAN.DISPLAY_CURSOR(:1, :2, 'ALLSTATS LAST'))",
+                           [sql_id, child_number])
+            plan["text"] = "\n".join(row[0] or "" for row in cursor.fetchall())
+        except oracledb.DatabaseError as e:
+            log.warning(f"Cursor statistics not available ({e}), using EXPLAIN PLAN")
+            statement_id = f"QD{uuid.uuid4().hex[:20]}"
+            cursor.execute(f"EXPLAIN PLAN SET STATEMENT_ID = '{statement_id}' FOR {query}")
+            cursor.execute(f"""
+                SELECT id, parent_id, operation, options, object_owner, object_name, object_type,
+                       cardinality, cost, NULL, NULL, NULL, NULL, NULL
+                FROM plan_table WHERE statement_id = :1 ORDER BY id""", [statement_id])
+            plan["operations"] = [dict(zip(PLAN_COLUMNS, row)) for row in cursor.fetchall()]
+            cursor.execute("SELECT plan_table_output FROM TABLE(DBMS_XPLAN.DISPLAY('PLAN_TABLE', :1, 'TYPICAL'))",
+                           [statement_id])
+            plan["text"] = "\n".join(row[0] or "" for row in cursor.fetchall())
+            plan["source"] = "explain"
+            # PLAN_TABLE rows are only needed for this call
+            connection.rollback()
+        _index_tables(cursor, plan["operations"])
+        return plan
+    finally:
+        cursor.close()
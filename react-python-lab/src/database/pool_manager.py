@@ -0,0 +1,135 @@
+import threading
+
+from src.database import oracle_db, postgres_db
+from src.helper.logger_helper import get_logger
+
+log = get_logger()
+
+MAX_CONNECTIONS_PER_TARGET = 4  # Cap of sessions per connection string
+IDLE_TIMEOUT = 300              # Seconds before an idle session is closed
+PING_INTERVAL = 60              # Seconds of idleness before a session is health-checked
+
+
+class PoolManager:
+    """
+    Connection pools shared by the whole app session, keyed by database type and connection target.
+
+    Oracle targets use an oracledb pool whose session callback applies the NLS settings once per session,
+    PostgreSQL targets use postgres_db.PostgresPool.
+    """
+
+    def __init__(self, max_size=MAX_CONNECTIONS_PER_TARGET, idle_timeout=IDLE_TIMEOUT, ping_interval=PING_INTERVAL):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.ping_interval = ping_interval
+        self._pools = {}
+        self._owners = {}  # id(connection) -> (db_type, pool)
+        self._lock = threading.Lock()
+        self._evictor = None
+        self._stop_evictor = threading.Event()
+
+    @staticmethod
+    def make_key(db_type, connection_string="", **params):
+        if connection_string:
+            return db_type.lower(), connection_string
+        return db_type.lower(), tuple(sorted((k, str(v)) for k, v in params.items() if v))
+
+    def _get_pool(self, db_type, connection_string="", **params):
+        key = self.make_key(db_type, connection_string, **params)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                if key[0] == "oracle":
+                    pool = oracle_db.create_pool(
+                        connection_string=connection_string or None,
+                        username=params.get("username"), password=params.get("password"), dsn=params.get("dsn"),
+                        max_size=self.max_size, idle_timeout=self.idle_timeout, ping_interval=self.ping_interval)
+                elif key[0] == "postgresql":
+                    pool = postgres_db.PostgresPool(
+                        connection_string=connection_string or None,
+                        host=params.get("host"), database=params.get("database"),
+                        user=params.get("username"), password=params.get("password"),
+                        port=params.get("port") or 5432,
+                        max_size=self.max_size, idle_timeout=self.idle_timeout, ping_interval=self.ping_interval)
+                    self._start_evictor()
+                else:
+                    raise ValueError(f"Unsupported database type: {db_type}")
+                self._pools[key] = pool
+                log.info(f"Created {db_type} connection pool (max {self.max_size} sessions)")
+            return key[0], pool
+
+    def acquire(self, db_type, connection_string="", **params):
+        """
+        Get a warm connection for the target, creating the pool on first use.
+
+        Args:
+            db_type: Database type ("Oracle" or "PostgreSQL").
+            connection_string: Connection string of the target.
+            params: Individual parameters (username, password, dsn, host, database, port) if no connection string.
+
+        Returns:
+            Database connection object; give it back with release().
+        """
+        kind, pool = self._get_pool(db_type, connection_string, **params)
+        # oracledb.ConnectionPool and PostgresPool share acquire() / release()
+        connection = pool.acquire()
+        with self._lock:
+            self._owners[id(connection)] = (kind, pool)
+        return connection
+
+    def owns(self, connection) -> bool:
+        with self._lock:
+            return id(connection) in self._owners
+
+    def release(self, connection):
+        with self._lock:
+            kind, pool = self._owners.pop(id(connection), (None, None))
+        if pool is None:
+            connection.close()
+        else:
+            pool.release(connection)
+
+    def evict_idle(self):
+        """Close idle PostgreSQL sessions now (Oracle pools evict by themselves via their timeout)."""
+        with self._lock:
+            pools = list(self._pools.items())
+        for (kind, _), pool in pools:
+            if kind == "postgresql":
+                pool.evict_idle()
+
+    def _start_evictor(self):
+        # Called under self._lock; one background thread closes idle PostgreSQL sessions between queries
+        if self._evictor is None or not self._evictor.is_alive():
+            self._stop_evictor.clear()
+            self._evictor = threading.Thread(target=self._evict_loop, name="pool-evictor", daemon=True)
+            self._evictor.start()
+
+    def _evict_loop(self):
+        while not self._stop_evictor.wait(self.ping_interval):
+            try:
+                self.evict_idle()
+            except Exception as e:
+                log.error(f"Error evicting idle sessions: {e}")
+
+    def close_all(self):
+        self._stop_evictor.set()
+        with self._lock:
+            pools = list(self._pools.items())
+            self._pools.clear()
+            self._owners.clear()
+        for (kind, _), pool in pools:
+            try:
+                if kind == "oracle":
+                    pool.close(force=True)
+                else:
+                    pool.close()
+            except Exception as e:
+                log.error(f"Error closing {kind} pool: {e}")
+        log.info("Closed all connection pools")
+
+
+_pool_manager = PoolManager()
+
+
+def get_pool_manager() -> PoolManager:
+    return _pool_manager
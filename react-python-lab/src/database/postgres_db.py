@@ -1,8 +1,27 @@
+import json
+import threading
+import time
+import uuid
+
 import psycopg2
 from src.helper.logger_helper import get_logger
 
 log = get_logger()
 
+# Type OIDs of cursor.description, used to build the COPY export expressions
+PG_INT_TYPES = {20, 21, 23, 26}          # int8, int2, int4, oid
+PG_DECIMAL_TYPES = {700, 701, 1700}      # float4, float8, numeric
+PG_BOOL = 16
+PG_DATE = 1082
+PG_TIME = 1083
+PG_TIMESTAMP = 1114
+PG_TIMESTAMPTZ = 1184
+PG_BPCHAR = 1042
+PG_TEXT_TYPES = {18, 19, 25, 1042, 1043}  # char, name, text, bpchar, varchar
+
+COPY_OPTIONS = "FORMAT csv, DELIMITER E'\\x01', QUOTE E'\\x02'"
+
+
 def connect(connection_string=None, host=None, database=None, user=None, password=None, port=5432):
     """
     Connect to PostgreSQL database using either a connection string or individual parameters
@@ -34,3 +53,283 @@ def connect(connection_string=None, host=None, database=None, user=None, passwor
     except Exception as e:
         log.error(f"Error connecting to PostgreSQL Database: {e}")
         return None
+
+
+class PostgresPool:
+    """
+    Small thread-safe pool of psycopg2 connections for one target
+
+    - at most max_size connections (idle + in use)
+    - connections idle longer than idle_timeout seconds are closed
+    - connections idle longer than ping_interval seconds are checked with SELECT 1 before reuse
+    """
+
+    def __init__(self, connection_string=None, host=None, database=None, user=None, password=None, port=5432,
+                 max_size=4, idle_timeout=300, ping_interval=60):
+        self.connect_args = dict(connection_string=connection_string, host=host, database=database,
+                                 user=user, password=password, port=port)
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.ping_interval = ping_interval
+        self._idle = []  # [(connection, last_used)], the most recently used at the end
+        self._in_use = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout=60):
+        deadline = time.time() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Pool is closed")
+                self._evict_idle()
+                if self._idle:
+                    connection, last_used = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self._in_use < self.max_size:
+                    connection, last_used = None, None
+                    self._in_use += 1
+                    break
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise TimeoutError(f"No PostgreSQL connection available after {timeout}s")
+                self._cond.wait(remaining)
+
+        # Connect / health check outside the lock
+        if connection is not None and time.time() - last_used > self.ping_interval \
+                and not self._is_healthy(connection):
+            self._discard(connection)
+            connection = None
+        if connection is None:
+            connection = connect(**self.connect_args)
+            if connection is None:
+                with self._cond:
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise ConnectionError("Error connecting to PostgreSQL Database")
+        return connection
+
+    def release(self, connection):
+        with self._cond:
+            self._in_use -= 1
+            if not self._closed and not connection.closed:
+                try:
+                    # Do not leave the session "idle in transaction"
+                    connection.rollback()
+                    self._idle.append((connection, time.time()))
+                except Exception:
+                    self._discard(connection)
+            else:
+                self._discard(connection)
+            self._cond.notify()
+
+    def evict_idle(self):
+        with self._cond:
+            self._evict_idle()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            for connection, _ in self._idle:
+                self._discard(connection)
+            self._idle = []
+            self._cond.notify_all()
+
+    def _evict_idle(self):
+        now = time.time()
+        expired = [c for c, last_used in self._idle if now - last_used > self.idle_timeout]
+        self._idle = [(c, last_used) for c, last_used in self._idle if now - last_used <= self.idle_timeout]
+        for connection in expired:
+            self._discard(connection)
+
+    @staticmethod
+    def _is_healthy(connection):
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            connection.rollback()
+            return True
+        except Exception as e:
+            log.warning(f"Discarding broken PostgreSQL connection: {e}")
+            return False
+
+    @staticmethod
+    def _discard(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+class ServerCursor:
+    """
+    Server-side (named) cursor that holds only itersize rows in client memory
+
+    A plain psycopg2 cursor transfers the whole result inside execute(). Named cursors describe their
+    columns only after the first fetch, so the first batch is read in execute() and handed out first
+    (prefetch=False leaves the first fetch to the caller, e.g. to time it).
+    """
+
+    def __init__(self, connection, itersize=10000, prefetch=True):
+        # Named cursors need a transaction, WITH HOLD keeps them open in autocommit mode
+        self._cursor = connection.cursor(name=f"lab_{uuid.uuid4().hex[:12]}",
+                                         withhold=bool(getattr(connection, 'autocommit', False)))
+        self._cursor.itersize = itersize
+        self.itersize = itersize
+        self.prefetch = prefetch
+        self._first = None
+        self.description = None
+
+    def execute(self, query, params=None):
+        self._cursor.execute(query, params)
+        if self.prefetch:
+            self._first = self._cursor.fetchmany(self.itersize)
+            self.description = self._cursor.description
+
+    def fetchmany(self, size=None):
+        size = size or self.itersize
+        if self._first:
+            rows, self._first = self._first[:size], self._first[size:]
+            if len(rows) < size:
+                rows += self._cursor.fetchmany(size - len(rows))
+            return rows
+        return self._cursor.fetchmany(size)
+
+    def fetchone(self):
+        rows = self.fetchmany(1)
+        return rows[0] if rows else None
+
+    def fetchall(self):
+        rows = list(self._first or [])
+        self._first = None
+        return rows + self._cursor.fetchall()
+
+    def close(self):
+        try:
+            self._cursor.close()
+        except Exception as e:
+            log.warning(f"Error closing server-side cursor: {e}")
+
+
+def quote_identifier(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _text_escape(expr):
+    # Same as format_value: ',' -> '\,', line breaks -> ' '
+    return f"replace(replace(replace({expr}, ',', '\\,'), E'\\n', ' '), E'\\r', ' ')"
+
+
+def _fraction_expr(column, fmt):
+    # str(datetime) only prints the microseconds when they are not 0
+    return (f"CASE WHEN extract(microseconds FROM {column})::bigint % 1000000 = 0 "
+            f"THEN to_char({column}, '{fmt}') ELSE to_char({column}, '{fmt}.US') END")
+
+
+def canonical_text_expr(column, type_code):
+    """
+        SQL expression producing the CSV text of a column, matching csv_export.format_value
+
+        Parameters:
+        column - Quoted column reference
+        type_code - Type OID from cursor.description
+
+        Returns:
+        str - Expression that is never NULL (<<NULL>> / <<EMPTY>> markers included)
+        """
+    empty = ''
+    if type_code in PG_INT_TYPES:
+        value = f"{column}::text"
+    elif type_code in PG_DECIMAL_TYPES:
+        text = f"{column}::text"
+        value = f"CASE WHEN strpos({text}, '.') > 0 THEN rtrim(rtrim({text}, '0'), '.') ELSE {text} END"
+    elif type_code == PG_BOOL:
+        value = f"CASE WHEN {column} THEN 'True' ELSE 'False' END"
+    elif type_code == PG_DATE:
+        value = f"to_char({column}, 'YYYY-MM-DD')"
+    elif type_code == PG_TIME:
+        value = _fraction_expr(column, 'HH24:MI:SS')
+    elif type_code == PG_TIMESTAMP:
+        value = _fraction_expr(column, 'YYYY-MM-DD HH24:MI:SS')
+    elif type_code == PG_TIMESTAMPTZ:
+        value = f"({_fraction_expr(column, 'YYYY-MM-DD HH24:MI:SS')}) || to_char({column}, 'TZH:TZM')"
+    else:
+        # bpchar keeps its padding through the output function (concat), ::text would trim it;
+        # other types (json, arrays, interval, ...) use their PostgreSQL text form
+        text = f"concat({column})" if type_code == PG_BPCHAR else f"{column}::text"
+        value = _text_escape(text)
+        if type_code in PG_TEXT_TYPES:
+            empty = f" WHEN {text} = '' THEN '<<EMPTY>>'"
+    return f"CASE WHEN {column} IS NULL THEN '<<NULL>>'{empty} ELSE {value} END"
+
+
+def describe_query(connection, query):
+    """Return cursor.description of the query without fetching rows."""
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"SELECT * FROM ({query}) AS q LIMIT 0")
+        return cursor.description
+    finally:
+        cursor.close()
+
+
+def build_copy_query(query, description):
+    """
+        Wrap a SELECT in COPY ... TO STDOUT so every row arrives as one ready-made CSV line
+
+        Parameters:
+        query - SELECT query without trailing ';'
+        description - cursor.description of the query (see describe_query)
+
+        Returns:
+        str - COPY statement
+
+        Raises:
+        ValueError if column names are not unique (they could not be referenced from the wrapper)
+        """
+    names = [col[0] for col in description]
+    if len(set(names)) != len(names):
+        raise ValueError("Duplicate column names in query result")
+    expressions = [canonical_text_expr(f"q.{quote_identifier(name)}", col[1])
+                   for name, col in zip(names, description)]
+    # \x01 / \x02 never appear in the lines, so COPY csv writes them without quoting
+    return (f"COPY (SELECT concat_ws(',', {', '.join(expressions)}) FROM ({query}) AS q) "
+            f"TO STDOUT WITH ({COPY_OPTIONS})")
+
+
+def capture_plan(connection, query):
+    """
+        Execute a query under EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) and return its actual plan
+
+        The statement runs in a transaction that is rolled back afterwards.
+
+        Parameters:
+        connection - PostgreSQL connection
+        query - SELECT query
+
+        Returns:
+        dict - db_type, source, elapsed (seconds, server execution time), client_elapsed (EXPLAIN round trip,
+               the rows are not sent), rows and plan (JSON plan tree)
+        """
+    query = query.strip().rstrip(';')
+    cursor = connection.cursor()
+    try:
+        start_time = time.time()
+        cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}")
+        result = cursor.fetchone()[0]
+        client_elapsed = time.time() - start_time
+        if isinstance(result, str):
+            result = json.loads(result)
+        explain = result[0]
+        plan = explain["Plan"]
+        # Execution Time only, like the root row source time of the Oracle side (planning is not included there)
+        return {"db_type": "PostgreSQL", "source": "explain analyze",
+                "elapsed": explain.get("Execution Time", 0) / 1000, "elapsed_source": "server",
+                "client_elapsed": client_elapsed,
+                "rows": plan.get("Actual Rows", 0) * plan.get("Actual Loops", 1), "plan": plan}
+    finally:
+        cursor.close()
+        connection.rollback()
@@ -1,66 +1,594 @@
-import pandas as pd
+import os
+import re
+import json
+import mmap
+import shutil
+import tempfile
 import hashlib
 import time
+import concurrent.futures
+import numpy as np
 from src.helper.logger_helper import get_logger
+from src.helper.part_writer import MANIFEST_SUFFIX, load_manifest, extract_part
 
 log = get_logger()
 
 chunk_size = 10000  # Process in chunks to reduce memory usage
 max_diff = 10
+scan_window = 64 * 1024 * 1024  # Bytes scanned for newlines at a time when indexing
 
+INDEX_SUFFIX = ".idx.json"
+INDEX_VERSION = 1
 
-def efficient_compare_large_csv(file1_path, file2_path):
+keyed_memory_mb = 256        # Memory budget of the keyed compare
+partition_buffer = 1024 * 1024  # Bytes buffered per partition file before writing (at most)
+max_partition_files = 64        # Partition files open at once, bigger inputs are split again in more passes
+FIELD_SEPARATOR = re.compile(r'(?<!\\),')  # Commas inside values are exported as '\,'
+
+compare_workers = os.cpu_count() or 4  # Processes of the positional compare
+compare_time_limit = 1800              # Seconds before the positional compare stops with what it found
+segment_chunks = 8                     # Index chunks compared per task
+
+
+def compare_manifests(left_manifest_path, right_manifest_path):
+    """
+    Compare two part exports (see part_writer.PartWriter) by their part hashes, without opening the parts
+
+    Parts are matched by index; a pair differs when the row ranges or the content hashes differ,
+    parts present on one side only always differ.
+
+    Returns:
+    dict - identical, headers_match, left_rows, right_rows and differing: list of
+           (index, left_part_path or None, right_part_path or None)
+    """
+    left = load_manifest(left_manifest_path)
+    right = load_manifest(right_manifest_path)
+    differing = []
+    for i in range(max(len(left["parts"]), len(right["parts"]))):
+        left_part = left["parts"][i] if i < len(left["parts"]) else None
+        right_part = right["parts"][i] if i < len(right["parts"]) else None
+        same = (left_part and right_part
+                and left_part["first_row"] == right_part["first_row"]
+                and left_part["rows"] == right_part["rows"]
+                and left_part["sha256"] == right_part["sha256"])
+        if not same:
+            differing.append((i + 1,
+                              os.path.join(left["directory"], left_part["file"]) if left_part else None,
+                              os.path.join(right["directory"], right_part["file"]) if right_part else None))
+    headers_match = left["headers"] == right["headers"]
+    return {
+        "identical": headers_match and not differing,
+        "headers_match": headers_match,
+        "left_rows": left["total_rows"],
+        "right_rows": right["total_rows"],
+        "parts": max(len(left["parts"]), len(right["parts"])),
+        "differing": differing,
+    }
+
+
+def parts_diff_dir(left_manifest_path):
+    """Folder for the decompressed differing parts, next to the left manifest."""
+    name = os.path.basename(left_manifest_path)[:-len(MANIFEST_SUFFIX)]
+    return os.path.join(os.path.dirname(os.path.abspath(left_manifest_path)), "parts_diff", name)
+
+
+def extract_differing_parts(comparison, target_dir, limit=None):
+    """
+    Decompress the differing part pairs of compare_manifests to plain CSV files
+
+    Returns:
+    list of (index, left_csv_path, right_csv_path), an empty CSV stands in for a missing part
+    """
+    os.makedirs(target_dir, exist_ok=True)
+    extracted = []
+    for index, left_part, right_part in comparison["differing"][:limit]:
+        paths = []
+        for side, part in (("left", left_part), ("right", right_part)):
+            target = os.path.join(target_dir, f"part{index:04d}_{side}.csv")
+            if part:
+                extract_part(part, target)
+            else:
+                open(target, 'w').close()
+            paths.append(target)
+        extracted.append((index, paths[0], paths[1]))
+    return extracted
+
+
+def compare_part_exports(left_manifest_path, right_manifest_path):
+    """Compare two part exports, only the parts whose hashes differ are decompressed and compared in detail."""
     start_time = time.time()
+    comparison = compare_manifests(left_manifest_path, right_manifest_path)
+    if comparison["identical"]:
+        return (f"Files are identical ({comparison['parts']} parts, hash match). "
+                f"Time {time.time() - start_time:.3f} seconds")
+    target_dir = parts_diff_dir(left_manifest_path)
+    results = [] if comparison["headers_match"] else ["Headers are different"]
+    for index, left_csv, right_csv in extract_differing_parts(comparison, target_dir, max_diff):
+        results.append(f"Part {index}: {efficient_compare_large_csv(left_csv, right_csv)}")
+    log.info(f"{len(comparison['differing'])} of {comparison['parts']} parts differ. "
+             f"Time {time.time() - start_time:.3f} seconds")
+    return '\n'.join(results)
+
+
+def build_csv_index(path, rows_per_chunk=chunk_size):
+    """
+    Index a CSV file in one memory-mapped pass
+
+    Newlines are located with numpy, every rows_per_chunk data lines form a chunk hashed with blake2b.
+    The whole-file digest is the blake2b of the header and the chunk hashes, so it costs no second pass.
+
+    Returns:
+    dict - size, mtime_ns, rows_per_chunk, lines (data lines, header excluded), header, digest and
+           chunks: list of {offset, end, rows, hash}
+    """
+    stat = os.stat(path)
+    index = {"version": INDEX_VERSION, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+             "rows_per_chunk": rows_per_chunk, "lines": 0, "header": "", "digest": "", "chunks": []}
+    digest = hashlib.blake2b(digest_size=16)
+    if stat.st_size == 0:
+        index["digest"] = digest.hexdigest()
+        return index
+
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        size = len(mm)
+        header_end = mm.find(b'\n')
+        header_end = size if header_end < 0 else header_end + 1
+        index["header"] = mm[:header_end].decode('utf-8', errors='replace').rstrip('\r\n')
+        digest.update(mm[:header_end])
+
+        # Offsets where chunks end: after every rows_per_chunk-th newline of the data lines
+        boundaries = []
+        lines = 0
+        data = np.frombuffer(mm, dtype=np.uint8)
+        for start in range(header_end, size, scan_window):
+            newlines = np.flatnonzero(data[start:start + scan_window] == 10) + start + 1
+            # Positions (1-based line numbers) of the newlines closing a chunk
+            first = rows_per_chunk - lines % rows_per_chunk
+            boundaries.extend(newlines[first - 1::rows_per_chunk].tolist())
+            lines += len(newlines)
+        del data
+        if size > header_end and mm[size - 1] != 10:
+            lines += 1  # Last line without trailing newline
+        if not boundaries or boundaries[-1] < size:
+            boundaries.append(size)
+
+        offset = header_end
+        view = memoryview(mm)
+        try:
+            for i, end in enumerate(boundaries):
+                if end <= offset:
+                    continue
+                chunk_hash = hashlib.blake2b(view[offset:end], digest_size=16).hexdigest()
+                digest.update(chunk_hash.encode('ascii'))
+                rows = min(rows_per_chunk, lines - i * rows_per_chunk)
+                index["chunks"].append({"offset": offset, "end": end, "rows": rows, "hash": chunk_hash})
+                offset = end
+        finally:
+            view.release()
+    index["lines"] = lines
+    index["digest"] = digest.hexdigest()
+    return index
+
+
+def load_csv_index(path, rows_per_chunk=chunk_size):
+    """
+    Return the chunk index of a CSV file, reusing the <path>.idx.json sidecar when the file did not change
+    """
+    stat = os.stat(path)
+    sidecar = path + INDEX_SUFFIX
     try:
-        # 1. Quick file hash comparison first (fastest check)
-        if get_file_hash(file1_path) == get_file_hash(file2_path):
+        with open(sidecar, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if (index.get("version") == INDEX_VERSION and index["size"] == stat.st_size
+                and index["mtime_ns"] == stat.st_mtime_ns and index["rows_per_chunk"] == rows_per_chunk):
+            return index
+    except (OSError, ValueError, KeyError):
+        pass
+    start_time = time.time()
+    index = build_csv_index(path, rows_per_chunk)
+    try:
+        with open(sidecar, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+    except OSError as e:
+        log.warning(f"Failed to save CSV index {sidecar}: {e}")
+    log.info(f"Indexed {path}: {index['lines']} lines, {len(index['chunks'])} chunks "
+             f"in {time.time() - start_time:.3f} seconds")
+    return index
+
+
+def _line_difference(line_no, left, right, columns):
+    """Text of one differing line: only the differing columns when both lines have the same layout."""
+    left_text = left.decode('utf-8', errors='replace').rstrip('\r')
+    right_text = right.decode('utf-8', errors='replace').rstrip('\r')
+    left_fields = split_fields(left_text)
+    right_fields = split_fields(right_text)
+    if len(left_fields) != len(right_fields):
+        return (f"Line {line_no}: different number of columns ({len(left_fields)} vs {len(right_fields)}): "
+                f"\"{left_text}\" vs \"{right_text}\"")
+    detail = '; '.join(f"{columns[i] if i < len(columns) else i + 1}: \"{a}\" vs \"{b}\""
+                       for i, (a, b) in enumerate(zip(left_fields, right_fields)) if a != b)
+    return f"Line {line_no}: {detail}" if detail else f"Line {line_no}: \"{left_text}\" vs \"{right_text}\""
+
+
+def _compare_segment(file1_path, file2_path, chunks, rows_per_chunk, columns, limit):
+    """
+    Compare aligned chunks of two files line by line (runs in a worker process)
+
+    Lines are compared as bytes, only the differing ones are decoded and split into fields.
+
+    Parameters:
+    chunks - List of (chunk number, left chunk, right chunk) from the indexes
+    limit - Stop after this many differences
+
+    Returns:
+    list of (line number, text)
+    """
+    differences = []
+    with open(file1_path, 'rb') as f1, open(file2_path, 'rb') as f2, \
+            mmap.mmap(f1.fileno(), 0, access=mmap.ACCESS_READ) as m1, \
+            mmap.mmap(f2.fileno(), 0, access=mmap.ACCESS_READ) as m2:
+        for number, left, right in chunks:
+            left_data = m1[left["offset"]:left["end"]]
+            right_data = m2[right["offset"]:right["end"]]
+            if left_data == right_data:
+                continue
+            # Line 1 is the header
+            first_line = number * rows_per_chunk + 2
+            for i, (a, b) in enumerate(zip(left_data.split(b'\n'), right_data.split(b'\n'))):
+                if a != b:
+                    differences.append((first_line + i, _line_difference(first_line + i, a, b, columns)))
+                    if len(differences) >= limit:
+                        return differences
+    return differences
+
+
+def parallel_compare_chunks(file1_path, file2_path, index1, index2, limit=max_diff, workers=None, time_limit=None):
+    """
+    Compare the chunks whose hashes differ in a process pool
+
+    Both indexes split the files after the same line numbers, so chunk N of both files holds the same
+    lines. Differing chunks are grouped into tasks of segment_chunks; results are merged in line order,
+    so the first `limit` differences are the same whatever the scheduling. Pending tasks are cancelled
+    once `limit` differences are known or the time limit is reached.
+
+    Returns:
+    tuple - (list of difference texts in line order, False when stopped by the time limit)
+    """
+    columns = split_fields(index1["header"].lower())
+    rows_per_chunk = index1["rows_per_chunk"]
+    differing = [(i, c1, c2) for i, (c1, c2) in enumerate(zip(index1["chunks"], index2["chunks"]))
+                 if c1["hash"] != c2["hash"]]
+    if not differing:
+        return [], True
+    tasks = [differing[i:i + segment_chunks] for i in range(0, len(differing), segment_chunks)]
+    workers = min(workers or compare_workers, len(tasks))
+    time_limit = time_limit or compare_time_limit
+    deadline = time.time() + time_limit
+
+    if workers == 1:
+        # A few differing chunks: not worth starting processes
+        differences = []
+        for task in tasks:
+            differences.extend(_compare_segment(file1_path, file2_path, task, rows_per_chunk, columns, limit))
+            if len(differences) >= limit:
+                break
+            if time.time() > deadline:
+                return [text for _, text in differences[:limit]], False
+        return [text for _, text in differences[:limit]], True
+
+    log.info(f"Comparing {len(differing)} differing chunks with {workers} processes")
+    differences = []
+    complete = True
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [executor.submit(_compare_segment, file1_path, file2_path, task, rows_per_chunk, columns, limit)
+                   for task in tasks]
+        # Wait in submission (= line) order
+        for future in futures:
+            differences.extend(future.result(timeout=max(0, deadline - time.time())))
+            if len(differences) >= limit:
+                break
+    except concurrent.futures.TimeoutError:
+        complete = False
+        log.warning(f"Positional compare stopped by the time limit ({time_limit} seconds)")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return [text for _, text in differences[:limit]], complete
+
+
+def split_fields(line):
+    return FIELD_SEPARATOR.split(line) if '\\,' in line else line.split(',')
+
+
+def key_getter(key_indexes):
+    """Function returning the key text of a line, splitting only as far as the last key column."""
+    maxsplit = max(key_indexes) + 1
+    split = FIELD_SEPARATOR.split
+    if len(key_indexes) == 1:
+        i = key_indexes[0]
+
+        def get_key(line):
+            fields = split(line, maxsplit) if '\\,' in line else line.split(',', maxsplit)
+            return fields[i].rstrip('\r\n') if i < len(fields) else ''
+    else:
+        def get_key(line):
+            fields = split(line, maxsplit) if '\\,' in line else line.split(',', maxsplit)
+            return '|'.join(fields[i].rstrip('\r\n') if i < len(fields) else '' for i in key_indexes)
+    return get_key
+
+
+def _partition_file(lines, get_key, directory, prefix, partitions, salt='', budget=keyed_memory_mb * 1024 * 1024):
+    """
+    Spread lines over partition files by the hash of their key, returns (paths, line count).
+
+    The write buffers of all partitions together stay under half the memory budget.
+    """
+    buffer_limit = max(4096, min(partition_buffer, budget // (2 * partitions)))
+    paths = [os.path.join(directory, f"{prefix}_{i:04d}.csv") for i in range(partitions)]
+    files = [open(path, 'w', encoding='utf-8', newline='') for path in paths]
+    buffers = [[] for _ in range(partitions)]
+    sizes = [0] * partitions
+    count = 0
+    try:
+        for line in lines:
+            if not line.endswith('\n'):
+                line += '\n'
+            i = hash(salt + get_key(line)) % partitions
+            buffers[i].append(line)
+            sizes[i] += len(line)
+            if sizes[i] >= buffer_limit:
+                files[i].write(''.join(buffers[i]))
+                buffers[i] = []
+                sizes[i] = 0
+            count += 1
+        for i, f in enumerate(files):
+            f.write(''.join(buffers[i]))
+    finally:
+        for f in files:
+            f.close()
+    return paths, count
+
+
+def _partition_count(size, budget):
+    # A dict of lines takes about 4x the bytes of the lines
+    return max(1, -(-size * 4 // budget))
+
+
+def _read_lines(path, skip_header=False):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if skip_header:
+            next(f, None)
+        yield from f
+
+
+class KeyedDiff:
+    """Counts and samples of a keyed compare."""
+
+    def __init__(self, left_columns, right_columns, max_samples):
+        self.left_columns = left_columns
+        # Position of every left column in the right rows (None when the right file does not have it)
+        self.right_positions = [right_columns.index(c) if c in right_columns else None for c in left_columns]
+        self.same_layout = self.right_positions == list(range(len(left_columns)))
+        self.max_samples = max_samples
+        self.summary = {"left_rows": 0, "right_rows": 0, "matched": 0, "changed": 0,
+                        "removed": 0, "added": 0, "changed_columns": {}, "samples": []}
+
+    def _sample(self, item):
+        if len(self.summary["samples"]) < self.max_samples:
+            self.summary["samples"].append(item)
+
+    def compare(self, key, left_line, right_line):
+        self.summary["matched"] += 1
+        if left_line == right_line and self.same_layout:
+            return
+        left_fields = split_fields(left_line.rstrip('\r\n'))
+        right_fields = split_fields(right_line.rstrip('\r\n'))
+        columns = {}
+        for i, column in enumerate(self.left_columns):
+            position = self.right_positions[i]
+            if position is None:
+                continue
+            left_value = left_fields[i] if i < len(left_fields) else ''
+            right_value = right_fields[position] if position < len(right_fields) else ''
+            if left_value != right_value:
+                columns[column] = [left_value, right_value]
+                self.summary["changed_columns"][column] = self.summary["changed_columns"].get(column, 0) + 1
+        if columns:
+            self.summary["changed"] += 1
+            self._sample({"kind": "changed", "key": key, "columns": columns})
+
+    def only(self, kind, key, line):
+        self.summary[kind] += 1
+        self._sample({"kind": kind, "key": key, "row": line.rstrip('\r\n')})
+
+
+def _counted(lines, summary, field):
+    for line in lines:
+        summary[field] += 1
+        yield line
+
+
+def _diff_partition(left_path, right_path, key_getters, diff, budget, directory, depth=0):
+    """Load the left partition into a dict and stream the right one against it, splitting it again if too big."""
+    partitions = _partition_count(os.path.getsize(left_path), budget)
+    if partitions > 1 and depth < 3:
+        # Too big for the budget (large input or skewed keys): split the pair again with another hash salt,
+        # at most max_partition_files at a time, the parts that are still too big split in the next pass
+        partitions = min(partitions, max_partition_files)
+        salt = f"{depth + 1}:"
+        prefix = os.path.splitext(os.path.basename(left_path))[0]
+        left_parts, _ = _partition_file(_read_lines(left_path), key_getters[0], directory, f"{prefix}_l",
+                                        partitions, salt, budget)
+        right_parts, _ = _partition_file(_read_lines(right_path), key_getters[1], directory, f"{prefix}_r",
+                                         partitions, salt, budget)
+        os.remove(left_path)
+        os.remove(right_path)
+        for left_part, right_part in zip(left_parts, right_parts):
+            _diff_partition(left_part, right_part, key_getters, diff, budget, directory, depth + 1)
+        return
+
+    _diff_lines(_read_lines(left_path), _read_lines(right_path), key_getters, diff)
+    os.remove(left_path)
+    os.remove(right_path)
+
+
+def _diff_lines(left_lines, right_lines, key_getters, diff):
+    """Hold the left lines in a dict by key and stream the right lines against it."""
+    left_key, right_key = key_getters
+    pending = {}  # key -> [left lines]
+    for line in left_lines:
+        pending.setdefault(left_key(line), []).append(line)
+    for line in right_lines:
+        key = right_key(line)
+        waiting = pending.get(key)
+        if waiting:
+            diff.compare(key, waiting.pop(0), line)
+            if not waiting:
+                del pending[key]
+        else:
+            diff.only("added", key, line)
+    for key, lines in pending.items():
+        for line in lines:
+            diff.only("removed", key, line)
+
+
+def diff_keyed_runs(left_lines, right_lines, key_getters, diff, budget, directory, partitions=max_partition_files):
+    """
+    Hash-partition two line streams on their key into runs under directory and diff every run pair
+
+    Parameters:
+    left_lines, right_lines - Iterables of CSV lines (no header)
+    key_getters - (left, right) functions of key_getter
+    diff - Object with compare(key, left_line, right_line) and only(kind, key, line), kind 'removed' / 'added'
+    budget - Memory budget in bytes, runs too big for it are split again
+    directory - Folder for the runs (removed run by run)
+    partitions - Runs of the first pass (at most max_partition_files)
+
+    Returns:
+    tuple - (left line count, right line count)
+    """
+    partitions = min(partitions, max_partition_files)
+    left_parts, left_count = _partition_file(left_lines, key_getters[0], directory, "left", partitions,
+                                             budget=budget)
+    right_parts, right_count = _partition_file(right_lines, key_getters[1], directory, "right", partitions,
+                                               budget=budget)
+    for left_part, right_part in zip(left_parts, right_parts):
+        _diff_partition(left_part, right_part, key_getters, diff, budget, directory)
+    return left_count, right_count
+
+
+def keyed_compare_csv(file1_path, file2_path, key_columns, memory_mb=keyed_memory_mb, work_dir=None,
+                      max_samples=max_diff):
+    """
+    Compare two exports by key, whatever the row order, within a memory budget
+
+    Both files are hash-partitioned on the key into runs on local disk, sized so that one left run fits
+    the budget as a dict; each run pair is then diffed. At most max_partition_files runs are written per
+    pass, runs still too big are split again. Rows whose key repeats are matched in file order.
+
+    Parameters:
+    file1_path, file2_path - CSV exports (left, right)
+    key_columns - Key column names (case-insensitive)
+    memory_mb - Memory budget
+    work_dir - Folder for the temporary runs (default: next to file1)
+    max_samples - Differences kept with details
+
+    Returns:
+    dict - left_rows, right_rows, matched, changed, removed (only in file 1), added (only in file 2),
+           changed_columns (column -> count), samples, elapsed
+    """
+    start_time = time.time()
+    with open(file1_path, 'r', encoding='utf-8') as f1, open(file2_path, 'r', encoding='utf-8') as f2:
+        left_columns = [c.lower() for c in split_fields(f1.readline().rstrip('\r\n'))]
+        right_columns = [c.lower() for c in split_fields(f2.readline().rstrip('\r\n'))]
+    keys = [k.strip().lower() for k in key_columns]
+    missing = [k for k in keys if k not in left_columns or k not in right_columns]
+    if missing:
+        raise ValueError(f"Key columns not found in both files: {', '.join(missing)}")
+    key_getters = (key_getter([left_columns.index(k) for k in keys]), key_getter([right_columns.index(k) for k in keys]))
+
+    budget = memory_mb * 1024 * 1024
+    partitions = min(_partition_count(os.path.getsize(file1_path), budget), max_partition_files)
+    diff = KeyedDiff(left_columns, right_columns, max_samples)
+    if partitions == 1:
+        # The left file fits the budget: diff straight from the exports, no runs
+        counts = diff.summary
+        _diff_lines(_counted(_read_lines(file1_path, True), counts, "left_rows"),
+                    _counted(_read_lines(file2_path, True), counts, "right_rows"), key_getters, diff)
+    else:
+        temp_dir = tempfile.mkdtemp(prefix="keyed_compare_",
+                                    dir=work_dir or os.path.dirname(os.path.abspath(file1_path)))
+        try:
+            diff.summary["left_rows"], diff.summary["right_rows"] = diff_keyed_runs(
+                _read_lines(file1_path, True), _read_lines(file2_path, True), key_getters, diff, budget, temp_dir,
+                partitions)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    summary = diff.summary
+    summary["key_columns"] = keys
+    summary["partitions"] = partitions
+    summary["identical"] = not (summary["changed"] or summary["removed"] or summary["added"])
+    summary["elapsed"] = round(time.time() - start_time, 3)
+    log.info(f"Keyed compare of {file1_path} and {file2_path}: "
+             f"{ {k: v for k, v in summary.items() if k != 'samples'} }")
+    return summary
+
+
+def format_keyed_summary(summary):
+    """Text of a keyed compare result, in the style of efficient_compare_large_csv."""
+    if summary["identical"]:
+        return (f"Files have same content by key ({summary['left_rows']} rows). "
+                f"Time {summary['elapsed']:.3f} seconds")
+    lines = [f"{summary['changed']} changed, {summary['removed']} only in file 1, "
+             f"{summary['added']} only in file 2 ({summary['left_rows']} vs {summary['right_rows']} rows)"]
+    if summary["changed_columns"]:
+        lines.append("Changed columns: " + ', '.join(f"{c} ({n})" for c, n in summary["changed_columns"].items()))
+    for sample in summary["samples"]:
+        if sample["kind"] == "changed":
+            detail = '; '.join(f"{c}: \"{l}\" vs \"{r}\"" for c, (l, r) in sample["columns"].items())
+            lines.append(f"Key {sample['key']}: {detail}")
+        else:
+            side = "file 1" if sample["kind"] == "removed" else "file 2"
+            lines.append(f"Key {sample['key']} only in {side}: \"{sample['row']}\"")
+    return '\n'.join(lines)
+
+
+def efficient_compare_large_csv(file1_path, file2_path, key_columns=None):
+    start_time = time.time()
+    if file1_path.endswith(MANIFEST_SUFFIX) and file2_path.endswith(MANIFEST_SUFFIX):
+        return compare_part_exports(file1_path, file2_path)
+    if key_columns:
+        # Row order does not matter when rows are matched by key
+        try:
+            return format_keyed_summary(keyed_compare_csv(file1_path, file2_path, key_columns))
+        except Exception as e:
+            log.error(f"Failed to compare csv files by key: {str(e)}")
+            return f'Failed to compare csv files by key: {str(e)}'
+    try:
+        # 1. One indexing pass per file (or the saved sidecar), both files at the same time
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            index1, index2 = executor.map(load_csv_index, (file1_path, file2_path))
+
+        # 2. Whole-file digest
+        if index1["digest"] == index2["digest"]:
             elapsed_time = time.time() - start_time
             return f"Files are identical (hash match). Time {elapsed_time:.3f} seconds"
 
-        # 2. Compare row counts without loading everything (still efficient)
-        row_count1 = sum(1 for _ in open(file1_path)) - 1  # Subtract header
-        row_count2 = sum(1 for _ in open(file2_path)) - 1  # Subtract header
+        # 3. Row counts from the index
+        row_count1 = index1["lines"]
+        row_count2 = index2["lines"]
 
         if row_count1 != row_count2:
             elapsed_time = time.time() - start_time
             return f"Files have different row counts: {row_count1} vs {row_count2}. Time {elapsed_time:.3f} seconds"
 
-        # 3. Check headers
-        # with open(file1_path, 'r') as f1, open(file2_path, 'r') as f2:
-        #     headers1 = next(csv.reader(f1))
-        #     headers2 = next(csv.reader(f2))
-        #
-        #     if headers1 != headers2:
-        #         return f"Files have different headers"
+        # 4. Compare only the chunks whose hashes differ, on all cores
+        differences, complete = parallel_compare_chunks(file1_path, file2_path, index1, index2)
+        if not complete:
+            differences.insert(0, f"Time limit of {compare_time_limit} seconds reached, differences found so far:")
 
-        # 4. If we need detailed differences, use chunked reading
-        differences = []
-        num_diff = 0
-
-        for i, (chunk1, chunk2) in enumerate(zip(
-                pd.read_csv(file1_path, chunksize=chunk_size, header=None, skiprows=1),
-                pd.read_csv(file2_path, chunksize=chunk_size, header=None, skiprows=1))):
-
-            if not chunk1.equals(chunk2):
-                # Option 1: Just note differences by chunk
-                # differences[f"chunk_{i}"] = "contains differences"
-
-                # Option 2: For more details (but more processing)
-                diff_rows = (chunk1 != chunk2).any(axis=1)
-                for i_diff in list(chunk1.index[diff_rows]):
-                    # chunk1.index[diff_rows] will have index list as index from the whole file,
-                    # not restart at 0 for each chunk
-                    # Example: there's a different at index 10001, the i_diff will be 10001
-                    # although each chunk only have 10000 items. This make chunk1.iloc[i_diff, :] throw error
-                    i_diff -= i * chunk_size
-                    a = ', '.join([str(item) for item in list(chunk1.iloc[i_diff, :].values)])
-                    b = ', '.join([str(item) for item in list(chunk2.iloc[i_diff, :].values)])
-                    differences.append(f"Line {i * chunk_size + i_diff + 2}: \"{a}\" vs \"{b}\"")
-                    num_diff += 1
-                    if num_diff >= max_diff:
-                        break
-                if num_diff >= max_diff:
-                    break
+        if not differences and index1["header"] != index2["header"]:
+            differences.append(f"Headers are different: \"{index1['header']}\" vs \"{index2['header']}\"")
 
         elapsed_time = time.time() - start_time
         if differences:
@@ -1,17 +1,30 @@
 import os
 import time
 import re
+import queue
+import threading
+import concurrent.futures
 from datetime import datetime
-from decimal import Decimal
 
 from src.helper.logger_helper import get_logger
+from src.helper.part_writer import PartWriter
+from src.helper.row_encoder import build_encoder, column_kinds, format_value  # format_value re-exported
 
 log = get_logger()
 
 batch_size = 50000  # Writing in chunks for efficiency
+copy_buffer_size = 8 * 1024 * 1024  # Write buffer of the COPY export
+progress_interval_bytes = 16 * 1024 * 1024  # COPY export reports progress every 16MB
+dbms_output_batch = 1000    # DBMS_OUTPUT lines fetched per round trip
+dbms_output_line_size = 32767  # Maximum length of a DBMS_OUTPUT line
+# A line of at least 3 '-', '=', '*' or '#' ends a DBMS_OUTPUT record
+RECORD_DELIMITER = re.compile(r'^\s*([-=*#])\1{2,}\s*$')
+pipeline_depth = 4          # Formatted batches buffered between the format workers and the writer
+format_workers = 2          # Batches formatted at the same time
+format_processes = False    # Format in worker processes (rows must be picklable, e.g. no LOB locators)
 
 
-def export_to_csv(parent_widget, cursor, work_dir, headers=None, name=''):
+def export_to_csv(parent_widget, cursor, work_dir, headers=None, name='', progress=None, stats=None, parts=None):
     """
     Export data or DBMS_OUTPUT to a CSV file with comma delimiter
 
@@ -21,6 +34,11 @@ def export_to_csv(parent_widget, cursor, work_dir, headers=None, name=''):
     work_dir - Base path to write CSV
     headers - Optional list of column names
     name - Name used in the output filename
+    progress - Optional callback progress(rows, bytes_written, path), called after every written batch;
+               an exception raised by it (e.g. job cancelled) aborts the export
+    stats - Optional dict filled with the stage timings of the export pipeline (see export_pipelined)
+    parts - Optional dict of PartWriter options (compression, max_rows): write compressed part files
+            and a manifest instead of one CSV (SELECT results only); the returned path is the manifest
 
     Returns:
     (bool, str) - Success status and output path or error message
@@ -38,86 +56,25 @@ def export_to_csv(parent_widget, cursor, work_dir, headers=None, name=''):
     try:
         start_time = time.time()
         full_path = os.path.join(filepath, filename)
-        with open(full_path, 'w', newline='', encoding='utf-8') as csvfile:
-            batch = []
-            row_count = 0
+        if progress:
+            progress(0, 0, full_path)
+        if headers and parts is not None:
+            with PartWriter(filepath, os.path.splitext(filename)[0], headers, **parts) as writer:
+                row_count = export_pipelined(cursor, writer, filename, writer.manifest_path, progress, stats)
+            log.info(f"Wrote {filename} as {len(writer.parts)} {writer.compression} parts with {row_count} records "
+                     f"in {time.time() - start_time:.3f} seconds")
+            return True, writer.manifest_path
 
+        with open(full_path, 'w', newline='', encoding='utf-8') as csvfile:
             if headers:
                 # Write provided headers
                 csvfile.write(','.join(headers) + '\n')
-                batch = []
-                row_count = 0
-                for row in cursor:  # Iterate over cursor directly
-                    # Convert row to strings, handling None, empty and special characters
-                    row_str = []
-                    for item in row:
-                        if item is None:
-                            item = '<<NULL>>'
-                        elif item == '':
-                            item = '<<EMPTY>>'
-                        elif isinstance(item, float) or isinstance(item, Decimal):
-                            item = str(item)
-                            if '.' in item:
-                                item = item.rstrip('0').rstrip('.')
-                        else:
-                            item = str(item).replace(',', '\\,').replace('\n', ' ').replace('\r', ' ')
-                        row_str.append(item)
-                    batch.append(','.join(row_str))
-                    if len(batch) >= batch_size:
-                        csvfile.write('\n'.join(batch) + '\n')
-                        row_count += len(batch)
-                        log.info(f"Wrote {filename} records {row_count - len(batch)} to {row_count}")
-                        batch = []
-                if batch:  # Write remaining rows
-                    csvfile.write('\n'.join(batch) + '\n')
-                    row_count += len(batch)
-                    log.info(f"Wrote {filename} records {row_count - len(batch)} to {row_count}")
+                row_count = export_pipelined(cursor, csvfile, filename, full_path, progress, stats)
 
             else:
                 # Handle DBMS_OUTPUT for Oracle
-                columns = []  # Store unique column names in order of appearance
-                row_data = {}  # Store column:value pairs for a single row
-
-                # Read all DBMS_OUTPUT lines
-                line_var = cursor.var(str)
-                status_var = cursor.var(int)
-                while True:
-                    cursor.callproc("dbms_output.get_line", (line_var, status_var))
-                    if status_var.getvalue() != 0:
-                        break
-                    line = line_var.getvalue()
-                    if line is not None:
-                        # Parse line with format 'col: value' (handle variable spaces after colon)
-                        try:
-                            col, value = re.split(r':\s+', line, maxsplit=1)
-                            if col not in columns:  # Keep order of appearance
-                                columns.append(col)
-                            if value == 'NULL':
-                                value = '<<NULL>>'
-                            elif value == '':
-                                value = '<<NULL>>'
-                            else:
-                                value = value.replace(',', '\\,').replace('\n', ' ').replace('\r', ' ')
-                            row_data[col] = value
-                            row_count += 1
-                        except ValueError:
-                            log.warning(f"Skipping invalid DBMS_OUTPUT line: {line}")
-                            continue
-
-                if columns:
-                    # Write headers (in order of appearance)
-                    headers = columns
-                    csvfile.write(','.join(headers) + '\n')
-
-                    # Write single row
-                    row = []
-                    for col in headers:
-                        value = row_data.get(col, '<<NULL>>')
-                        row.append(value)
-                    batch.append(','.join(row))
-                    csvfile.write('\n'.join(batch) + '\n')
-                    log.info(f"Wrote {filename} with 1 record")
-                else:
+                row_count = export_dbms_output(cursor, csvfile, filename, full_path, progress)
+                if not row_count:
                     log.warning(f"No valid DBMS_OUTPUT data found for {name}!")
                     return False, f"No valid DBMS_OUTPUT data found for {name}!"
 
@@ -130,6 +87,282 @@ def export_to_csv(parent_widget, cursor, work_dir, headers=None, name=''):
         return False, f"Failed to export {name} data: {str(e)}"
 
 
+def read_dbms_output(cursor, batch=dbms_output_batch):
+    """
+    Drain DBMS_OUTPUT with dbms_output.get_lines, batch lines per round trip
+
+    Returns:
+    generator of str - Output lines (None lines as '')
+    """
+    lines_var = cursor.arrayvar(str, batch, dbms_output_line_size)
+    num_lines_var = cursor.var(int)
+    while True:
+        num_lines_var.setvalue(0, batch)
+        cursor.callproc("dbms_output.get_lines", (lines_var, num_lines_var))
+        num_lines = num_lines_var.getvalue()
+        for line in lines_var.getvalue()[:num_lines]:
+            yield line or ''
+        if num_lines < batch:
+            break
+
+
+def parse_dbms_output_records(lines):
+    """
+    Group 'col: value' lines into records
+
+    A record ends at a delimiter line (see RECORD_DELIMITER) or when a column name repeats.
+
+    Returns:
+    generator of dict - column -> CSV value, in order of appearance
+    """
+    record = {}
+    for line in lines:
+        if not line:
+            continue
+        if RECORD_DELIMITER.match(line):
+            if record:
+                yield record
+                record = {}
+            continue
+        # Parse line with format 'col: value' (handle variable spaces after colon)
+        try:
+            col, value = re.split(r':\s+', line, maxsplit=1)
+        except ValueError:
+            log.warning(f"Skipping invalid DBMS_OUTPUT line: {line}")
+            continue
+        if col in record:
+            yield record
+            record = {}
+        if value == 'NULL' or value == '':
+            value = '<<NULL>>'
+        else:
+            value = value.replace(',', '\\,').replace('\n', ' ').replace('\r', ' ')
+        record[col] = value
+    if record:
+        yield record
+
+
+def export_dbms_output(cursor, csvfile, filename, full_path, progress=None):
+    """
+    Write the DBMS_OUTPUT records of an executed PL/SQL block to an open CSV file
+
+    The header is the columns of the first record; columns first seen in later records are dropped with a warning.
+
+    Returns:
+    int - Number of records written
+    """
+    headers = None
+    ignored = set()
+    batch = []
+    row_count = 0
+    for record in parse_dbms_output_records(read_dbms_output(cursor)):
+        if headers is None:
+            headers = list(record)
+            csvfile.write(','.join(headers) + '\n')
+        extra = record.keys() - set(headers) - ignored
+        if extra:
+            ignored |= extra
+            log.warning(f"Ignoring DBMS_OUTPUT columns not in the first record: {sorted(extra)}")
+        batch.append(','.join([record.get(col, '<<NULL>>') for col in headers]))
+        if len(batch) >= batch_size:
+            csvfile.write('\n'.join(batch) + '\n')
+            row_count += len(batch)
+            log.info(f"Wrote {filename} records {row_count - len(batch)} to {row_count}")
+            batch = []
+            if progress:
+                progress(row_count, csvfile.tell(), full_path)
+    if batch:
+        csvfile.write('\n'.join(batch) + '\n')
+        row_count += len(batch)
+        if progress:
+            progress(row_count, csvfile.tell(), full_path)
+    return row_count
+
+
+class _ProgressWriter:
+    """File wrapper counting what COPY writes and calling progress every progress_interval_bytes."""
+
+    def __init__(self, file, path, progress):
+        self.file = file
+        self.path = path
+        self.progress = progress
+        self.rows = 0
+        self.next_report = progress_interval_bytes
+
+    def write(self, data):
+        self.file.write(data)
+        self.rows += 1  # psycopg2 writes one row per call
+        if self.file.tell() >= self.next_report:
+            self.next_report += progress_interval_bytes
+            self.progress(self.rows, self.file.tell(), self.path)
+
+
+def export_copy_to_csv(cursor, copy_sql, work_dir, headers, name='', progress=None):
+    """
+    Export the output of a PostgreSQL COPY ... TO STDOUT to a CSV file (see postgres_db.build_copy_query)
+
+    The server already formats every row, the data goes from the socket to the file without per-row Python work.
+
+    Parameters:
+    cursor - psycopg2 cursor
+    copy_sql - COPY statement
+    work_dir - Base path to write CSV
+    headers - List of column names
+    name - Name used in the output filename
+    progress - Optional callback progress(rows, bytes_written, path)
+
+    Returns:
+    (bool, str) - Success status and output path or error message
+    """
+    filename = f"{name}_query_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    filepath = os.path.join(os.path.expandvars(work_dir), "query", name)
+    os.makedirs(filepath, exist_ok=True)
+    full_path = os.path.join(filepath, filename)
+
+    try:
+        start_time = time.time()
+        if progress:
+            progress(0, 0, full_path)
+        with open(full_path, 'wb', buffering=copy_buffer_size) as csvfile:
+            csvfile.write((','.join(headers) + '\n').encode('utf-8'))
+            target = _ProgressWriter(csvfile, full_path, progress) if progress else csvfile
+            cursor.copy_expert(copy_sql, target)
+            size = csvfile.tell()
+        row_count = cursor.rowcount
+        if progress:
+            progress(row_count, size, full_path)
+        elapsed_time = time.time() - start_time
+        log.info(f"Wrote {filename} with {row_count} records ({size / (1024 * 1024):.1f} MB) "
+                 f"by COPY in {elapsed_time:.3f} seconds")
+        return True, full_path
+    except Exception as e:
+        log.error(f"Failed to export {name} data: {str(e)}")
+        return False, f"Failed to export {name} data: {str(e)}"
+
+
+def format_rows(rows, kinds=None):
+    """
+    Format one fetched batch into CSV lines (runs in a format worker thread or process)
+
+    kinds - Column kinds of the query (row_encoder.column_kinds); the encoder compiled for them is cached
+            per process. Without kinds every cell goes through format_value.
+
+    Returns:
+    (str, int, float) - Text of the lines, number of rows and seconds spent formatting
+    """
+    start_time = time.perf_counter()
+    if kinds:
+        text = build_encoder(kinds)(rows)
+    else:
+        text = '\n'.join(','.join([format_value(item) for item in row]) for row in rows) + '\n'
+    return text, len(rows), time.perf_counter() - start_time
+
+
+def _put(q, item, stop):
+    """Blocking put that gives up when the pipeline is stopped."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def export_pipelined(cursor, csvfile, filename, full_path, progress=None, stats=None):
+    """
+    Write the rows of a cursor to an open CSV file with overlapping stages
+
+    - fetch: the calling thread pulls fetchmany(batch_size) batches and hands them to the format workers
+    - format: format_workers threads (or processes if format_processes) turn batches into CSV text
+    - write: a writer thread writes the formatted batches in fetch order
+
+    Parameters:
+    cursor - Executed cursor
+    csvfile - Open text file, headers already written
+    filename - Name used in log messages
+    full_path - Path passed to progress
+    progress - Optional callback progress(rows, bytes_written, path) called from the writer after each batch
+    stats - Optional dict filled with seconds per stage: fetch, format, write, and the time the fetch
+            stage waited for the writer (fetch_wait) / the writer waited for formatted batches (write_wait)
+
+    Returns:
+    int - Number of rows written
+    """
+    timings = {"fetch": 0.0, "fetch_wait": 0.0, "format": 0.0, "write": 0.0, "write_wait": 0.0, "batches": 0}
+    formatted = queue.Queue(maxsize=pipeline_depth)
+    stop = threading.Event()
+    errors = []
+    row_count = 0
+
+    def write():
+        nonlocal row_count
+        try:
+            while not stop.is_set():
+                start_time = time.perf_counter()
+                try:
+                    # Time out to see stop: a failed or cancelled fetch does not enqueue the end marker
+                    future = formatted.get(timeout=0.2)
+                except queue.Empty:
+                    timings["write_wait"] += time.perf_counter() - start_time
+                    continue
+                if future is None:
+                    break
+                text, rows, format_time = future.result()
+                timings["write_wait"] += time.perf_counter() - start_time
+                timings["format"] += format_time
+                start_time = time.perf_counter()
+                csvfile.write(text)
+                timings["write"] += time.perf_counter() - start_time
+                timings["batches"] += 1
+                row_count += rows
+                log.info(f"Wrote {filename} records {row_count - rows} to {row_count}")
+                if progress:
+                    progress(row_count, csvfile.tell(), full_path)
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+
+    kinds = column_kinds(cursor.description) if cursor.description else None
+    pool_class = concurrent.futures.ProcessPoolExecutor if format_processes else concurrent.futures.ThreadPoolExecutor
+    start = time.perf_counter()
+    writer = threading.Thread(target=write, name="csv-writer", daemon=True)
+    writer.start()
+    with pool_class(max_workers=format_workers) as executor:
+        try:
+            while not stop.is_set():
+                start_time = time.perf_counter()
+                rows = cursor.fetchmany(batch_size)
+                timings["fetch"] += time.perf_counter() - start_time
+                if not rows:
+                    break
+                start_time = time.perf_counter()
+                if not _put(formatted, executor.submit(format_rows, rows, kinds), stop):
+                    break
+                timings["fetch_wait"] += time.perf_counter() - start_time
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            if not stop.is_set():
+                _put(formatted, None, stop)
+            writer.join()
+            if stop.is_set():
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    if errors:
+        raise errors[0]
+    timings = {k: round(v, 3) if isinstance(v, float) else v for k, v in timings.items()}
+    timings["elapsed"] = round(time.perf_counter() - start, 3)
+    # The stage with the most busy time limits the pipeline (format time is spread over the workers)
+    busy = {"fetch": timings["fetch"], "format": timings["format"] / format_workers, "write": timings["write"]}
+    timings["bottleneck"] = max(busy, key=busy.get)
+    log.info(f"Export pipeline of {filename}: {timings}")
+    if stats is not None:
+        stats.update(timings)
+    return row_count
+
+
 def format_query_results(cursor_results, cursor=None, name=''):
     """
     Format database cursor results for CSV export
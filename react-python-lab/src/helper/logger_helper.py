@@ -3,7 +3,8 @@ import os
 
 import sys
 
-LOG_DIR = os.path.join(os.path.expandvars('%userprofile%\\ora2pg'), 'logs')
+# %userprofile% only expands on Windows, headless runs on Linux log to ~/ora2pg/logs
+LOG_DIR = os.path.join(os.environ.get('USERPROFILE') or os.path.expanduser('~'), 'ora2pg', 'logs')
 os.makedirs(LOG_DIR, exist_ok=True)
 
 LOGGING = {
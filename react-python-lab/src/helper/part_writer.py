@@ -0,0 +1,173 @@
+import os
+import gzip
+import json
+import shutil
+import hashlib
+
+from src.helper.logger_helper import get_logger
+
+try:
+    import zstandard
+except ImportError:  # Optional, gzip is used when zstandard is not installed
+    zstandard = None
+
+log = get_logger()
+
+# Rows per part; parts are split on the row count only, so part N of both sides covers the same rows
+# even though Oracle and PostgreSQL lines differ in bytes (lower it for very wide rows)
+part_max_rows = 1000000
+gzip_level = 1
+zstd_level = 3
+
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+def default_compression():
+    return "zstd" if zstandard else "gzip"
+
+
+def part_extension(compression):
+    return {"zstd": ".csv.zst", "gzip": ".csv.gz"}.get(compression, ".csv")
+
+
+def open_part(path):
+    """Open a part file (compressed or not) as a binary stream."""
+    if path.endswith(".zst"):
+        if not zstandard:
+            raise RuntimeError("zstandard is required to read .zst parts (pip install zstandard)")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    if path.endswith(".gz"):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def extract_part(path, target_path):
+    """Decompress a part to a plain CSV file (for WinMerge / pandas)."""
+    with open_part(path) as source, open(target_path, 'wb') as target:
+        shutil.copyfileobj(source, target, 1024 * 1024)
+    return target_path
+
+
+def load_manifest(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    manifest["directory"] = os.path.dirname(os.path.abspath(path))
+    return manifest
+
+
+class PartWriter:
+    """
+    File-like writer splitting CSV lines into compressed part files, with a manifest
+
+    Every part starts with the header line. The manifest (<base_name>.manifest.json) lists per part the
+    row range, the byte range in the uncompressed data stream (headers excluded) and the sha256 of the
+    part's data lines, so two exports can be compared part by part without decompressing them.
+
+    write() must receive whole lines (the export writes complete batches).
+    """
+
+    def __init__(self, directory, base_name, headers, compression=None,
+                 max_rows=part_max_rows):
+        self.directory = directory
+        self.base_name = base_name
+        self.headers = list(headers)
+        self.compression = compression or default_compression()
+        if self.compression == "zstd" and not zstandard:
+            log.warning("zstandard is not installed, using gzip")
+            self.compression = "gzip"
+        self.max_rows = max_rows
+        self.parts = []
+        self.manifest_path = os.path.join(directory, base_name + MANIFEST_SUFFIX)
+        self._header_bytes = (','.join(self.headers) + '\n').encode('utf-8')
+        self._raw = None
+        self._stream = None
+        self._part = None
+        self._total_rows = 0
+        self._total_bytes = 0
+        self._closed_bytes = 0  # Compressed bytes of the finished parts
+        self._closed = False
+        os.makedirs(directory, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _open_part(self):
+        index = len(self.parts) + 1
+        file_name = f"{self.base_name}.part{index:04d}{part_extension(self.compression)}"
+        self._raw = open(os.path.join(self.directory, file_name), 'wb')
+        if self.compression == "zstd":
+            self._stream = zstandard.ZstdCompressor(level=zstd_level).stream_writer(self._raw, closefd=False)
+        elif self.compression == "gzip":
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode='wb', compresslevel=gzip_level, mtime=0)
+        else:
+            self._stream = self._raw
+        self._stream.write(self._header_bytes)
+        self._part = {"file": file_name, "first_row": self._total_rows + 1, "rows": 0,
+                      "byte_start": self._total_bytes, "byte_end": self._total_bytes,
+                      "compressed_bytes": 0, "sha256": hashlib.sha256()}
+
+    def _close_part(self):
+        if self._part is None:
+            return
+        if self._stream is not self._raw:
+            self._stream.close()
+        self._raw.close()
+        self._part["compressed_bytes"] = os.path.getsize(os.path.join(self.directory, self._part["file"]))
+        self._part["sha256"] = self._part["sha256"].hexdigest()
+        self._closed_bytes += self._part["compressed_bytes"]
+        self.parts.append(self._part)
+        self._part = None
+
+    def _write_lines(self, data, rows):
+        if self._part is None:
+            self._open_part()
+        self._stream.write(data)
+        self._part["sha256"].update(data)
+        self._part["rows"] += rows
+        self._part["byte_end"] += len(data)
+        self._total_rows += rows
+        self._total_bytes += len(data)
+
+    def write(self, text):
+        data = text.encode('utf-8') if isinstance(text, str) else text
+        rows = data.count(b'\n')
+        while rows:
+            if self._part is not None and self._part["rows"] >= self.max_rows:
+                self._close_part()
+            room = self.max_rows - (self._part["rows"] if self._part else 0)
+            if rows <= room:
+                self._write_lines(data, rows)
+                break
+            # Split exactly at the row cap so part N of both sides covers the same rows
+            cut = 0
+            for _ in range(room):
+                cut = data.index(b'\n', cut) + 1
+            self._write_lines(data[:cut], room)
+            data, rows = data[cut:], rows - room
+
+    def tell(self):
+        """Compressed bytes written so far (for progress)."""
+        current = self._raw.tell() if self._part is not None else 0
+        return self._closed_bytes + current
+
+    def close(self):
+        if self._closed:
+            return self.manifest_path
+        self._closed = True
+        self._close_part()
+        manifest = {
+            "version": 1,
+            "name": self.base_name,
+            "headers": self.headers,
+            "compression": self.compression,
+            "max_rows": self.max_rows,
+            "total_rows": self._total_rows,
+            "total_bytes": self._total_bytes,
+            "parts": self.parts,
+        }
+        with open(self.manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        return self.manifest_path
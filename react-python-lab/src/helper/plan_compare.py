@@ -0,0 +1,221 @@
+import os
+import json
+from datetime import datetime
+
+from src.helper.logger_helper import get_logger
+
+log = get_logger()
+
+misestimate_ratio = 10        # Actual vs estimated rows (either way) reported as a misestimate
+misestimate_min_rows = 1000   # Ignore misestimates on operators below this many rows
+top_operators = 5             # Slowest operators listed per side
+
+FULL_SCAN = "full scan"
+INDEX_SCAN = "index scan"
+
+POSTGRES_ACCESS = {
+    "Seq Scan": FULL_SCAN,
+    "Parallel Seq Scan": FULL_SCAN,
+    "Index Scan": INDEX_SCAN,
+    "Index Only Scan": INDEX_SCAN,
+    "Bitmap Heap Scan": INDEX_SCAN,
+    "Bitmap Index Scan": INDEX_SCAN,
+}
+
+
+def _node(operation, table=None, index=None, estimated_rows=None, actual_rows=None, starts=None,
+          time_ms=None, buffers=None, cost=None):
+    return {"operation": operation, "access": None, "table": table.split('.')[-1].lower() if table else None,
+            "index": index.lower() if index else None, "estimated_rows": estimated_rows,
+            "actual_rows": actual_rows, "starts": starts, "time_ms": time_ms, "self_ms": None,
+            "buffers": buffers, "cost": cost, "children": []}
+
+
+def oracle_tree(capture):
+    """
+    Common plan tree of oracle_db.capture_plan
+
+    Estimated rows are CARDINALITY (per start) times the starts, so they compare with LAST_OUTPUT_ROWS.
+    """
+    nodes = {}
+    root = None
+    for op in capture["operations"]:
+        name = f"{op['operation']} {op['options'] or ''}".strip()
+        starts = op["starts"]
+        estimated = op["cardinality"] * max(starts or 1, 1) if op["cardinality"] is not None else None
+        node = _node(name, op.get("table_name"), op["object_name"] if op["operation"] == "INDEX" else None,
+                     estimated, op["actual_rows"], starts,
+                     op["elapsed_us"] / 1000 if op["elapsed_us"] is not None else None, op["buffers"], op["cost"])
+        if op["operation"] in ("TABLE ACCESS", "MAT_VIEW ACCESS"):
+            node["access"] = FULL_SCAN if (op["options"] or "").startswith("FULL") else INDEX_SCAN
+        elif op["operation"] == "INDEX":
+            node["access"] = INDEX_SCAN
+        nodes[op["id"]] = node
+        if op["parent_id"] is None or op["parent_id"] not in nodes:
+            root = root or node
+        else:
+            nodes[op["parent_id"]]["children"].append(node)
+    _set_self_time(root)
+    return root
+
+
+def postgres_tree(capture):
+    """Common plan tree of postgres_db.capture_plan (times and rows are totals over all loops)."""
+    def build(plan):
+        loops = plan.get("Actual Loops", 1) or 1
+        time_ms = plan["Actual Total Time"] * loops if "Actual Total Time" in plan else None
+        buffers = plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0) if "Shared Hit Blocks" in plan else None
+        name = plan["Node Type"]
+        if plan.get("Strategy") and name == "Aggregate":
+            name = f"{plan['Strategy']} Aggregate"
+        node = _node(name, plan.get("Relation Name"), plan.get("Index Name"),
+                     plan.get("Plan Rows", 0) * loops, plan["Actual Rows"] * loops if "Actual Rows" in plan else None,
+                     loops, time_ms, buffers, plan.get("Total Cost"))
+        node["access"] = POSTGRES_ACCESS.get(plan["Node Type"])
+        node["children"] = [build(child) for child in plan.get("Plans", [])]
+        return node
+
+    root = build(capture["plan"])
+    _set_self_time(root)
+    return root
+
+
+def _set_self_time(node):
+    if not node:
+        return
+    for child in node["children"]:
+        _set_self_time(child)
+    if node["time_ms"] is not None:
+        children_ms = sum(child["time_ms"] or 0 for child in node["children"])
+        node["self_ms"] = max(node["time_ms"] - children_ms, 0)
+
+
+def walk(node):
+    """All nodes of a tree, depth first."""
+    if not node:
+        return
+    yield node
+    for child in node["children"]:
+        yield from walk(child)
+
+
+def table_access(tree):
+    """table -> set of access methods ("full scan" / "index scan") used for it."""
+    access = {}
+    for node in walk(tree):
+        if node["access"] and node["table"]:
+            access.setdefault(node["table"], set()).add(node["access"])
+    return access
+
+
+def misestimates(tree):
+    """Operators whose actual rows are misestimate_ratio times off the estimate."""
+    found = []
+    for node in walk(tree):
+        estimated, actual = node["estimated_rows"], node["actual_rows"]
+        if estimated is None or actual is None or max(estimated, actual) < misestimate_min_rows:
+            continue
+        ratio = max(estimated, actual) / max(min(estimated, actual), 1)
+        if ratio >= misestimate_ratio:
+            found.append({"operation": node["operation"], "table": node["table"], "estimated_rows": estimated,
+                          "actual_rows": actual, "ratio": round(ratio, 1)})
+    return found
+
+
+def slowest_operators(tree, limit=top_operators):
+    timed = [node for node in walk(tree) if node["self_ms"] is not None]
+    timed.sort(key=lambda node: node["self_ms"], reverse=True)
+    return [{"operation": node["operation"], "table": node["table"], "self_ms": round(node["self_ms"], 3),
+             "time_ms": round(node["time_ms"], 3), "actual_rows": node["actual_rows"]} for node in timed[:limit]]
+
+
+def plan_tree(capture):
+    return oracle_tree(capture) if capture["db_type"].lower() == "oracle" else postgres_tree(capture)
+
+
+def compare_plans(left_capture, right_capture):
+    """
+    Compare the captured plans of the two sides of a query diff
+
+    Parameters:
+    left_capture, right_capture - Results of oracle_db.capture_plan / postgres_db.capture_plan
+
+    Returns:
+    dict - left / right (db_type, source, elapsed, rows, tree, misestimates, slowest), access_differences
+           (tables scanned in full on one side and through an index on the other) and slower_side
+    """
+    sides = {}
+    for side, capture in (("left", left_capture), ("right", right_capture)):
+        tree = plan_tree(capture)
+        sides[side] = {"db_type": capture["db_type"], "source": capture["source"],
+                       "elapsed": round(capture["elapsed"], 3),
+                       "elapsed_source": capture.get("elapsed_source", "server"),
+                       "client_elapsed": round(capture["client_elapsed"], 3) if capture.get("client_elapsed") else None,
+                       "rows": capture["rows"], "tree": tree,
+                       "text": capture.get("text"), "misestimates": misestimates(tree),
+                       "slowest": slowest_operators(tree)}
+
+    left_access = table_access(sides["left"]["tree"])
+    right_access = table_access(sides["right"]["tree"])
+    access_differences = []
+    for table in sorted(set(left_access) & set(right_access)):
+        left_methods, right_methods = left_access[table], right_access[table]
+        if left_methods != right_methods and (FULL_SCAN in left_methods) != (FULL_SCAN in right_methods):
+            access_differences.append({"table": table, "left": sorted(left_methods), "right": sorted(right_methods)})
+
+    left_elapsed, right_elapsed = sides["left"]["elapsed"], sides["right"]["elapsed"]
+    slower = "left" if left_elapsed > right_elapsed else "right"
+    faster_elapsed = min(left_elapsed, right_elapsed)
+    # Server time against client wall time (fetch and network included) would not be a fair ratio
+    comparable = sides["left"]["elapsed_source"] == sides["right"]["elapsed_source"] == "server"
+    return {**sides, "access_differences": access_differences, "slower_side": slower,
+            "slowdown": round(max(left_elapsed, right_elapsed) / faster_elapsed, 1)
+            if faster_elapsed and comparable else None}
+
+
+def format_plan_report(report):
+    """Text summary of compare_plans, shown next to the data diff result."""
+    left, right = report["left"], report["right"]
+    names = {"left": left["db_type"], "right": right["db_type"]}
+    if left["db_type"] == right["db_type"]:
+        names = {"left": f"{left['db_type']} (left)", "right": f"{right['db_type']} (right)"}
+    timing = " (server time)" if left["elapsed_source"] == right["elapsed_source"] == "server" else ""
+    header = (f"Execution plans{timing}: {names['left']} {left['elapsed']:.3f} s, "
+              f"{names['right']} {right['elapsed']:.3f} s")
+    if report["slowdown"]:
+        header += f" ({report['slowdown']}x slower on {names[report['slower_side']]})"
+    lines = [header]
+    for side in ("left", "right"):
+        if report[side]["source"] == "explain":
+            lines.append(f"{names[side]}: estimated plan only (no access to cursor statistics)")
+        if report[side]["elapsed_source"] != "server":
+            lines.append(f"{names[side]}: client wall time only (fetch and network included), not compared")
+    if report["access_differences"]:
+        lines.append("Access paths:")
+        for item in report["access_differences"]:
+            lines.append(f"  {item['table']}: {' + '.join(item['left'])} on {names['left']}, "
+                         f"{' + '.join(item['right'])} on {names['right']}")
+    for side in ("left", "right"):
+        if report[side]["misestimates"]:
+            lines.append(f"Misestimates on {names[side]}:")
+            for item in report[side]["misestimates"]:
+                target = f" {item['table']}" if item["table"] else ""
+                lines.append(f"  {item['operation']}{target}: estimated {item['estimated_rows']:,} rows, "
+                             f"actual {item['actual_rows']:,} ({item['ratio']}x)")
+    for side in ("left", "right"):
+        if report[side]["slowest"]:
+            operators = '; '.join(f"{item['operation']}{' ' + item['table'] if item['table'] else ''} "
+                                  f"{item['self_ms']:.1f} ms" for item in report[side]["slowest"])
+            lines.append(f"Slowest operators on {names[side]}: {operators}")
+    return '\n'.join(lines)
+
+
+def write_plan_report(work_dir, report):
+    """Save the plan comparison (JSON with both trees and DBMS_XPLAN text) under <work_dir>/query/plans."""
+    directory = os.path.join(os.path.expandvars(work_dir), "query", "plans")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"plans_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+    log.info(f"Plan comparison saved to {path}")
+    return path
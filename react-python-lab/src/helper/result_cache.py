@@ -0,0 +1,274 @@
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import threading
+
+from src.helper.logger_helper import get_logger
+
+log = get_logger()
+
+cache_max_mb = 2048  # LRU size cap of the export cache
+
+_lock = threading.Lock()
+
+
+# String literals and quoted identifiers are matched first, so "--" or "/*" inside them is not a comment
+_SQL_TOKENS = re.compile(r"""('(?:''|[^'])*'|"[^"]*")|(/\*.*?\*/|--[^\n]*)""", re.S)
+
+
+def normalize_query(query):
+    """
+    Normalize a query so formatting-only changes hit the same cache entry
+
+    Comments and the trailing ';' are removed, whitespace is collapsed and everything outside
+    string literals / quoted identifiers is lower-cased.
+    """
+    normalized = []
+    position = 0
+    for match in _SQL_TOKENS.finditer(query):
+        normalized.append(re.sub(r'\s+', ' ', query[position:match.start()]).lower())
+        # Quoted parts are kept as they are, comments become a space
+        normalized.append(match.group(1) or ' ')
+        position = match.end()
+    normalized.append(re.sub(r'\s+', ' ', query[position:]).lower())
+    return re.sub(r' {2,}', ' ', ''.join(normalized)).strip().rstrip(';').strip()
+
+
+def connection_fingerprint(db_type, conn_string='', username='', dsn='', host='', database='', port=''):
+    """Identify the connection target without the password."""
+    if conn_string:
+        target = conn_string
+        if db_type.lower() == 'oracle':
+            # username/password@dsn -> username@dsn
+            target = re.sub(r'^([^/@]+)/[^@]*', r'\1', conn_string)
+        else:
+            target = re.sub(r'(://[^:/@]+):[^@]*@', r'\1@', conn_string)
+            target = re.sub(r'password\s*=\s*\S+', '', target)
+    else:
+        target = f"{username}@{dsn or f'{host}:{port}/{database}'}"
+    return hashlib.sha256(f"{db_type.lower()}|{target.strip().lower()}".encode('utf-8')).hexdigest()[:16]
+
+
+# Keywords that end a FROM list (at the same parenthesis depth)
+_FROM_END = re.compile(r'(where|group|order|having|union|intersect|minus|except|fetch|limit|offset|connect|start'
+                       r'|window|for|model|pivot|unpivot|qualify)\b')
+_JOIN = re.compile(r'\bjoin\b')
+_TABLE_NAME = re.compile(r'([\w$#]+|"[^"]+")(\s*\.\s*([\w$#]+|"[^"]+"))?')
+
+
+def _from_list(sql, start):
+    """Text of the FROM list starting at `start`, with nested parentheses replaced by "()"."""
+    depth = 0
+    text = []
+    i = start
+    while i < len(sql):
+        char = sql[i]
+        if char == '(':
+            if depth == 0:
+                text.append('()')
+            depth += 1
+        elif char == ')':
+            if depth == 0:
+                break
+            depth -= 1
+        elif depth == 0:
+            if (char.isalpha() and not (sql[i - 1].isalnum() or sql[i - 1] in '_$#')
+                    and _FROM_END.match(sql, i)):
+                break
+            text.append(char)
+        i += 1
+    return ''.join(text)
+
+
+def referenced_tables(query):
+    """
+    Tables read by the query (lower-case, "schema.table" when qualified), used by the data-version probe
+
+    Every item of every FROM list is parsed: comma joins, JOIN clauses and the FROM lists of subqueries.
+
+    Returns:
+    list or None - None when a FROM item is not a plain table (table functions, LATERAL, ...),
+                   so the caller can skip caching instead of missing a table
+    """
+    # String literals are blanked so their content is never taken for SQL
+    sql = re.sub(r"'(?:''|[^'])*'", "''", normalize_query(query))
+    tables = set()
+    for match in re.finditer(r'\bfrom\b', sql):
+        for item in _from_list(sql, match.end()).split(','):
+            for source in _JOIN.split(item):
+                # "a left outer" before a JOIN and "b on a.id = b.id" after it both start with the table
+                source = source.strip()
+                if not source or source.startswith('()'):
+                    continue  # Subquery, its own FROM list is parsed separately
+                name = _TABLE_NAME.match(source)
+                rest = source[name.end():].lstrip() if name else source
+                if not name or rest.startswith('()') or name.group(1) in ('lateral', 'table', 'only', 'dual'):
+                    if name and name.group(1) == 'dual' and not name.group(2):
+                        continue
+                    return None
+                parts = [name.group(1)] + ([name.group(3)] if name.group(3) else [])
+                tables.add('.'.join(part.strip('"').lower() for part in parts))
+    return sorted(tables)
+
+
+def data_version(connection, db_type, query):
+    """
+    Cheap probe of the data the query reads; a different value means the cached export may be stale.
+
+    Oracle: user_tab_modifications of the referenced tables (flushed first) together with their
+            last_analyzed, since gathering statistics resets the modification counters.
+    PostgreSQL: pg_stat_user_tables change counters of the referenced tables.
+
+    Returns:
+    str or None - None when the version cannot be determined (the cache is then not used)
+    """
+    tables = referenced_tables(query)
+    if not tables:
+        return None
+    cursor = connection.cursor()
+    try:
+        if db_type.lower() == 'oracle':
+            if any('.' in table for table in tables):
+                # Other schemas are not in user_tab_modifications
+                return None
+            # Without the flush the counters lag behind the DML, so a failed flush disables the cache
+            cursor.execute("BEGIN DBMS_STATS.FLUSH_DATABASE_MONITORING_INFO; END;")
+            binds = ', '.join(f':{i + 1}' for i in range(len(tables)))
+            cursor.execute(f"""
+                SELECT t.table_name, TO_CHAR(t.last_analyzed, 'YYYY-MM-DD HH24:MI:SS'),
+                       m.inserts, m.updates, m.deletes, m.truncated, TO_CHAR(m.timestamp, 'YYYY-MM-DD HH24:MI:SS')
+                FROM user_tables t
+                LEFT JOIN user_tab_modifications m ON m.table_name = t.table_name AND m.partition_name IS NULL
+                WHERE t.table_name IN ({binds})
+                ORDER BY t.table_name""", [t.upper() for t in tables])
+            rows = cursor.fetchall()
+        else:
+            names = [table.split('.')[-1] for table in tables]
+            cursor.execute("""
+                SELECT schemaname, relname, n_tup_ins, n_tup_upd, n_tup_del, n_live_tup, n_dead_tup
+                FROM pg_stat_user_tables
+                WHERE relname = ANY(%s)
+                ORDER BY schemaname, relname""", (names,))
+            rows = [row for row in cursor.fetchall()
+                    if row[1] in tables or f"{row[0]}.{row[1]}" in tables]
+            connection.rollback()
+        if len(rows) != len(tables):
+            # Views, synonyms, other-schema or ambiguous tables: no counters to rely on
+            return None
+        return hashlib.sha256(repr(rows).encode('utf-8')).hexdigest()
+    except Exception as e:
+        log.warning(f"Data version probe failed, cache disabled for this query: {e}")
+        return None
+    finally:
+        cursor.close()
+
+
+class ResultCache:
+    """
+    Disk-backed LRU cache of query exports under <work_dir>/query/cache
+
+    index.json maps key -> {file, size, created, last_access, db_type}
+    """
+
+    def __init__(self, work_dir, max_mb=cache_max_mb):
+        self.path = os.path.join(os.path.expandvars(work_dir), "query", "cache")
+        self.index_path = os.path.join(self.path, "index.json")
+        self.max_bytes = max_mb * 1024 * 1024
+
+    @staticmethod
+    def make_key(db_type, fingerprint, query, version):
+        raw = f"{db_type.lower()}|{fingerprint}|{normalize_query(query)}|{version}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, index):
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def get(self, key, target_path):
+        """
+        Copy the cached export to target_path and return target_path, or None when not cached.
+
+        The cache file itself is never handed out: the export may be opened and edited (e.g. in WinMerge).
+        """
+        with _lock:
+            index = self._load_index()
+            entry = index.get(key)
+            if not entry:
+                return None
+            file_path = os.path.join(self.path, entry["file"])
+            if not os.path.exists(file_path):
+                del index[key]
+                self._save_index(index)
+                return None
+            entry["last_access"] = time.time()
+            self._save_index(index)
+        # Copy outside the lock, the other side of a diff may use the cache meanwhile
+        try:
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            shutil.copyfile(file_path, target_path)
+        except OSError as e:
+            # e.g. evicted by another put while copying
+            log.warning(f"Failed to copy cached export {file_path}: {e}")
+            return None
+        return target_path
+
+    def put(self, key, source_path, db_type=''):
+        """Store a copy of an export and evict least recently used entries."""
+        with _lock:
+            os.makedirs(self.path, exist_ok=True)
+            file_name = f"{key[:32]}{os.path.splitext(source_path)[1]}"
+            target = os.path.join(self.path, file_name)
+            # A real copy (no hard link): edits of the export must not change the cached entry
+            shutil.copyfile(source_path, target)
+            index = self._load_index()
+            now = time.time()
+            index[key] = {"file": file_name, "size": os.path.getsize(target), "created": now,
+                          "last_access": now, "db_type": db_type}
+            self._evict(index)
+            self._save_index(index)
+            return target
+
+    def invalidate(self, key=None):
+        """Remove one entry, or the whole cache when key is None. Returns the number of removed entries."""
+        with _lock:
+            index = self._load_index()
+            keys = [key] if key else list(index)
+            removed = 0
+            for k in keys:
+                entry = index.pop(k, None)
+                if entry:
+                    self._remove_file(entry)
+                    removed += 1
+            self._save_index(index)
+            log.info(f"Invalidated {removed} cached exports")
+            return removed
+
+    def _evict(self, index):
+        total = sum(entry["size"] for entry in index.values())
+        for k, entry in sorted(index.items(), key=lambda item: item[1]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            self._remove_file(entry)
+            total -= entry["size"]
+            del index[k]
+
+    def _remove_file(self, entry):
+        try:
+            os.remove(os.path.join(self.path, entry["file"]))
+        except OSError:
+            pass
@@ -0,0 +1,126 @@
+from decimal import Decimal
+from functools import lru_cache
+
+NULL_TEXT = '<<NULL>>'
+EMPTY_TEXT = '<<EMPTY>>'
+
+# Column kinds, decided once per query from cursor.description
+KIND_PLAIN = 'plain'      # int, bool, date, time, timestamp: str() never needs escaping
+KIND_NUMBER = 'number'    # float / Decimal (or int): trailing zeros stripped
+KIND_TEXT = 'text'        # str: '' marker, ',' escaped, line breaks replaced
+KIND_ANY = 'any'          # Unknown type: format_value
+
+ORACLE_KINDS = {
+    'DB_TYPE_NUMBER': KIND_NUMBER,
+    'DB_TYPE_BINARY_DOUBLE': KIND_NUMBER,
+    'DB_TYPE_BINARY_FLOAT': KIND_NUMBER,
+    'DB_TYPE_BINARY_INTEGER': KIND_PLAIN,
+    'DB_TYPE_BOOLEAN': KIND_PLAIN,
+    'DB_TYPE_DATE': KIND_PLAIN,
+    'DB_TYPE_TIMESTAMP': KIND_PLAIN,
+    'DB_TYPE_TIMESTAMP_TZ': KIND_PLAIN,
+    'DB_TYPE_TIMESTAMP_LTZ': KIND_PLAIN,
+    'DB_TYPE_VARCHAR': KIND_TEXT,
+    'DB_TYPE_NVARCHAR': KIND_TEXT,
+    'DB_TYPE_CHAR': KIND_TEXT,
+    'DB_TYPE_NCHAR': KIND_TEXT,
+    'DB_TYPE_LONG': KIND_TEXT,
+    'DB_TYPE_LONG_NVARCHAR': KIND_TEXT,
+    # CLOB / BLOB / RAW may be LOB locators or bytes depending on the fetch settings: KIND_ANY
+}
+
+POSTGRES_KINDS = {
+    16: KIND_PLAIN,     # bool
+    20: KIND_PLAIN,     # int8
+    21: KIND_PLAIN,     # int2
+    23: KIND_PLAIN,     # int4
+    26: KIND_PLAIN,     # oid
+    700: KIND_NUMBER,   # float4
+    701: KIND_NUMBER,   # float8
+    1700: KIND_NUMBER,  # numeric
+    1082: KIND_PLAIN,   # date
+    1083: KIND_PLAIN,   # time
+    1114: KIND_PLAIN,   # timestamp
+    1184: KIND_PLAIN,   # timestamptz
+    18: KIND_TEXT,      # char
+    19: KIND_TEXT,      # name
+    25: KIND_TEXT,      # text
+    1042: KIND_TEXT,    # bpchar
+    1043: KIND_TEXT,    # varchar
+}
+
+
+def format_value(item):
+    """
+    Convert one cell to its CSV text, with the same conventions as export_to_csv
+
+    Parameters:
+    item - Value fetched from the cursor
+
+    Returns:
+    str - <<NULL>> for None, <<EMPTY>> for '', numbers without trailing zeros, text with commas escaped
+    """
+    if item is None:
+        return NULL_TEXT
+    if item == '':
+        return EMPTY_TEXT
+    if isinstance(item, float) or isinstance(item, Decimal):
+        item = str(item)
+        if '.' in item:
+            item = item.rstrip('0').rstrip('.')
+        return item
+    return str(item).replace(',', '\\,').replace('\n', ' ').replace('\r', ' ')
+
+
+def column_kinds(description):
+    """
+    Kind of every column from cursor.description (oracledb DbType or psycopg2 type OID)
+
+    Returns:
+    tuple - One of the KIND_* values per column
+    """
+    kinds = []
+    for column in description:
+        type_code = column[1]
+        if isinstance(type_code, int):
+            kinds.append(POSTGRES_KINDS.get(type_code, KIND_ANY))
+        else:
+            kinds.append(ORACLE_KINDS.get(getattr(type_code, 'name', ''), KIND_ANY))
+    return tuple(kinds)
+
+
+def _expression(kind, i):
+    v = f"v{i}"
+    if kind == KIND_PLAIN:
+        return f"(NULL if ({v} := r[{i}]) is None else str({v}))"
+    if kind == KIND_NUMBER:
+        t = f"t{i}"
+        return (f"(NULL if ({v} := r[{i}]) is None else "
+                f"({t}.rstrip('0').rstrip('.') if '.' in ({t} := str({v})) else {t}))")
+    if kind == KIND_TEXT:
+        return (f"(NULL if ({v} := r[{i}]) is None else EMPTY if {v} == '' else "
+                f"{v}.replace(',', '\\\\,').replace('\\n', ' ').replace('\\r', ' '))")
+    return f"format_value(r[{i}])"
+
+
+@lru_cache(maxsize=64)
+def build_encoder(kinds):
+    """
+    Compile a function encoding a batch of rows into CSV lines for the given column kinds
+
+    The type checks of format_value are resolved once per query, so the generated loop only
+    has the None / '' tests and the conversion each column really needs.
+
+    Parameters:
+    kinds - Tuple of column kinds (see column_kinds)
+
+    Returns:
+    function(rows) -> str - The lines of the batch, each terminated by '\n'
+    """
+    if not kinds:
+        return lambda rows: '\n' * len(rows)
+    row_expr = "','.join((" + ", ".join(_expression(kind, i) for i, kind in enumerate(kinds)) + ",))"
+    source = f"def encode(rows):\n    return '\\n'.join([{row_expr} for r in rows]) + '\\n'\n"
+    namespace = {"NULL": NULL_TEXT, "EMPTY": EMPTY_TEXT, "format_value": format_value}
+    exec(compile(source, "<row_encoder>", "exec"), namespace)
+    return namespace["encode"]
@@ -0,0 +1,13 @@
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def latency_summary(values, digits=4):
+    """p50 / p95 / p99 / max of a list of durations (None values when the list is empty)."""
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    return {"p50": round(percentile(values, 50), digits), "p95": round(percentile(values, 95), digits),
+            "p99": round(percentile(values, 99), digits), "max": round(max(values), digits)}
@@ -0,0 +1,254 @@
+import os
+import json
+import time
+import shutil
+import tempfile
+import concurrent.futures
+from datetime import datetime
+
+from src.helper.csv_export import format_value
+from src.helper.csv_compare import diff_keyed_runs, key_getter, keyed_memory_mb, split_fields
+from src.helper.logger_helper import get_logger
+
+log = get_logger()
+
+batch_size = 10000       # Rows fetched per side per step
+max_diff_rows = 10000    # Differences written to the diff file (all are still counted)
+max_pending_rows = 500000  # Keyed rows waiting for their match in memory, beyond that the rest spills to disk
+
+
+class DiffWriter:
+    """Write differences to <work_dir>/query/diff/<name>_<timestamp>_diff.csv, the file is only created on the first difference."""
+
+    def __init__(self, work_dir, name, limit=max_diff_rows):
+        self.base_path = os.path.join(os.path.expandvars(work_dir), "query", "diff")
+        self.prefix = f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.limit = limit
+        self.written = 0
+        self.path = None
+        self._file = None
+
+    def write(self, kind, key, column, left_value, right_value):
+        if self.written >= self.limit:
+            return
+        if self._file is None:
+            os.makedirs(self.base_path, exist_ok=True)
+            self.path = os.path.join(self.base_path, f"{self.prefix}_diff.csv")
+            self._file = open(self.path, 'w', newline='', encoding='utf-8')
+            self._file.write('kind,key,column,left,right\n')
+        self._file.write(f"{kind},{key},{column},{left_value},{right_value}\n")
+        self.written += 1
+
+    def write_summary(self, summary):
+        os.makedirs(self.base_path, exist_ok=True)
+        summary["diff_file"] = self.path
+        summary["summary_file"] = os.path.join(self.base_path, f"{self.prefix}_summary.json")
+        with open(summary["summary_file"], 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+def _encode(rows):
+    return [tuple(format_value(item) for item in row) for row in rows]
+
+
+def _fields(line):
+    return tuple(split_fields(line.rstrip('\r\n')))
+
+
+class _SpilledDiff:
+    """Report the run pairs of diff_keyed_runs through the compare_rows / only_in of stream_compare."""
+
+    def __init__(self, compare_rows, only_in):
+        self.compare_rows = compare_rows
+        self.only_in = only_in
+
+    def compare(self, key, left_line, right_line):
+        self.compare_rows(key, _fields(left_line), _fields(right_line))
+
+    def only(self, kind, key, line):
+        self.only_in('left' if kind == 'removed' else 'right', key, _fields(line))
+
+
+def _headers(cursor):
+    return [str(col[0]).lower() for col in cursor.description]
+
+
+def _within_tolerance(left_value, right_value, tolerance):
+    try:
+        return abs(float(left_value) - float(right_value)) <= tolerance
+    except ValueError:
+        return False
+
+
+def stream_compare(left_cursor, right_cursor, work_dir, name='stream', key_columns=None, progress=None,
+                   numeric_tolerance=0):
+    """
+    Compare two executed cursors while they stream, without exporting them to CSV first
+
+    Parameters:
+    left_cursor, right_cursor - Cursors of executed SELECT queries
+    work_dir - Base path for the diff artifact (<work_dir>/query/diff)
+    name - Name used in the diff filenames
+    key_columns - Optional list of key column names; rows are matched by key (any order),
+                  otherwise rows are compared by position. When more than max_pending_rows keyed rows
+                  wait for their match, both sides are hash-partitioned to disk and diffed run by run
+    progress - Optional callback progress(rows, bytes_written, path)
+    numeric_tolerance - Values that both parse as numbers and differ by at most this much are equal
+
+    Returns:
+    dict - Summary: identical, left_rows, right_rows, changed, only_left, only_right, diff_file, summary_file
+    """
+    start_time = time.time()
+    left_headers = _headers(left_cursor)
+    right_headers = _headers(right_cursor)
+    summary = {
+        "left_rows": 0, "right_rows": 0, "changed": 0, "only_left": 0, "only_right": 0,
+        "headers_match": left_headers == right_headers,
+        "key_columns": key_columns or [],
+        "numeric_tolerance": numeric_tolerance,
+        "diff_file": None, "summary_file": None,
+    }
+
+    key_index = None
+    if key_columns:
+        missing = [k for k in key_columns if k.lower() not in left_headers or k.lower() not in right_headers]
+        if missing:
+            raise ValueError(f"Key columns not found in both results: {', '.join(missing)}")
+        key_index = ([left_headers.index(k.lower()) for k in key_columns],
+                     [right_headers.index(k.lower()) for k in key_columns])
+
+    writer = DiffWriter(work_dir, name)
+    columns = left_headers if len(left_headers) >= len(right_headers) else right_headers
+
+    def compare_rows(key, left_row, right_row):
+        if left_row == right_row:
+            return
+        differences = []
+        for i in range(max(len(left_row), len(right_row))):
+            left_value = left_row[i] if i < len(left_row) else ''
+            right_value = right_row[i] if i < len(right_row) else ''
+            if left_value != right_value and not (
+                    numeric_tolerance and _within_tolerance(left_value, right_value, numeric_tolerance)):
+                differences.append((columns[i], left_value, right_value))
+        if differences:
+            summary["changed"] += 1
+            for column, left_value, right_value in differences:
+                writer.write('changed', key, column, left_value, right_value)
+
+    def only_in(side, key, row):
+        summary[f"only_{side}"] += 1
+        row_text = '|'.join(row)
+        writer.write(f"only_{side}", key, '*', row_text if side == 'left' else '', row_text if side == 'right' else '')
+
+    # Matching rows waiting for the other side (keyed mode only): key -> [rows]
+    pending = {'left': {}, 'right': {}}
+    pending_rows = 0
+
+    def match_keyed(side, rows, indexes):
+        nonlocal pending_rows
+        other = 'right' if side == 'left' else 'left'
+        for row in rows:
+            key = '|'.join(row[i] for i in indexes)
+            waiting = pending[other].get(key)
+            if waiting:
+                other_row = waiting.pop(0)
+                pending_rows -= 1
+                if not waiting:
+                    del pending[other][key]
+                if side == 'left':
+                    compare_rows(key, row, other_row)
+                else:
+                    compare_rows(key, other_row, row)
+            else:
+                pending[side].setdefault(key, []).append(row)
+                pending_rows += 1
+
+    def spilled_lines(side, cursor, done):
+        # Waiting rows first, so rows with a repeated key are still matched in fetch order
+        for rows in pending[side].values():
+            for row in rows:
+                yield ','.join(row)
+        pending[side].clear()
+        while not done:
+            rows = _encode(cursor.fetchmany(batch_size))
+            done = not rows
+            summary[f"{side}_rows"] += len(rows)
+            if progress:
+                progress(summary["left_rows"] + summary["right_rows"], 0, writer.path or '')
+            for row in rows:
+                yield ','.join(row)
+
+    def spill(left_done, right_done):
+        """Partition the waiting rows and the rest of both cursors on disk, then diff the partitions."""
+        log.info(f"Stream compare {name}: {pending_rows} rows waiting for their key, spilling to disk")
+        os.makedirs(writer.base_path, exist_ok=True)
+        temp_dir = tempfile.mkdtemp(prefix="stream_compare_", dir=writer.base_path)
+        try:
+            getters = (key_getter(key_index[0]), key_getter(key_index[1]))
+            diff_keyed_runs(spilled_lines('left', left_cursor, left_done),
+                            spilled_lines('right', right_cursor, right_done),
+                            getters, _SpilledDiff(compare_rows, only_in), keyed_memory_mb * 1024 * 1024, temp_dir)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            left_done = right_done = False
+            left_buffer, right_buffer = [], []
+            while not (left_done and right_done):
+                # Fetch the next batch of both sides at the same time
+                left_future = executor.submit(left_cursor.fetchmany, batch_size) if not left_done else None
+                right_future = executor.submit(right_cursor.fetchmany, batch_size) if not right_done else None
+                left_rows = _encode(left_future.result()) if left_future else []
+                right_rows = _encode(right_future.result()) if right_future else []
+                left_done = left_done or not left_rows
+                right_done = right_done or not right_rows
+                summary["left_rows"] += len(left_rows)
+                summary["right_rows"] += len(right_rows)
+
+                if key_index:
+                    match_keyed('left', left_rows, key_index[0])
+                    match_keyed('right', right_rows, key_index[1])
+                    if pending_rows > max_pending_rows and not (left_done and right_done):
+                        spill(left_done, right_done)
+                        break
+                else:
+                    left_buffer.extend(left_rows)
+                    right_buffer.extend(right_rows)
+                    n = min(len(left_buffer), len(right_buffer))
+                    position = summary["left_rows"] - len(left_buffer)
+                    for i in range(n):
+                        compare_rows(position + i + 1, left_buffer[i], right_buffer[i])
+                    left_buffer, right_buffer = left_buffer[n:], right_buffer[n:]
+
+                if progress:
+                    progress(summary["left_rows"] + summary["right_rows"], 0, writer.path or '')
+
+            # Rows without a counterpart
+            if key_index:
+                for side in ('left', 'right'):
+                    for key, rows in pending[side].items():
+                        for row in rows:
+                            only_in(side, key, row)
+            else:
+                position = summary["left_rows"] - len(left_buffer)
+                for i, row in enumerate(left_buffer):
+                    only_in('left', position + i + 1, row)
+                position = summary["right_rows"] - len(right_buffer)
+                for i, row in enumerate(right_buffer):
+                    only_in('right', position + i + 1, row)
+    finally:
+        writer.close()
+
+    summary["identical"] = (summary["changed"] == 0 and summary["only_left"] == 0
+                            and summary["only_right"] == 0 and summary["headers_match"])
+    summary["elapsed"] = round(time.time() - start_time, 3)
+    if not summary["identical"]:
+        writer.write_summary(summary)
+    log.info(f"Stream compare {name}: {summary}")
+    return summary
@@ -0,0 +1,207 @@
+import os
+import threading
+import time
+import uuid
+import concurrent.futures
+from typing import Callable, Optional
+
+from .helper.logger_helper import get_logger
+
+log = get_logger()
+
+MAX_CONCURRENT_JOBS = 3
+PROGRESS_INTERVAL = 0.5  # Minimum seconds between two progress events of the same phase
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when it has been cancelled."""
+
+
+class Job:
+    """
+    State of one background job, shared between the worker thread and the UI bridge.
+
+    The job function receives the Job and uses it to report progress, register the connections
+    that cancel() must interrupt and the files to delete if the job does not finish.
+    """
+
+    def __init__(self, name: str, on_event: Optional[Callable[[dict], None]] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.status = "queued"
+        self.phase = ""
+        self.rows = 0
+        self.bytes_written = 0
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._on_event = on_event
+        self._cancel_event = threading.Event()
+        self._connections = []
+        self._files = set()
+        self._last_event = 0.0
+        self._lock = threading.Lock()
+
+    def is_cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self) -> None:
+        if self._cancel_event.is_set():
+            raise JobCancelled(f"Job {self.id} cancelled")
+
+    def register_connection(self, connection) -> None:
+        if connection:
+            with self._lock:
+                self._connections.append(connection)
+
+    def unregister_connection(self, connection) -> None:
+        """Forget a connection before it is closed or given back to its pool, so cancel() no longer touches it."""
+        with self._lock:
+            if connection in self._connections:
+                self._connections.remove(connection)
+
+    def register_file(self, path: str) -> None:
+        with self._lock:
+            self._files.add(path)
+
+    def report(self, phase: Optional[str] = None, rows: Optional[int] = None,
+               bytes_written: Optional[int] = None, force: bool = False) -> None:
+        """
+        Update progress and push an event, at most every PROGRESS_INTERVAL seconds unless the phase changes.
+
+        Raises:
+            JobCancelled if the job has been cancelled, so long loops stop at their next report.
+        """
+        changed_phase = phase is not None and phase != self.phase
+        if phase is not None:
+            self.phase = phase
+        if rows is not None:
+            self.rows = rows
+        if bytes_written is not None:
+            self.bytes_written = bytes_written
+        now = time.time()
+        if force or changed_phase or now - self._last_event >= PROGRESS_INTERVAL:
+            self._last_event = now
+            self._emit()
+        self.check_cancelled()
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+        # Hold the lock while cancelling: unregister_connection() waits, so a connection is never
+        # cancelled after it went back to the pool
+        with self._lock:
+            for connection in self._connections:
+                # oracledb and psycopg2 both interrupt the running statement with connection.cancel()
+                try:
+                    connection.cancel()
+                except Exception as e:
+                    log.warning(f"Failed to cancel running statement of job {self.id}: {e}")
+
+    def cleanup_files(self) -> None:
+        with self._lock:
+            files = list(self._files)
+            self._files.clear()
+        for path in files:
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+                    log.info(f"Removed partial file {path}")
+            except OSError as e:
+                log.warning(f"Failed to remove partial file {path}: {e}")
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "phase": self.phase,
+            "rows": self.rows,
+            "mb_written": round(self.bytes_written / (1024 * 1024), 2),
+            "result": self.result,
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+    def _emit(self) -> None:
+        if self._on_event:
+            try:
+                self._on_event(self.to_dict())
+            except Exception as e:
+                log.warning(f"Failed to push event of job {self.id}: {e}")
+
+
+class JobManager:
+    """
+    Run long operations (query diffs) on a bounded executor so the UI bridge call returns at once.
+    """
+
+    def __init__(self, max_workers: int = MAX_CONCURRENT_JOBS, on_event: Optional[Callable[[dict], None]] = None):
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._on_event = on_event
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, name: str, fn: Callable, *args, **kwargs) -> str:
+        """
+        Queue fn(*args, job=<Job>, **kwargs) and return the job id right away.
+        """
+        job = Job(name, self._on_event)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        job._emit()
+        return job.id
+
+    def cancel(self, job_id: str) -> bool:
+        job = self._jobs.get(job_id)
+        if not job or job.status not in ("queued", "running"):
+            return False
+        log.info(f"Cancelling job {job_id} ({job.name})")
+        job.cancel()
+        return True
+
+    def get(self, job_id: str) -> Optional[dict]:
+        job = self._jobs.get(job_id)
+        return job.to_dict() if job else None
+
+    def list(self) -> list:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.to_dict() for job in sorted(jobs, key=lambda j: j.created, reverse=True)]
+
+    def shutdown(self) -> None:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            if job.status in ("queued", "running"):
+                job.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job: Job, fn: Callable, args, kwargs) -> None:
+        if job.is_cancelled():
+            job.status = "cancelled"
+            job.finished = time.time()
+            job._emit()
+            return
+        job.status = "running"
+        job.started = time.time()
+        job._emit()
+        try:
+            job.result = fn(*args, job=job, **kwargs)
+            job.status = "cancelled" if job.is_cancelled() else "done"
+        except JobCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            log.error(f"Job {job.id} ({job.name}) failed: {str(e)}")
+            job.error = str(e)
+            job.status = "cancelled" if job.is_cancelled() else "failed"
+        finally:
+            if job.status != "done":
+                job.cleanup_files()
+            job.finished = time.time()
+            log.info(f"Job {job.id} ({job.name}) {job.status} in {job.finished - job.started:.3f} seconds")
+            job._emit()
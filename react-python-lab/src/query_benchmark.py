@@ -0,0 +1,265 @@
+import os
+import json
+import time
+from datetime import datetime
+from typing import Optional
+
+from .database import oracle_db, postgres_db
+from .database.pool_manager import get_pool_manager
+from .query_diff import connect_to_database, close_connection, is_modifying_query
+from .job_manager import Job
+from .helper.stats_helper import percentile
+from .helper.logger_helper import get_logger
+
+log = get_logger()
+
+DEFAULT_RUNS = 5
+DEFAULT_WARMUP = 1
+PG_FETCH_SIZE = 10000  # Rows per fetchmany (server-side cursor itersize) of the PostgreSQL runs
+
+ORACLE_BYTES_SQL = """
+    SELECT NVL(SUM(m.value), 0)
+    FROM v$mystat m JOIN v$statname n ON n.statistic# = m.statistic#
+    WHERE n.name = 'bytes sent via SQL*Net to client'"""
+
+
+def _oracle_bytes_sent(connection) -> Optional[int]:
+    """Bytes the session has sent to the client so far, None without access to v$mystat."""
+    cursor = connection.cursor()
+    try:
+        cursor.execute(ORACLE_BYTES_SQL)
+        return int(cursor.fetchone()[0])
+    except Exception:
+        return None
+    finally:
+        cursor.close()
+
+
+def _payload_bytes(rows: list) -> int:
+    """Approximate size of fetched rows as text (used when the database cannot tell the bytes sent)."""
+    return sum(len(str(value)) for row in rows for value in row if value is not None)
+
+
+def time_execution(connection: object, query: str, db_type: str, measure_payload: bool = False) -> dict:
+    """
+    Execute a query and fetch all its rows, timing each stage.
+
+    Args:
+        connection: Database connection.
+        query: SELECT query.
+        db_type: "Oracle" or "PostgreSQL".
+        measure_payload: Add up the text size of the rows (slows the fetch, only for runs that are not timed).
+
+    Returns:
+        Dict with execute, first_row and total seconds, rows, and bytes (None when unknown).
+    """
+    is_oracle = db_type.lower() == "oracle"
+    # A plain psycopg2 cursor transfers the whole result inside execute(), a server-side cursor
+    # streams it like the Oracle one so execute / first row / total mean the same on both sides
+    if is_oracle:
+        cursor = connection.cursor()
+    else:
+        cursor = postgres_db.ServerCursor(connection, PG_FETCH_SIZE, prefetch=False)
+    try:
+        if is_oracle:
+            if not get_pool_manager().owns(connection):
+                cursor.execute(oracle_db.NLS_SESSION_SQL)
+            oracle_db.configure_fetch(connection, cursor, query)
+            bytes_before = _oracle_bytes_sent(connection)
+        fetch_size = cursor.arraysize if is_oracle else PG_FETCH_SIZE
+        payload = 0
+
+        start_time = time.perf_counter()
+        cursor.execute(query)
+        execute_time = time.perf_counter() - start_time
+        batch = cursor.fetchmany(fetch_size)
+        first_row_time = time.perf_counter() - start_time
+        rows = 0
+        while batch:
+            rows += len(batch)
+            if measure_payload:
+                payload += _payload_bytes(batch)
+            batch = cursor.fetchmany(fetch_size)
+        total_time = time.perf_counter() - start_time
+
+        transferred = None
+        if is_oracle and bytes_before is not None:
+            bytes_after = _oracle_bytes_sent(connection)
+            transferred = bytes_after - bytes_before if bytes_after is not None else None
+        if transferred is None and measure_payload:
+            transferred = payload
+        return {"execute": execute_time, "first_row": first_row_time, "total": total_time,
+                "rows": rows, "bytes": transferred}
+    finally:
+        cursor.close()
+        if not is_oracle:
+            connection.rollback()
+
+
+def summarize_runs(runs: list) -> dict:
+    """p50 / p95 / max / min of the measured runs, with rows/s and bytes from the median run."""
+    totals = [r["total"] for r in runs]
+    first_rows = [r["first_row"] for r in runs]
+    p50 = percentile(totals, 50)
+    rows = runs[-1]["rows"]
+    byte_counts = [r["bytes"] for r in runs if r["bytes"] is not None]
+    return {
+        "runs": len(runs),
+        "rows": rows,
+        "p50": round(p50, 4),
+        "p95": round(percentile(totals, 95), 4),
+        "max": round(max(totals), 4),
+        "min": round(min(totals), 4),
+        "mean": round(sum(totals) / len(totals), 4),
+        "first_row_p50": round(percentile(first_rows, 50), 4),
+        "first_row_p95": round(percentile(first_rows, 95), 4),
+        "execute_p50": round(percentile([r["execute"] for r in runs], 50), 4),
+        "rows_per_second": round(rows / p50, 1) if p50 else None,
+        "bytes": percentile(byte_counts, 50) if byte_counts else None,
+    }
+
+
+def benchmark_queries(left_connection: object, left_query: str, left_db_type: str,
+                      right_connection: object, right_query: str, right_db_type: str,
+                      runs: int = DEFAULT_RUNS, warmup: int = DEFAULT_WARMUP, job: Optional[Job] = None) -> dict:
+    """
+    Time a query pair: warmup runs, then `runs` measured runs of each side with a full fetch.
+
+    The sides take turns (left, right, left, ...) rather than running all left runs first, so load
+    changes on the client or the network affect both equally; they never run at the same time.
+
+    Returns:
+        Benchmark dict: settings, left / right summaries (see summarize_runs) and their raw runs.
+    """
+    for query in (left_query, right_query):
+        if is_modifying_query(query):
+            raise ValueError("Only SELECT queries can be benchmarked")
+    runs = max(1, runs)
+    sides = {"left": (left_connection, left_query, left_db_type), "right": (right_connection, right_query, right_db_type)}
+    measured = {"left": [], "right": []}
+    payload = {"left": None, "right": None}
+
+    for i in range(warmup + runs):
+        is_warmup = i < warmup
+        for side, (connection, query, db_type) in sides.items():
+            if job:
+                job.report(phase=f"{'warmup' if is_warmup else 'run'} {i + 1 if is_warmup else i - warmup + 1}")
+            # The first warmup also measures the payload size for drivers that cannot report bytes
+            result = time_execution(connection, query, db_type, measure_payload=is_warmup and i == 0)
+            log.info(f"Benchmark {side} ({db_type}) {'warmup' if is_warmup else 'run'}: "
+                     f"{result['total']:.3f} seconds, {result['rows']} rows")
+            if is_warmup:
+                if i == 0:
+                    payload[side] = result["bytes"]
+            else:
+                if result["bytes"] is None:
+                    result["bytes"] = payload[side]
+                measured[side].append(result)
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "runs": runs,
+        "warmup": warmup,
+        "left": {"db_type": left_db_type, "query": left_query, **summarize_runs(measured["left"]),
+                 "raw": measured["left"]},
+        "right": {"db_type": right_db_type, "query": right_query, **summarize_runs(measured["right"]),
+                  "raw": measured["right"]},
+    }
+    left_p50, right_p50 = report["left"]["p50"], report["right"]["p50"]
+    report["ratio_p50"] = round(right_p50 / left_p50, 3) if left_p50 else None
+    if report["left"]["rows"] != report["right"]["rows"]:
+        log.warning(f"Benchmark row counts differ: {report['left']['rows']} vs {report['right']['rows']}")
+    return report
+
+
+def write_benchmark(work_dir: str, report: dict) -> str:
+    """Save a benchmark as JSON under <work_dir>/query/benchmarks, returns its path."""
+    directory = os.path.join(os.path.expandvars(work_dir), "query", "benchmarks")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def format_benchmark(report: dict) -> str:
+    """Side by side table of a benchmark."""
+    left, right = report["left"], report["right"]
+
+    def seconds(value):
+        return f"{value:.3f} s"
+
+    def number(value):
+        return "-" if value is None else f"{value:,.0f}"
+
+    rows = [
+        ("p50", seconds(left["p50"]), seconds(right["p50"])),
+        ("p95", seconds(left["p95"]), seconds(right["p95"])),
+        ("max", seconds(left["max"]), seconds(right["max"])),
+        ("first row p50", seconds(left["first_row_p50"]), seconds(right["first_row_p50"])),
+        ("rows", number(left["rows"]), number(right["rows"])),
+        ("rows/s", number(left["rows_per_second"]), number(right["rows_per_second"])),
+        ("bytes", number(left["bytes"]), number(right["bytes"])),
+    ]
+    lines = [f"Benchmark: {report['runs']} runs after {report['warmup']} warmup, full fetch",
+             f"{'':<15}{left['db_type']:>16}{right['db_type']:>16}"]
+    lines += [f"{name:<15}{a:>16}{b:>16}" for name, a, b in rows]
+    if report["ratio_p50"]:
+        lines.append(f"{right['db_type']} p50 is {report['ratio_p50']}x {left['db_type']}")
+    if left["rows"] != right["rows"]:
+        lines.append("Warning: the queries return different row counts")
+    return "\n".join(lines)
+
+
+def run(
+        left_db_type: str, left_use_conn_string: str, left_conn_string: str, left_username: str,
+        left_password: str, left_dsn: str, left_host: str, left_database: str, left_port: str, left_query: str,
+        right_db_type: str, right_use_conn_string: str, right_conn_string: str, right_username: str,
+        right_password: str, right_dsn: str, right_host: str, right_database: str, right_port: str, right_query: str,
+        work_dir: str,
+        runs: int = DEFAULT_RUNS,
+        warmup: int = DEFAULT_WARMUP,
+        use_pool: bool = False,
+        job: Optional[Job] = None
+) -> str:
+    """
+    Benchmark a query pair and save the result as JSON next to the query exports.
+
+    Args:
+        Connection arguments and queries as in query_diff.run.
+        work_dir: Working directory, the report goes to <work_dir>/query/benchmarks.
+        runs: Measured executions per side.
+        warmup: Executions per side before measuring (fill the caches, parse the statements).
+        use_pool: Reuse warm pooled connections.
+        job: Background job to report progress to; cancelling it interrupts the running query.
+
+    Returns:
+        Result table and report path, or an error message.
+    """
+    left_connection = connect_to_database(
+        left_db_type, left_use_conn_string.lower() == "true", left_conn_string, left_username,
+        left_password, left_dsn, left_host, left_database, left_port, use_pool)
+    right_connection = connect_to_database(
+        right_db_type, right_use_conn_string.lower() == "true", right_conn_string, right_username,
+        right_password, right_dsn, right_host, right_database, right_port, use_pool)
+    try:
+        if not left_connection or not right_connection:
+            failed = [db for db, conn in ((left_db_type, left_connection), (right_db_type, right_connection)) if not conn]
+            return "\n".join(f"{db}: Failed to connect to {db} database" for db in failed)
+        if job:
+            job.register_connection(left_connection)
+            job.register_connection(right_connection)
+        report = benchmark_queries(left_connection, left_query, left_db_type,
+                                   right_connection, right_query, right_db_type,
+                                   int(runs), int(warmup), job)
+    except Exception as e:
+        if job and job.is_cancelled():
+            return "Cancelled"
+        log.error(f"Benchmark failed: {str(e)}")
+        return f"Benchmark failed: {str(e)}"
+    finally:
+        close_connection(left_connection, job)
+        close_connection(right_connection, job)
+    path = write_benchmark(work_dir, report)
+    log.info(f"Benchmark saved to {path}")
+    return f"{format_benchmark(report)}\nReport: {path}"
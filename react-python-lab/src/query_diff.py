@@ -1,21 +1,33 @@
 import os
 import re
+import json
 import subprocess
 import time
 import concurrent.futures
-from typing import Tuple, Optional
+from datetime import datetime
+from typing import Callable, Tuple, Optional
 from .database import oracle_db, postgres_db
-from .helper.csv_export import export_to_csv
+from .database.pool_manager import get_pool_manager
+from .helper.csv_export import export_to_csv, export_copy_to_csv
+from .helper.csv_compare import compare_manifests, extract_differing_parts, parts_diff_dir
+from .helper.part_writer import MANIFEST_SUFFIX
+from .helper.result_cache import ResultCache, connection_fingerprint, data_version
+from .helper.stream_compare import stream_compare, batch_size as stream_compare_batch_size
+from .helper.plan_compare import compare_plans, format_plan_report, write_plan_report
 from .helper.logger_helper import get_logger
+from .job_manager import Job
 
 # Initialize logger
 log = get_logger()
 
+pg_copy_export = True  # Export PostgreSQL SELECTs with COPY ... TO STDOUT (rows formatted by the server)
+winmerge_max_parts = 3  # Differing part pairs opened in WinMerge for split exports
 
 
 def connect_to_database(db_type: str, use_conn_string: bool, conn_string: str = "",
                         username: str = "", password: str = "", dsn: str = "",
-                        host: str = "", database: str = "", port: str = "") -> Optional[object]:
+                        host: str = "", database: str = "", port: str = "",
+                        use_pool: bool = False) -> Optional[object]:
     """
     Connect to a database based on the provided type and connection details.
 
@@ -29,11 +41,15 @@ def connect_to_database(db_type: str, use_conn_string: bool, conn_string: str =
         host: Host for PostgreSQL.
         database: Database name for PostgreSQL.
         port: Port for PostgreSQL.
+        use_pool: If True, take a warm connection from the app-wide pool (give it back with close_connection).
 
     Returns:
         Database connection object or None if connection fails.
     """
     try:
+        if use_pool:
+            return connect_pooled(db_type, use_conn_string, conn_string, username, password,
+                                  dsn, host, database, port)
         if db_type.lower() == "oracle":
             if use_conn_string:
                 if not conn_string:
@@ -71,7 +87,53 @@ def connect_to_database(db_type: str, use_conn_string: bool, conn_string: str =
         return None
 
 
-def execute_query(connection: object, query: str, db_type: str) -> Tuple[bool, Optional[object], str]:
+def connect_pooled(db_type: str, use_conn_string: bool, conn_string: str = "",
+                   username: str = "", password: str = "", dsn: str = "",
+                   host: str = "", database: str = "", port: str = "") -> object:
+    """
+    Take a connection from the pool of the target, the pool is created on first use.
+
+    Raises:
+        ValueError if required connection details are missing, or the driver error if connecting fails.
+    """
+    if use_conn_string:
+        if not conn_string:
+            log.error(f"Connection string is required for {db_type}!")
+            raise ValueError("Connection string is required")
+        return get_pool_manager().acquire(db_type, conn_string)
+    if db_type.lower() == "oracle":
+        if not all([username, password]):
+            log.error("Username and password are required for Oracle!")
+            raise ValueError("Username and password are required")
+        return get_pool_manager().acquire(db_type, username=username, password=password, dsn=dsn)
+    if not all([host, database, username, password]):
+        log.error("All fields (host, database, username, password) are required for PostgreSQL!")
+        raise ValueError("All fields are required")
+    return get_pool_manager().acquire(db_type, host=host, database=database, username=username,
+                                      password=password, port=int(port) if port else 5432)
+
+
+def close_connection(connection: Optional[object], job: Optional[Job] = None) -> None:
+    """
+    Give a pooled connection back to its pool, or close a direct connection.
+
+    Args:
+        connection: Connection of connect_to_database.
+        job: Job the connection was registered with, it is unregistered first so cancelling
+            the job cannot interrupt the next user of the pooled connection.
+    """
+    if not connection:
+        return
+    if job:
+        job.unregister_connection(connection)
+    try:
+        get_pool_manager().release(connection)
+    except Exception as e:
+        log.error(f"Error closing connection: {str(e)}")
+
+
+def execute_query(connection: object, query: str, db_type: str,
+                  server_side: bool = False) -> Tuple[bool, Optional[object], str]:
     """
     Execute a SQL query on the provided database connection.
 
@@ -79,6 +141,8 @@ def execute_query(connection: object, query: str, db_type: str) -> Tuple[bool, O
         connection: Database connection object.
         query: SQL query to execute.
         db_type: Database type ("Oracle" or "PostgreSQL").
+        server_side: PostgreSQL only, stream the rows through a server-side cursor instead of
+            transferring the whole result in execute() (Oracle cursors always stream).
 
     Returns:
         Tuple (success, cursor): Success indicates if query executed successfully; cursor is the query cursor or None.
@@ -94,12 +158,16 @@ def execute_query(connection: object, query: str, db_type: str) -> Tuple[bool, O
         # if query.strip().upper().startswith("SELECT") \
         if not is_modifying_query(query):
             start_time = time.time()
+            if server_side and db_type.lower() == "postgresql":
+                cursor = postgres_db.ServerCursor(connection, stream_compare_batch_size)
+            else:
+                cursor = connection.cursor()
             if db_type.lower() == "oracle":
-                connection.lobprefetchsize = 1048576  # Prefetch up to 1MB of LOB data
-            cursor = connection.cursor()
-            if db_type.lower() == "oracle":
-                cursor.execute("ALTER SESSION SET NLS_DATE_FORMAT = 'YYYY-MM-DD' NLS_TIMESTAMP_FORMAT = 'YYYY-MM-DD HH24.MI.SSXFF' NLS_TIMESTAMP_TZ_FORMAT = 'YYYY-MM-DD HH24.MI.SSXFF TZR'")
-                log.info(f"Executed SET NLS_DATE_FORMAT query.")
+                # Pooled Oracle sessions already ran the NLS settings in their session callback
+                if not get_pool_manager().owns(connection):
+                    cursor.execute(oracle_db.NLS_SESSION_SQL)
+                    log.info(f"Executed SET NLS_DATE_FORMAT query.")
+                oracle_db.configure_fetch(connection, cursor, query)
             # cursor.execute(query.rstrip(";"))
             cursor.execute(query)
             elapsed_time = time.time() - start_time
@@ -113,13 +181,16 @@ def execute_query(connection: object, query: str, db_type: str) -> Tuple[bool, O
         return False, None, f"{str(e)}"
 
 
-def export_query_results(cursor: Optional[object], db_type: str, work_dir: str) -> Tuple[bool, str]:
+def export_query_results(cursor: Optional[object], db_type: str, work_dir: str,
+                         progress: Optional[Callable] = None, parts: Optional[dict] = None) -> Tuple[bool, str]:
     """
     Export query results to a CSV file.
 
     Args:
         cursor: Database cursor with query results.
         db_type: Database type ("Oracle" or "PostgreSQL").
+        progress: Optional callback progress(rows, bytes_written, path) called while exporting.
+        parts: Optional PartWriter options; SELECT results are written as compressed parts plus a manifest.
 
     Returns:
         Tuple (success, result): Success indicates if export was successful; result is CSV path or error message.
@@ -129,9 +200,233 @@ def export_query_results(cursor: Optional[object], db_type: str, work_dir: str)
         return False, f"No results from {db_type} query to export!"
     if cursor.description:
         headers = [str(col[0]).lower() for col in cursor.description] if cursor else None
-        return export_to_csv(None, cursor, work_dir, headers, db_type)
+        start_time = time.time()
+        result = export_to_csv(None, cursor, work_dir, headers, db_type, progress, parts=parts)
+        if db_type.lower() == "oracle" and result[0]:
+            oracle_db.log_fetch_throughput(cursor, time.time() - start_time)
+        return result
     else:
-        return export_to_csv(None, cursor, work_dir, None, db_type)
+        return export_to_csv(None, cursor, work_dir, None, db_type, progress)
+
+
+def export_postgres_copy(connection: object, query: str, work_dir: str,
+                         progress: Optional[Callable] = None) -> Tuple[bool, str]:
+    """
+    Export a PostgreSQL SELECT through COPY ... TO STDOUT, the server formats each row with the
+    <<NULL>>/<<EMPTY>> conventions of export_to_csv.
+
+    Raises:
+        ValueError / psycopg2 error if the query cannot be described (the caller falls back to export_query_results).
+    """
+    query = query.strip().rstrip(";")
+    connection.set_client_encoding("UTF8")
+    description = postgres_db.describe_query(connection, query)
+    copy_sql = postgres_db.build_copy_query(query, description)
+    headers = [str(col[0]).lower() for col in description]
+    cursor = connection.cursor()
+    try:
+        start_time = time.time()
+        result = export_copy_to_csv(cursor, copy_sql, work_dir, headers, "PostgreSQL", progress)
+        log.info(f"Executed and exported PostgreSQL query by COPY: \n{query}\n in {time.time() - start_time:.3f} seconds.")
+        return result
+    finally:
+        cursor.close()
+
+
+def execute_and_export(connection: object, query: str, db_type: str, work_dir: str,
+                       progress: Optional[Callable] = None, parts: Optional[dict] = None) -> Tuple[bool, str]:
+    """
+    Execute a query and export its results to CSV, through COPY for PostgreSQL SELECTs
+    (split exports always go through the cursor).
+
+    Returns:
+        Tuple (success, result): result is CSV (or manifest) path or error message.
+    """
+    if db_type.lower() == "postgresql" and pg_copy_export and parts is None \
+            and query and not is_modifying_query(query):
+        try:
+            return export_postgres_copy(connection, query, work_dir, progress)
+        except Exception as e:
+            # e.g. duplicate column names; the cursor path reports real query errors
+            log.warning(f"COPY export not possible, using cursor export: {str(e)}")
+            connection.rollback()
+    success, cursor, message = execute_query(connection, query, db_type)
+    if not success:
+        return False, message
+    return export_query_results(cursor, db_type, work_dir, progress, parts)
+
+
+def cached_export(connection: object, query: str, db_type: str, work_dir: str, fingerprint: str,
+                  progress: Optional[Callable] = None) -> Tuple[bool, str]:
+    """
+    Execute and export a query, reusing the cached export when the query, the connection target and
+    the data version of the referenced tables are unchanged.
+
+    Args:
+        connection: Database connection object.
+        query: SQL query to execute.
+        db_type: Database type ("Oracle" or "PostgreSQL").
+        work_dir: Working directory, the cache lives in <work_dir>/query/cache.
+        fingerprint: Connection fingerprint (see result_cache.connection_fingerprint).
+        progress: Optional callback progress(rows, bytes_written, path) called while exporting.
+
+    Returns:
+        Tuple (success, result): result is CSV path or error message.
+    """
+    cache = ResultCache(work_dir)
+    version = data_version(connection, db_type, query)
+    key = ResultCache.make_key(db_type, fingerprint, query, version) if version else None
+    if key:
+        # A fresh copy named like the exports, the cache file itself stays private to the cache
+        target_path = os.path.join(os.path.expandvars(work_dir), "query", db_type,
+                                   f"{db_type}_query_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+        cached_path = cache.get(key, target_path)
+        if cached_path:
+            log.info(f"Reusing cached {db_type} export: {cached_path}")
+            return True, cached_path
+
+    is_success, result = execute_and_export(connection, query, db_type, work_dir, progress)
+    # DBMS_OUTPUT blocks are not cached
+    if is_success and key and re.match(r'\s*(SELECT|WITH)\b', query, re.IGNORECASE):
+        try:
+            cache.put(key, result, db_type)
+        except OSError as e:
+            log.warning(f"Failed to cache {db_type} export: {str(e)}")
+    return is_success, result
+
+
+def record_query_history(work_dir: str, left_db_type: str, left_query: str,
+                         right_db_type: str, right_query: str) -> None:
+    """
+    Append the query pair to <work_dir>/query/history/query_history.jsonl (source of workload replays).
+    """
+    try:
+        directory = os.path.join(os.path.expandvars(work_dir), "query", "history")
+        os.makedirs(directory, exist_ok=True)
+        entry = {"time": datetime.now().isoformat(timespec="seconds"),
+                 "left_db_type": left_db_type, "left_query": left_query,
+                 "right_db_type": right_db_type, "right_query": right_query}
+        with open(os.path.join(directory, "query_history.jsonl"), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    except OSError as e:
+        log.warning(f"Failed to record query history: {str(e)}")
+
+
+def clear_query_cache(work_dir: str) -> int:
+    """Remove every cached export of the work directory, returns the number of removed entries."""
+    return ResultCache(work_dir).invalidate()
+
+
+def stream_compare_queries(left_connection: object, left_query: str, left_db_type: str,
+                           right_connection: object, right_query: str, right_db_type: str,
+                           work_dir: str, key_columns: Optional[list] = None,
+                           progress: Optional[Callable] = None, numeric_tolerance: float = 0) -> dict:
+    """
+    Execute both queries concurrently and compare their cursors while streaming.
+
+    Returns:
+        Summary dict of stream_compare, plus execute_time (seconds until both queries returned).
+
+    Raises:
+        ValueError if a query fails or is not a SELECT.
+    """
+    start_time = time.time()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        left_future = executor.submit(execute_query, left_connection, left_query, left_db_type, True)
+        right_future = executor.submit(execute_query, right_connection, right_query, right_db_type, True)
+        left_success, left_cursor, left_message = left_future.result()
+        right_success, right_cursor, right_message = right_future.result()
+    try:
+        errors = []
+        if not left_success:
+            errors.append(f"{left_db_type}: {left_message}")
+        if not right_success:
+            errors.append(f"{right_db_type}: {right_message}")
+        if not errors and not (left_cursor.description and right_cursor.description):
+            errors.append("Stream compare only supports SELECT queries")
+        if errors:
+            raise ValueError("\n".join(errors))
+
+        execute_time = time.time() - start_time
+        summary = stream_compare(left_cursor, right_cursor, work_dir, f"{left_db_type}_{right_db_type}",
+                                 key_columns, progress, numeric_tolerance)
+        summary["execute_time"] = round(execute_time, 3)
+        return summary
+    finally:
+        # Server-side cursors WITH HOLD outlive the transaction, close them before the session is reused
+        for cursor in (left_cursor, right_cursor):
+            if cursor is not None:
+                cursor.close()
+
+
+def compare_query_streams(left_connection: object, left_query: str, left_db_type: str,
+                          right_connection: object, right_query: str, right_db_type: str,
+                          work_dir: str, key_columns: Optional[list] = None,
+                          progress: Optional[Callable] = None) -> Tuple[bool, str]:
+    """
+    Execute both queries and compare their cursors while streaming, without writing the results to CSV.
+
+    Args:
+        left_connection, right_connection: Database connection objects.
+        left_query, right_query: SQL queries to execute.
+        left_db_type, right_db_type: Database types ("Oracle" or "PostgreSQL").
+        work_dir: Working directory, differences go to <work_dir>/query/diff.
+        key_columns: Key column names to match rows by; rows are compared by position when empty.
+        progress: Optional callback progress(rows, bytes_written, path).
+
+    Returns:
+        Tuple (success, result): result is the comparison message or an error message.
+    """
+    try:
+        summary = stream_compare_queries(left_connection, left_query, left_db_type,
+                                         right_connection, right_query, right_db_type,
+                                         work_dir, key_columns, progress)
+    except ValueError as e:
+        return False, str(e)
+    except Exception as e:
+        log.error(f"Failed to compare query results: {str(e)}")
+        return False, f"Failed to compare query results: {str(e)}"
+
+    counts = f"{summary['left_rows']} vs {summary['right_rows']} rows"
+    if summary["identical"]:
+        return True, f"Results are identical ({counts}). Time {summary['elapsed']:.3f} seconds"
+    message = (f"Results are different ({counts}): {summary['changed']} changed, "
+               f"{summary['only_left']} only in {left_db_type}, {summary['only_right']} only in {right_db_type}.")
+    if not summary["headers_match"]:
+        message += " Column names differ."
+    if summary["diff_file"]:
+        message += f"\nDiff: {summary['diff_file']}"
+    message += f"\nSummary: {summary['summary_file']}"
+    return True, message
+
+
+def capture_plans(left_connection: object, left_query: str, left_db_type: str,
+                  right_connection: object, right_query: str, right_db_type: str, work_dir: str) -> str:
+    """
+    Capture the actual execution plan of both queries (in parallel), compare them and save the report.
+
+    Returns:
+        Plan comparison text (see plan_compare.format_plan_report), or why it could not be captured.
+    """
+    def capture(connection, query, db_type):
+        if is_modifying_query(query):
+            raise ValueError("Plans are only captured for SELECT queries")
+        database = oracle_db if db_type.lower() == "oracle" else postgres_db
+        return database.capture_plan(connection, query)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        left_future = executor.submit(capture, left_connection, left_query, left_db_type)
+        right_future = executor.submit(capture, right_connection, right_query, right_db_type)
+    errors = []
+    for db_type, future in ((left_db_type, left_future), (right_db_type, right_future)):
+        if future.exception():
+            log.error(f"Failed to capture {db_type} plan: {str(future.exception())}")
+            errors.append(f"{db_type}: plan not captured: {str(future.exception())}")
+    if errors:
+        return "\n".join(errors)
+    report = compare_plans(left_future.result(), right_future.result())
+    path = write_plan_report(work_dir, report)
+    return f"{format_plan_report(report)}\nPlan report: {path}"
 
 
 def run(
@@ -140,7 +435,14 @@ def run(
         right_db_type: str, right_use_conn_string: str, right_conn_string: str, right_username: str,
         right_password: str, right_dsn: str, right_host: str, right_database: str, right_port: str, right_query: str,
         work_dir: str,
-        winmerge_path: str = ""
+        winmerge_path: str = "",
+        use_pool: bool = False,
+        job: Optional[Job] = None,
+        compare_mode: str = "export",
+        key_columns: str = "",
+        use_cache: bool = False,
+        split_export: bool = False,
+        capture_plan: bool = False
 ) -> str:
     """
     Compare query results from two databases and optionally launch WinMerge for visual comparison.
@@ -168,6 +470,18 @@ def run(
         right_query: SQL query for target database.
         work_dir: Working directory.
         winmerge_path: Path to WinMerge executable (optional).
+        use_pool: Reuse warm pooled connections instead of connecting and closing on every call.
+        job: Background job (see job_manager) to report progress to; cancelling it interrupts the queries
+             and removes partial CSV files.
+        compare_mode: "export" writes both results to CSV (and launches WinMerge),
+                      "stream" compares the cursors while fetching and only writes the differences.
+        key_columns: Comma separated key columns for "stream" mode; rows are compared by position when empty.
+        use_cache: Reuse the cached export of a side when its query, connection and data version did not change
+                   ("export" mode only).
+        split_export: Write each side as compressed part files with a manifest ("export" mode only, not cached);
+                      only the parts whose hashes differ are opened in WinMerge.
+        capture_plan: Run both queries once more under their plan statistics (GATHER_PLAN_STATISTICS /
+                      EXPLAIN ANALYZE) and append the plan comparison to the result.
 
     Returns:
         Comparison result as a string or error message if comparison fails.
@@ -178,14 +492,17 @@ def run(
     left_use_conn = left_use_conn_string.lower() == "true"
     right_use_conn = right_use_conn_string.lower() == "true"
 
+    if job:
+        job.report(phase="connecting")
+
     # Connect to databases
     left_connection = connect_to_database(
         left_db_type, left_use_conn, left_conn_string, left_username,
-        left_password, left_dsn, left_host, left_database, left_port
+        left_password, left_dsn, left_host, left_database, left_port, use_pool
     )
     right_connection = connect_to_database(
         right_db_type, right_use_conn, right_conn_string, right_username,
-        right_password, right_dsn, right_host, right_database, right_port
+        right_password, right_dsn, right_host, right_database, right_port, use_pool
     )
 
     if not left_connection:
@@ -193,51 +510,110 @@ def run(
     if not right_connection:
         errors[right_db_type] = f"Failed to connect to {right_db_type} database"
     if errors:
+        close_connection(left_connection)
+        close_connection(right_connection)
         return "\n".join(f"{db}: {msg}" for db, msg in errors.items())
 
+    record_query_history(work_dir, left_db_type, left_query, right_db_type, right_query)
+    side_progress = {}
+
+    def export_progress(side: str) -> Optional[Callable]:
+        if not job:
+            return None
+
+        def progress(rows: int, bytes_written: int, path: str):
+            if path:
+                job.register_file(path)
+            side_progress[side] = (rows, bytes_written)
+            job.report(phase="exporting",
+                       rows=sum(r for r, _ in side_progress.values()),
+                       bytes_written=sum(b for _, b in side_progress.values()))
+        return progress
+
+    if job:
+        try:
+            # cancel() interrupts the running statements through these connections
+            job.register_connection(left_connection)
+            job.register_connection(right_connection)
+            job.report(phase="executing")
+        except BaseException:
+            # Cancelled while connecting: give the (pooled) connections back before leaving
+            close_connection(left_connection, job)
+            close_connection(right_connection, job)
+            raise
+
+    plan_text = ""
+
+    def plans() -> str:
+        if job:
+            job.report(phase="capturing plans")
+        return capture_plans(left_connection, left_query, left_db_type,
+                             right_connection, right_query, right_db_type, work_dir)
+
+    def with_plan(message: str) -> str:
+        return f"{message}\n\n{plan_text}" if plan_text else message
+
+    if compare_mode == "stream":
+        try:
+            keys = [k.strip() for k in key_columns.split(",") if k.strip()]
+            success, message = compare_query_streams(
+                left_connection, left_query, left_db_type,
+                right_connection, right_query, right_db_type,
+                work_dir, keys, export_progress("stream"))
+            if capture_plan and not (job and job.is_cancelled()):
+                plan_text = plans()
+        finally:
+            close_connection(left_connection, job)
+            close_connection(right_connection, job)
+        if job and job.is_cancelled():
+            return "Cancelled"
+        return with_plan(message)
+
     # Execute queries and export results concurrently
     left_csv_path = ""
     right_csv_path = ""
-    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
-        def execute_and_export_left():
-            success, cursor, message = execute_query(left_connection, left_query, left_db_type)
-            if success:
-                is_success, result = export_query_results(cursor, left_db_type, work_dir)
-                if not is_success:
-                    errors[left_db_type] = result
-                    return ""
-                return result
-            errors[left_db_type] = errors.get(left_db_type, message)
-            return ""
-
-        def execute_and_export_right():
-            success, cursor, message = execute_query(right_connection, right_query, right_db_type)
-            if success:
-                is_success, result = export_query_results(cursor, right_db_type, work_dir)
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            parts = {} if split_export else None
+
+            def export_side(side, connection, query, db_type, fingerprint):
+                if use_cache and not split_export:
+                    is_success, result = cached_export(connection, query, db_type, work_dir, fingerprint,
+                                                       export_progress(side))
+                else:
+                    is_success, result = execute_and_export(connection, query, db_type, work_dir,
+                                                            export_progress(side), parts)
                 if not is_success:
-                    errors[right_db_type] = result
+                    errors[db_type] = errors.get(db_type, result)
                     return ""
                 return result
-            errors[right_db_type] = errors.get(right_db_type, message)
-            return ""
-
-        future1 = executor.submit(execute_and_export_left)
-        future2 = executor.submit(execute_and_export_right)
-        concurrent.futures.wait([future1, future2])
-
-        for future in [future1, future2]:
-            if future.exception():
-                log.error(str(future.exception()))
-                raise future.exception()
 
-        left_csv_path = future1.result()
-        right_csv_path = future2.result()
-
-    # Close connections
-    if left_connection:
-        left_connection.close()
-    if right_connection:
-        right_connection.close()
+            future1 = executor.submit(
+                export_side, "left", left_connection, left_query, left_db_type,
+                connection_fingerprint(left_db_type, left_conn_string if left_use_conn else "", left_username,
+                                       left_dsn, left_host, left_database, left_port))
+            future2 = executor.submit(
+                export_side, "right", right_connection, right_query, right_db_type,
+                connection_fingerprint(right_db_type, right_conn_string if right_use_conn else "", right_username,
+                                       right_dsn, right_host, right_database, right_port))
+            concurrent.futures.wait([future1, future2])
+
+            for future in [future1, future2]:
+                if future.exception():
+                    log.error(str(future.exception()))
+                    raise future.exception()
+
+            left_csv_path = future1.result()
+            right_csv_path = future2.result()
+        if capture_plan and not errors and not (job and job.is_cancelled()):
+            plan_text = plans()
+    finally:
+        # Close connections (pooled connections go back to their pool)
+        close_connection(left_connection, job)
+        close_connection(right_connection, job)
+
+    if job and job.is_cancelled():
+        return "Cancelled"
 
     # Check for errors or empty results
     if errors:
@@ -263,14 +639,36 @@ def run(
             log.error("One or both CSV files not found")
             return f"One or both CSV files not found"
         try:
+            if left_csv_path.endswith(MANIFEST_SUFFIX) and right_csv_path.endswith(MANIFEST_SUFFIX):
+                return with_plan(open_differing_parts(winmerge_path, left_csv_path, right_csv_path))
             log.info("Launching WinMerge with the two CSV files")
             subprocess.Popen([winmerge_path, left_csv_path, right_csv_path], shell=False)
-            return f"WinMerge launched!"
+            return with_plan(f"WinMerge launched!")
         except (subprocess.CalledProcessError, FileNotFoundError) as e:
             log.error(f"Failed to launch WinMerge: {str(e)}")
             return f"Failed to launch WinMerge: {str(e)}"
 
-    return "Not launch WinMerge"
+    return with_plan("Not launch WinMerge")
+
+
+def open_differing_parts(winmerge_path: str, left_manifest: str, right_manifest: str) -> str:
+    """
+    Compare two split exports by their part hashes and open only the differing parts in WinMerge.
+
+    Returns:
+        Result message.
+    """
+    comparison = compare_manifests(left_manifest, right_manifest)
+    if comparison["identical"]:
+        return f"Results are identical ({comparison['parts']} parts, {comparison['left_rows']} rows)"
+    extracted = extract_differing_parts(comparison, parts_diff_dir(left_manifest), winmerge_max_parts)
+    for index, left_csv, right_csv in extracted:
+        log.info(f"Launching WinMerge with part {index}")
+        subprocess.Popen([winmerge_path, left_csv, right_csv], shell=False)
+    message = f"{len(comparison['differing'])} of {comparison['parts']} parts differ"
+    if not comparison["headers_match"]:
+        message += " (headers are different)"
+    return f"{message}, WinMerge launched for parts {', '.join(str(i) for i, _, _ in extracted)}"
 
 
 def is_modifying_query(query: str) -> bool:
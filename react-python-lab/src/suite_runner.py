@@ -0,0 +1,168 @@
+import os
+import json
+import time
+import threading
+import concurrent.futures
+from datetime import datetime
+from typing import Optional
+
+from .query_diff import connect_to_database, close_connection, stream_compare_queries
+from .helper.logger_helper import get_logger
+
+log = get_logger()
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_TARGET_CONCURRENCY = 2  # Concurrent pairs per connection profile unless the profile sets max_concurrency
+
+
+def load_suite(path: str) -> dict:
+    """
+    Load and validate a suite file.
+
+    Suite file (JSON):
+
+    {
+      "work_dir": "/data/regression",
+      "max_workers": 8,
+      "profiles": {
+        "ora": {"db_type": "Oracle", "conn_string": "scott/${ORA_PASSWORD}@db:1521/orcl", "max_concurrency": 2},
+        "pg": {"db_type": "PostgreSQL", "conn_string": "postgresql://app:${PG_PASSWORD}@pg:5432/app", "max_concurrency": 4}
+      },
+      "defaults": {"left": "ora", "right": "pg", "key_columns": [], "numeric_tolerance": 0},
+      "pairs": [
+        {"name": "customers", "left_query": "SELECT ...", "right_query": "SELECT ...", "key_columns": ["id"]}
+      ]
+    }
+
+    Profiles may also use username/password/dsn (Oracle) or host/database/username/password/port (PostgreSQL).
+    ${VAR} references are expanded from the environment so passwords stay out of the suite file.
+
+    Raises:
+        ValueError if a pair references an unknown profile or misses a query.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        suite = json.load(f)
+    profiles = suite.get("profiles", {})
+    defaults = suite.get("defaults", {})
+    names = set()
+    for index, pair in enumerate(suite.get("pairs", [])):
+        pair.setdefault("name", f"pair_{index + 1}")
+        if pair["name"] in names:
+            raise ValueError(f"Duplicate pair name: {pair['name']}")
+        names.add(pair["name"])
+        for side in ("left", "right"):
+            profile = pair.get(side, defaults.get(side))
+            if profile not in profiles:
+                raise ValueError(f"Pair {pair['name']}: unknown {side} profile {profile!r}")
+            if not pair.get(f"{side}_query"):
+                raise ValueError(f"Pair {pair['name']}: {side}_query is required")
+    return suite
+
+
+def connect_profile(profile: dict):
+    values = {k: os.path.expandvars(str(v)) for k, v in profile.items() if k != "max_concurrency"}
+    connection = connect_to_database(
+        values.get("db_type", ""), bool(values.get("conn_string")), values.get("conn_string", ""),
+        values.get("username", ""), values.get("password", ""), values.get("dsn", ""),
+        values.get("host", ""), values.get("database", ""), values.get("port", ""))
+    if not connection:
+        raise ConnectionError(f"Failed to connect to {values.get('db_type')} database")
+    return connection
+
+
+def run_pair(pair: dict, suite: dict, work_dir: str, semaphores: dict) -> dict:
+    """
+    Run one query pair as a stream compare and return its report entry.
+    """
+    defaults = suite.get("defaults", {})
+    profiles = suite["profiles"]
+    left_name = pair.get("left", defaults.get("left"))
+    right_name = pair.get("right", defaults.get("right"))
+    key_columns = pair.get("key_columns", defaults.get("key_columns", []))
+    if isinstance(key_columns, str):
+        key_columns = [k.strip() for k in key_columns.split(",") if k.strip()]
+    tolerance = pair.get("numeric_tolerance", defaults.get("numeric_tolerance", 0))
+
+    result = {"name": pair["name"], "left": left_name, "right": right_name, "status": "error",
+              "wait_time": 0, "connect_time": 0, "execute_time": 0, "compare_time": 0, "elapsed": 0}
+    start_time = time.time()
+    # Always take the semaphores in the same order so two pairs never wait on each other
+    targets = sorted({left_name, right_name})
+    for target in targets:
+        semaphores[target].acquire()
+    left_connection = right_connection = None
+    try:
+        result["wait_time"] = round(time.time() - start_time, 3)
+        connect_start = time.time()
+        left_connection = connect_profile(profiles[left_name])
+        right_connection = connect_profile(profiles[right_name])
+        result["connect_time"] = round(time.time() - connect_start, 3)
+
+        compare_start = time.time()
+        summary = stream_compare_queries(
+            left_connection, pair["left_query"], profiles[left_name]["db_type"],
+            right_connection, pair["right_query"], profiles[right_name]["db_type"],
+            os.path.join(work_dir, pair["name"]), key_columns, None, tolerance)
+        result["execute_time"] = summary.pop("execute_time")
+        result["compare_time"] = round(time.time() - compare_start - result["execute_time"], 3)
+        result["status"] = "identical" if summary["identical"] else "different"
+        result["summary"] = summary
+    except Exception as e:
+        log.error(f"Pair {pair['name']} failed: {str(e)}")
+        result["error"] = str(e)
+    finally:
+        close_connection(left_connection)
+        close_connection(right_connection)
+        for target in targets:
+            semaphores[target].release()
+        result["elapsed"] = round(time.time() - start_time, 3)
+    log.info(f"Pair {pair['name']}: {result['status']} in {result['elapsed']:.3f} seconds")
+    return result
+
+
+def run_suite(suite: dict, work_dir: Optional[str] = None, max_workers: Optional[int] = None,
+              only: Optional[list] = None) -> dict:
+    """
+    Run every pair of a suite on a thread pool, limiting concurrent pairs per connection profile.
+
+    Args:
+        suite: Suite dict (see load_suite).
+        work_dir: Output directory, overrides suite["work_dir"].
+        max_workers: Pairs running at the same time, overrides suite["max_workers"].
+        only: Optional list of pair names to run.
+
+    Returns:
+        Report dict with totals and one entry per pair, in suite order.
+    """
+    work_dir = os.path.expandvars(work_dir or suite.get("work_dir", "."))
+    max_workers = max_workers or suite.get("max_workers", DEFAULT_MAX_WORKERS)
+    pairs = [p for p in suite.get("pairs", []) if not only or p["name"] in only]
+    semaphores = {name: threading.BoundedSemaphore(profile.get("max_concurrency", DEFAULT_TARGET_CONCURRENCY))
+                  for name, profile in suite["profiles"].items()}
+
+    started = datetime.now()
+    start_time = time.time()
+    log.info(f"Running {len(pairs)} query pairs with {max_workers} workers")
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pair") as executor:
+        futures = [executor.submit(run_pair, pair, suite, work_dir, semaphores) for pair in pairs]
+        results = [future.result() for future in futures]
+
+    totals = {status: sum(1 for r in results if r["status"] == status)
+              for status in ("identical", "different", "error")}
+    return {
+        "started": started.isoformat(timespec="seconds"),
+        "finished": datetime.now().isoformat(timespec="seconds"),
+        "elapsed": round(time.time() - start_time, 3),
+        "work_dir": work_dir,
+        "max_workers": max_workers,
+        "total": len(results),
+        **totals,
+        "pairs": results,
+    }
+
+
+def write_report(report: dict, path: str) -> str:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+    return path
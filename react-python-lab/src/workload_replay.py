@@ -0,0 +1,295 @@
+import os
+import re
+import json
+import time
+import random
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+
+from .query_diff import close_connection, is_modifying_query
+from .suite_runner import connect_profile
+from .helper.result_cache import normalize_query
+from .helper.stats_helper import latency_summary
+from .helper.logger_helper import get_logger
+
+log = get_logger()
+
+DEFAULT_SESSIONS = 8
+DEFAULT_DURATION = 60          # Seconds of replay per database
+FETCH_SIZE = 1000              # Rows per fetchmany, every result is fully fetched
+MAX_ERROR_SAMPLES = 3          # Error messages kept per query
+
+
+def _item(name: str, postgres_query: str, oracle_query: str = "", weight: float = 1) -> dict:
+    return {"name": name, "postgres_query": postgres_query, "oracle_query": oracle_query or "",
+            "weight": float(weight)}
+
+
+def workload_from_suite(suite: dict) -> list:
+    """One workload query per suite pair, the PostgreSQL / Oracle query picked by the profile db_type."""
+    defaults = suite.get("defaults", {})
+    items = []
+    for pair in suite.get("pairs", []):
+        queries = {}
+        for side in ("left", "right"):
+            profile = suite["profiles"][pair.get(side, defaults.get(side))]
+            queries[profile["db_type"].lower()] = pair[f"{side}_query"]
+        if "postgresql" in queries:
+            items.append(_item(pair["name"], queries["postgresql"], queries.get("oracle", ""),
+                               pair.get("weight", 1)))
+    return items
+
+
+def workload_from_history(work_dir: str) -> list:
+    """
+    Query pairs recorded by query_diff.run, weighted by how often each PostgreSQL query was run.
+    """
+    path = os.path.join(os.path.expandvars(work_dir), "query", "history", "query_history.jsonl")
+    counts = Counter()
+    pairs = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            queries = {entry["left_db_type"].lower(): entry["left_query"],
+                       entry["right_db_type"].lower(): entry["right_query"]}
+            if "postgresql" not in queries or is_modifying_query(queries["postgresql"]):
+                continue
+            key = normalize_query(queries["postgresql"])
+            counts[key] += 1
+            pairs[key] = queries  # The latest Oracle query of the same PostgreSQL query wins
+    return [_item(f"history_{i + 1}", pairs[key]["postgresql"], pairs[key].get("oracle", ""), count)
+            for i, (key, count) in enumerate(counts.most_common())]
+
+
+def workload_from_pg_stat_statements(connection, top: int = 50) -> list:
+    """
+    Most called SELECT statements of pg_stat_statements, weighted by their call count.
+
+    Statements with $n parameters are skipped: pg_stat_statements does not keep the values.
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+            SELECT queryid, query, calls
+            FROM pg_stat_statements
+            WHERE query ~* '^\\s*(select|with)\\s' AND dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+            ORDER BY calls DESC
+            LIMIT %s""", (top * 4,))
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+        connection.rollback()
+    items = []
+    skipped = 0
+    for queryid, query, calls in rows:
+        if re.search(r'\$\d+', query):
+            skipped += 1
+            continue
+        items.append(_item(f"pgss_{queryid}", query, "", calls))
+        if len(items) >= top:
+            break
+    if skipped:
+        log.info(f"Skipped {skipped} parameterized statements of pg_stat_statements")
+    return items
+
+
+def load_workload(path: str) -> dict:
+    """
+    Load a workload file.
+
+    Workload file (JSON):
+
+    {
+      "profiles": {... as in a suite file ...},
+      "postgres": "pg",
+      "oracle": "ora",
+      "queries": [
+        {"name": "order_lookup", "postgres_query": "SELECT ...", "oracle_query": "SELECT ...", "weight": 20}
+      ]
+    }
+
+    Raises:
+        ValueError if a query has no postgres_query or a non-positive weight.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        workload = json.load(f)
+    items = []
+    for index, query in enumerate(workload.get("queries", [])):
+        if not query.get("postgres_query"):
+            raise ValueError(f"Workload query {index + 1}: postgres_query is required")
+        if float(query.get("weight", 1)) <= 0:
+            raise ValueError(f"Workload query {index + 1}: weight must be positive")
+        items.append(_item(query.get("name", f"query_{index + 1}"), query["postgres_query"],
+                           query.get("oracle_query", ""), query.get("weight", 1)))
+    workload["queries"] = items
+    return workload
+
+
+def _execute(connection, query: str) -> int:
+    cursor = connection.cursor()
+    try:
+        cursor.execute(query)
+        rows = 0
+        if cursor.description:
+            while True:
+                batch = cursor.fetchmany(FETCH_SIZE)
+                if not batch:
+                    break
+                rows += len(batch)
+        return rows
+    finally:
+        cursor.close()
+
+
+def _session(index: int, profile: dict, items: list, query_key: str, deadline: float, seed: Optional[int],
+             stop: threading.Event, results: list) -> None:
+    """One replay session: its own connection, weighted random queries until the deadline."""
+    rng = random.Random(None if seed is None else seed + index)
+    weights = [item["weight"] for item in items]
+    latencies = {item["name"]: [] for item in items}
+    errors = {item["name"]: [] for item in items}
+    rows = Counter()
+    is_postgres = profile["db_type"].lower() == "postgresql"
+    connection = None
+    try:
+        connection = connect_profile(profile)
+        if is_postgres:
+            connection.autocommit = True
+        while time.time() < deadline and not stop.is_set():
+            item = rng.choices(items, weights)[0]
+            start_time = time.perf_counter()
+            try:
+                rows[item["name"]] += _execute(connection, item[query_key])
+                latencies[item["name"]].append(time.perf_counter() - start_time)
+            except Exception as e:
+                errors[item["name"]].append(str(e).strip())
+    except Exception as e:
+        log.error(f"Replay session {index} failed: {str(e)}")
+        errors.setdefault("<connect>", []).append(str(e).strip())
+    finally:
+        close_connection(connection)
+        results[index] = {"latencies": latencies, "errors": errors, "rows": rows}
+
+
+def replay(profile: dict, items: list, query_key: str = "postgres_query", sessions: int = DEFAULT_SESSIONS,
+           duration: float = DEFAULT_DURATION, seed: Optional[int] = None,
+           stop: Optional[threading.Event] = None) -> dict:
+    """
+    Replay a weighted workload with concurrent sessions for a fixed duration.
+
+    Every session has its own connection and picks the next query at random by weight, so over the run
+    the mix follows the relative frequencies. A query started before the deadline runs to completion.
+
+    Args:
+        profile: Connection profile (see suite_runner.load_suite).
+        items: Workload queries (name, postgres_query, oracle_query, weight).
+        query_key: "postgres_query" or "oracle_query".
+        sessions: Concurrent sessions.
+        duration: Seconds.
+        seed: Random seed, for the same query sequence on every run.
+        stop: Event to end the replay early.
+
+    Returns:
+        Dict with throughput, p50/p95/p99/max latency (seconds) and per query: executions, errors, latencies, rows.
+    """
+    items = [item for item in items if item[query_key]]
+    if not items:
+        raise ValueError(f"No queries to replay ({query_key})")
+    stop = stop or threading.Event()
+    results = [None] * sessions
+    start_time = time.time()
+    deadline = start_time + duration
+    log.info(f"Replaying {len(items)} queries on {profile['db_type']} with {sessions} sessions for {duration} seconds")
+    threads = [threading.Thread(target=_session, name=f"replay-{i}",
+                                args=(i, profile, items, query_key, deadline, seed, stop, results))
+               for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start_time
+
+    queries = {}
+    connect_errors = []
+    for result in results:
+        connect_errors += result["errors"].get("<connect>", [])
+    for item in items:
+        name = item["name"]
+        latencies = [v for result in results for v in result["latencies"][name]]
+        errors = [e for result in results for e in result["errors"][name]]
+        queries[name] = {
+            "weight": item["weight"],
+            "executions": len(latencies),
+            "errors": len(errors),
+            "error_samples": list(dict.fromkeys(errors))[:MAX_ERROR_SAMPLES],
+            "rows": sum(result["rows"][name] for result in results),
+            **latency_summary(latencies),
+        }
+    executions = sum(q["executions"] for q in queries.values())
+    all_latencies = [v for result in results for values in result["latencies"].values() for v in values]
+    return {
+        "db_type": profile["db_type"],
+        "sessions": sessions,
+        "duration": duration,
+        "elapsed": round(elapsed, 3),
+        "executions": executions,
+        "errors": sum(q["errors"] for q in queries.values()) + len(connect_errors),
+        "connect_errors": connect_errors[:MAX_ERROR_SAMPLES],
+        "throughput": round(executions / elapsed, 2) if elapsed else None,
+        **latency_summary(all_latencies),
+        "queries": queries,
+    }
+
+
+def format_replay(report: dict) -> str:
+    """Per query latency table of one or two replays (PostgreSQL, then Oracle side by side)."""
+    runs = [report["postgresql"]] + ([report["oracle"]] if report.get("oracle") else [])
+
+    def ms(value):
+        return "-" if value is None else f"{value * 1000:.1f}"
+
+    lines = []
+    for run in runs:
+        lines.append(f"{run['db_type']}: {run['executions']} executions in {run['elapsed']:.1f} s "
+                     f"({run['throughput']} q/s, {run['sessions']} sessions), {run['errors']} errors, "
+                     f"p50 {ms(run['p50'])} ms, p95 {ms(run['p95'])} ms, p99 {ms(run['p99'])} ms")
+    header = f"{'query':<30}" + "".join(f"{run['db_type'][:10] + ' n':>14}{'p50 ms':>10}{'p95 ms':>10}{'err':>6}"
+                                         for run in runs)
+    lines.append(header)
+    for name in runs[0]["queries"]:
+        line = f"{name[:29]:<30}"
+        for run in runs:
+            query = run["queries"].get(name)
+            if query:
+                line += f"{query['executions']:>14}{ms(query['p50']):>10}{ms(query['p95']):>10}{query['errors']:>6}"
+            else:
+                line += f"{'-':>14}{'-':>10}{'-':>10}{'-':>6}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def write_replay_report(report: dict, path: str) -> str:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+    return path
+
+
+def run_replay(items: list, postgres_profile: dict, oracle_profile: Optional[dict] = None,
+               sessions: int = DEFAULT_SESSIONS, duration: float = DEFAULT_DURATION,
+               seed: Optional[int] = None) -> dict:
+    """
+    Replay the workload on PostgreSQL, then (optionally) the Oracle queries of the same workload with the
+    same sessions, duration and seed, one database after the other.
+    """
+    report = {"started": datetime.now().isoformat(timespec="seconds"), "seed": seed,
+              "workload": items,
+              "postgresql": replay(postgres_profile, items, "postgres_query", sessions, duration, seed)}
+    if oracle_profile:
+        report["oracle"] = replay(oracle_profile, items, "oracle_query", sessions, duration, seed)
+    report["finished"] = datetime.now().isoformat(timespec="seconds")
+    return report
@@ -0,0 +1,58 @@
+/* eslint-disable @typescript-eslint/no-explicit-any */
+import { useCallback, useEffect, useRef, useState } from "react";
+import { JobEvent } from "../types/job";
+
+const finishedStatuses = ["done", "failed", "cancelled"];
+
+const isFinished = (job: JobEvent | null) =>
+  !!job && finishedStatuses.includes(job.status);
+
+// Follows one background job of the Python side through the 'job-progress' events
+const useJob = () => {
+  const jobIdRef = useRef<string | null>(null);
+  const [job, setJob] = useState<JobEvent | null>(null);
+
+  useEffect(() => {
+    const onProgress = (event: Event) => {
+      const detail = (event as CustomEvent<JobEvent>).detail;
+      if (detail?.id && detail.id === jobIdRef.current) setJob(detail);
+    };
+    window.addEventListener("job-progress", onProgress);
+    return () => window.removeEventListener("job-progress", onProgress);
+  }, []);
+
+  const start = useCallback(async (submit: () => Promise<string>) => {
+    setJob(null);
+    const id = await submit();
+    jobIdRef.current = id;
+    // Events sent before the id came back are missed, read the current state once
+    const current: JobEvent | null = await (window as any).pywebview.api.get_job(id);
+    setJob((prev) => (prev?.id === id && isFinished(prev) ? prev : current));
+  }, []);
+
+  const cancel = useCallback(async () => {
+    if (jobIdRef.current) {
+      await (window as any).pywebview.api.cancel_job(jobIdRef.current);
+    }
+  }, []);
+
+  const isRunning = !!job && !isFinished(job);
+
+  return { job, isRunning, start, cancel };
+};
+
+const jobResultText = (job: JobEvent | null): string | null => {
+  if (!job) return null;
+  if (job.status === "done") return job.result;
+  if (job.status === "failed") return "Error: " + job.error;
+  if (job.status === "cancelled") return "Cancelled";
+  return null;
+};
+
+const jobProgressText = (job: JobEvent | null): string => {
+  if (!job) return "";
+  const phase = job.phase || job.status;
+  return job.rows ? `${phase} (${job.rows} rows, ${job.mb_written} MB)` : phase;
+};
+
+export { useJob, jobResultText, jobProgressText };
@@ -0,0 +1,14 @@
+/* eslint-disable @typescript-eslint/no-explicit-any */
+export interface JobEvent {
+  id: string;
+  name: string;
+  status: "queued" | "running" | "done" | "failed" | "cancelled";
+  phase: string;
+  rows: number;
+  mb_written: number;
+  result: any;
+  error: string | null;
+  created: number;
+  started: number | null;
+  finished: number | null;
+}
@@ -5,6 +5,7 @@ import * as monaco from "monaco-editor";
 import { debounce } from "../utils/helper";
 import { getLocalStorageItem, setLocalStorageItem } from "../utils/storage";
 import { useAppContext } from "../hooks/common";
+import { jobProgressText, jobResultText, useJob } from "../hooks/job";
 import { cleanString } from "../utils/string";
 import "../styles/monaco.css";
 
@@ -29,14 +30,14 @@ export function QueryDiffStrict() {
   const ctx = useAppContext();
   const oraEditorRef = useRef<monaco.editor.IStandaloneCodeEditor | null>(null);
   const pgEditorRef = useRef<monaco.editor.IStandaloneCodeEditor | null>(null);
-  const [errors, setErrors] = useState<any>(null);
   const [oraQuery, setOraQuery] = useState<string>(
     getLocalStorageItem(queryKey.oracle) || "select 'ora2pg' cols from dual"
   );
   const [pgQuery, setPgQuery] = useState<string>(
     getLocalStorageItem(queryKey.postgre) || "select 'ora2pg' cols"
   );
-  const [isLoading, setIsLoading] = useState<boolean>(false);
+  const { job, isRunning, start, cancel } = useJob();
+  const errors = jobResultText(job);
 
   const saveOraQuery = useCallback(
     debounce((value: string) => {
@@ -73,7 +74,6 @@ export function QueryDiffStrict() {
   };
 
   const handleSubmit = async () => {
-    setIsLoading(true);
     const oraConn = ctx?.settings?.oracleConnection;
     const oraQuery = oraEditorRef.current?.getValue();
 
@@ -84,19 +84,19 @@ export function QueryDiffStrict() {
     const workDir = ctx?.settings?.workDir;
 
     try {
-      const response = await (window as any).pywebview.api.query_diff(
-        oraConn,
-        oraQuery,
-        pgConn,
-        pgQuery,
-        workDir,
-        winmergePath
+      // Runs as a background job: progress comes through 'job-progress' events
+      await start(() =>
+        (window as any).pywebview.api.submit_query_diff(
+          oraConn,
+          oraQuery,
+          pgConn,
+          pgQuery,
+          workDir,
+          winmergePath
+        )
       );
-      setErrors(response);
-      setIsLoading(false);
     } catch (e) {
       alert("Error: " + e);
-      setIsLoading(false);
     }
   };
 
@@ -182,9 +182,17 @@ export function QueryDiffStrict() {
           />
         </div>
 
-        <button className="mt-4" onClick={handleSubmit} disabled={isLoading}>
-          {isLoading ? "Executing..." : "Execute"}
-        </button>
+        <div className="flex flex-row items-center gap-4 mt-4">
+          <button onClick={handleSubmit} disabled={isRunning}>
+            {isRunning ? "Executing..." : "Execute"}
+          </button>
+          <button onClick={cancel} hidden={!isRunning}>
+            Cancel
+          </button>
+          <p className="text-sm text-gray-400" hidden={!isRunning}>
+            {jobProgressText(job)}
+          </p>
+        </div>
       </div>
     </>
   );